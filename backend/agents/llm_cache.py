@@ -0,0 +1,160 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Sequence
+from dotenv import load_dotenv
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage, message_to_dict, messages_from_dict
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from shared_utils.metrics import record_cache
+
+load_dotenv(override=True)
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "false").lower() == "true"
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", 3600))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 512))
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH")
+LLM_CACHE_SKIP_TOOL_RESULTS = os.getenv("LLM_CACHE_SKIP_TOOL_RESULTS", "true").lower() == "true"
+
+
+def _normalize_message(message: BaseMessage) -> Dict:
+    """ Reduce a message to the parts that influence the model's answer """
+
+    content = message.content
+    if isinstance(content, str):
+        content = " ".join(content.split())
+    normalized = {"type": message.type, "content": content}
+    if isinstance(message, AIMessage) and message.tool_calls:
+        # Tool call ids are random per call, only the call itself matters
+        normalized["tool_calls"] = [{"name": call["name"], "args": call["args"]} for call in message.tool_calls]
+    if isinstance(message, ToolMessage):
+        normalized["name"] = message.name
+    return normalized
+
+
+def tools_fingerprint(tools: Sequence) -> str:
+    """ Stable description of the tools bound to the model """
+
+    return json.dumps([convert_to_openai_tool(tool) for tool in tools], sort_keys=True, default=str)
+
+
+class LLMResponseCache:
+    """
+    Exact-match cache for chat model responses.
+
+    Keys hash the model name, system prompt, bound tools and the normalized message list, so
+    identical conversation prefixes (greetings, common clarifications, repeated opening queries)
+    are answered without a network call. Entries are bounded by a TTL and an LRU limit and can
+    optionally be persisted to a SQLite file shared across restarts.
+    """
+
+    def __init__(
+        self,
+        ttl: float = LLM_CACHE_TTL,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        path: Optional[str] = LLM_CACHE_PATH,
+        skip_tool_results: bool = LLM_CACHE_SKIP_TOOL_RESULTS,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.skip_tool_results = skip_tool_results
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT, expires_at REAL, used_at REAL)")
+            self._db.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),))
+            self._db.commit()
+
+    def make_key(self, model: str, system_prompt: str, tools: str, messages: Sequence[BaseMessage]) -> str:
+        """ Hash of (model, system prompt, bound tools, normalized message list) """
+
+        payload = json.dumps(
+            [model, " ".join(system_prompt.split()), tools, [_normalize_message(m) for m in messages]],
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def is_cacheable(self, messages: Sequence[BaseMessage]) -> bool:
+        """ Turns whose latest exchange contains tool results are left out when skip_tool_results is set """
+
+        if not self.skip_tool_results:
+            return True
+        for message in reversed(messages):
+            if isinstance(message, ToolMessage):
+                self.skipped += 1
+                record_cache("llm_response", None)
+                return False
+            if isinstance(message, HumanMessage):
+                return True
+        return True
+
+    def get(self, key: str) -> Optional[AIMessage]:
+        """ Return a fresh copy of the cached response, or None on a miss """
+
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                entry = None
+            if entry is None and self._db is not None:
+                row = self._db.execute("SELECT expires_at, value FROM llm_cache WHERE key = ? AND expires_at > ?", (key, now)).fetchone()
+                if row:
+                    entry = (row[0], row[1])
+                    self._db.execute("UPDATE llm_cache SET used_at = ? WHERE key = ?", (now, key))
+                    self._db.commit()
+            if entry is None:
+                self.misses += 1
+                record_cache("llm_response", False)
+                return None
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self.hits += 1
+            record_cache("llm_response", True)
+
+        message = messages_from_dict([json.loads(entry[1])])[0]
+        # add_messages de-duplicates by id, so every hit needs its own message and tool call ids
+        return message.model_copy(update={
+            "id": f"cached-{uuid.uuid4()}",
+            "tool_calls": [{**call, "id": str(uuid.uuid4())} for call in message.tool_calls],
+        })
+
+    def set(self, key: str, message: AIMessage) -> None:
+        """ Store a model response """
+
+        now = time.time()
+        entry = (now + self.ttl, json.dumps(message_to_dict(message), default=str))
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?)", (key, entry[1], entry[0], now))
+                self._db.execute(
+                    "DELETE FROM llm_cache WHERE key NOT IN (SELECT key FROM llm_cache ORDER BY used_at DESC LIMIT ?)",
+                    (self.max_entries,),
+                )
+                self._db.commit()
+
+    def stats(self) -> Dict[str, float]:
+        """ Hit/miss counters and hit rate over cacheable lookups """
+
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "skipped": self.skipped,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+        }
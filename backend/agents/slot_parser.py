@@ -0,0 +1,330 @@
+import os
+import re
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+from dotenv import load_dotenv
+from pydantic import BaseModel, Field
+from shared_utils.load_data import load_airports, load_city_airports
+
+load_dotenv(override=True)
+
+FAST_PATH_ENABLED = os.getenv("FAST_PATH_ENABLED", "true").lower() == "true"
+FAST_PATH_MIN_CONFIDENCE = float(os.getenv("FAST_PATH_MIN_CONFIDENCE", 0.9))
+# SerpAPI's Google Flights engine takes at most 9 passengers per search
+MAX_PASSENGERS = 9
+
+MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9,
+}
+# Words that never name a place, so they are never looked up in the airport index
+STOPWORDS = {
+    "i", "we", "me", "us", "my", "want", "wants", "need", "would", "like", "to", "fly", "flying",
+    "flight", "flights", "book", "booking", "find", "search", "show", "get", "a", "an", "the",
+    "from", "please", "cheap", "cheapest", "one", "way", "round", "trip", "return", "ticket",
+    "tickets", "for", "on", "and", "with", "in", "of", "at", "go", "going", "travel", "hey", "hi",
+}
+# Generic airport-name words that say nothing about the city
+AIRPORT_NAME_FILLER = {
+    "international", "airport", "airfield", "air", "base", "regional", "municipal", "field",
+    "intl", "de", "del", "the", "of", "and", "airstrip", "aerodrome", "county", "seaplane",
+}
+
+MONTH_PATTERN = r"(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?"
+DATE_PATTERNS = [
+    ("iso", re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b")),
+    ("day_month", re.compile(rf"\b(\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?{MONTH_PATTERN}(?:,?\s+(\d{{4}}))?", re.IGNORECASE)),
+    ("month_day", re.compile(rf"\b{MONTH_PATTERN}\s+(\d{{1,2}})(?:st|nd|rd|th)?\b(?:,?\s+(\d{{4}}))?", re.IGNORECASE)),
+    ("relative", re.compile(r"\b(today|tomorrow|day after tomorrow)\b", re.IGNORECASE)),
+]
+RETURN_MARKER = re.compile(r"(return(?:ing)?|back|coming back|until|till)(?:\s+(?:on|by))?\s*$", re.IGNORECASE)
+RANGE_MARKER = re.compile(r"^\s*(?:to|-|until|till|through)\s*$", re.IGNORECASE)
+ROUND_TRIP_MARKER = re.compile(r"\b(round[\s-]?trip|return(?:ing)?|coming back)\b", re.IGNORECASE)
+PASSENGER_PATTERN = re.compile(
+    r"\b(\d+|a|an|one|two|three|four|five|six|seven|eight|nine)\s+"
+    r"(adults?|children|child|kids?|infants?|babies|baby|people|persons|passengers|travell?ers)\b",
+    re.IGNORECASE,
+)
+# Comparisons, cancellations and corrections are not new searches, even when they name a full route
+NOT_A_SEARCH = re.compile(
+    r"\b(cancel\w*|refund\w*|reschedul\w*|chang\w*|modify|amend|instead|actually|rather|than|"
+    r"compar\w*|versus|vs|or)\b",
+    re.IGNORECASE,
+)
+SOLO_PATTERN = re.compile(r"\b(just me|only me|alone|myself|solo)\b", re.IGNORECASE)
+# Talk of a party the counts above did not account for ("my family", "2 seniors", "we")
+PARTY_PATTERN = re.compile(
+    r"\b(family|families|seniors?|elderly|pensioners?|students?|group|team|couple|we|us|our|wife|husband|"
+    r"partner|spouse|parents?|friends?|colleagues?|adults?|children|child|kids?|infants?|babies|baby|people|"
+    r"persons|passengers|travell?ers)\b",
+    re.IGNORECASE,
+)
+ROUTE_SEPARATOR = re.compile(r"\s+(?:to|->|→)\s+|\s*(?:->|→)\s*", re.IGNORECASE)
+ORIGIN_BOUNDARY = re.compile(r"[,;\n]|\bfrom\b", re.IGNORECASE)
+DESTINATION_BOUNDARY = re.compile(r"[,;\n]|\bto\b|->|→", re.IGNORECASE)
+WORD_PATTERN = re.compile(r"[A-Za-zÀ-ÿ.'-]+")
+
+
+class SlotParse(BaseModel):
+    departure_id: Optional[str] = Field(description="Departure airport code (IATA)", default=None)
+    arrival_id: Optional[str] = Field(description="Arrival airport code (IATA)", default=None)
+    outbound_date: Optional[str] = Field(description="Outbound date in YYYY-MM-DD format", default=None)
+    return_date: Optional[str] = Field(description="Return date in YYYY-MM-DD format", default=None)
+    adults: Optional[int] = Field(description="Number of adults, None until the message states the party", default=None)
+    children: int = Field(description="Number of children", default=0)
+    round_trip: bool = Field(description="Whether the user asked for a return flight", default=False)
+    confidence: float = Field(description="Lowest confidence across the filled slots", default=0.0)
+    issues: List[str] = Field(description="Reasons the parse cannot be used as-is", default_factory=list)
+
+    @property
+    def complete(self) -> bool:
+        """ All slots required for a flight search are filled and nothing is ambiguous """
+
+        if self.issues or not (self.departure_id and self.arrival_id and self.outbound_date and self.adults):
+            return False
+        if self.round_trip and not self.return_date:
+            return False
+        return self.confidence >= FAST_PATH_MIN_CONFIDENCE
+
+    def to_params(self) -> Dict:
+        """ Parameters in the shape expected by the get_flights tool """
+
+        return self.model_dump(include={"departure_id", "arrival_id", "outbound_date", "return_date", "adults", "children"}, exclude_none=True)
+
+
+class SlotParser:
+    """
+    Rule-based intent and slot extractor for well-formed flight requests.
+
+    Recognises IATA codes, city names served by a single airport (flight_responses/city-airports.csv),
+    airport and region names that map to a single airport in the local airport data, ISO and natural-language dates, and passenger counts. Anything ambiguous is
+    reported in `issues` so the caller can fall back to the LLM conversation, as are messages
+    that compare, cancel or correct instead of asking for one search, and second routes or airports.
+    """
+
+    def __init__(self, airports: Optional[List[Dict[str, str]]] = None, cities: Optional[List[Dict[str, str]]] = None):
+        airports = airports if airports is not None else load_airports()
+        cities = cities if cities is not None else load_city_airports()
+        self.iata_codes: Set[str] = {row["iata"] for row in airports if row.get("iata")}
+        # City names come first: airport names alone miss "Mumbai" and mistake "Hyderabad" for HDD in Pakistan
+        self.city_index: Dict[str, Set[str]] = {}
+        for row in cities:
+            if row["iata"] in self.iata_codes:
+                self.city_index.setdefault(" ".join(self._words(row["city"])), set()).add(row["iata"])
+        self.name_index: Dict[str, Set[str]] = {}
+        self.region_index: Dict[str, Set[str]] = {}
+        for row in airports:
+            # Airports without an ICAO code are heliports, seaplane bases and strips
+            if not row.get("iata") or not row.get("icao"):
+                continue
+            words = [w for w in self._words(row["airport"]) if w not in AIRPORT_NAME_FILLER]
+            for n in range(1, 4):
+                for i in range(len(words) - n + 1):
+                    self.name_index.setdefault(" ".join(words[i:i + n]), set()).add(row["iata"])
+            region = " ".join(self._words(row.get("region_name", "")))
+            if region:
+                self.region_index.setdefault(region, set()).add(row["iata"])
+
+    @staticmethod
+    def _words(text: str) -> List[str]:
+        return [w.strip(".'-").lower() for w in WORD_PATTERN.findall(text.replace("-", " ")) if w.strip(".'-")]
+
+    def parse(self, message: str, today: Optional[date] = None) -> SlotParse:
+        """ Extract flight search slots from a single user message """
+
+        today = today or date.today()
+        result = SlotParse()
+        confidences = []
+        masked = message
+        marker = NOT_A_SEARCH.search(message)
+        if marker:
+            result.issues.append(f"not a plain search request ({marker.group(0).lower()!r})")
+
+        dates = self._find_dates(message, today)
+        for start, end, _, _ in dates:
+            masked = masked[:start] + "," + " " * (end - start - 1) + masked[end:]
+        outbound, returning = [], []
+        for idx, (start, end, value, confidence) in enumerate(dates):
+            before = message[dates[idx - 1][1] if idx else 0:start]
+            if RETURN_MARKER.search(before) or (idx == 1 and RANGE_MARKER.match(before)):
+                returning.append((value, confidence))
+            else:
+                outbound.append((value, confidence))
+        if len(outbound) > 1 or len(returning) > 1:
+            result.issues.append("multiple candidate dates")
+        if outbound:
+            value, confidence = outbound[0]
+            if value < today:
+                result.issues.append("outbound date is in the past")
+            result.outbound_date = value.isoformat()
+            confidences.append(confidence)
+        if returning:
+            value, confidence = returning[0]
+            if outbound and value <= outbound[0][0]:
+                result.issues.append("return date is not after the outbound date")
+            result.return_date = value.isoformat()
+            result.round_trip = True
+            confidences.append(confidence)
+        if ROUND_TRIP_MARKER.search(masked):
+            result.round_trip = True
+
+        masked = self._parse_passengers(masked, result)
+
+        routes = self._find_routes(masked)
+        origin, destination = routes[0] if routes else (None, None)
+        if len(routes) > 1:
+            result.issues.append("more than one route mentioned")
+        for slot, resolved in (("departure_id", origin), ("arrival_id", destination)):
+            if resolved is None:
+                continue
+            code, confidence = resolved
+            if code is None:
+                result.issues.append(f"ambiguous {slot}")
+                continue
+            setattr(result, slot, code)
+            confidences.append(confidence)
+        if result.departure_id and result.departure_id == result.arrival_id:
+            result.issues.append("departure and arrival are the same airport")
+        other_codes = self._iata_mentions(masked) - {result.departure_id, result.arrival_id}
+        if other_codes:
+            result.issues.append(f"other airports mentioned: {', '.join(sorted(other_codes))}")
+
+        result.confidence = min(confidences) if confidences else 0.0
+        return result
+
+    def parse_passengers(self, message: str) -> Optional[Tuple[int, int]]:
+        """ (adults, children) when the message states the party and nothing else about it is unclear """
+
+        result = SlotParse()
+        self._parse_passengers(message, result)
+        if result.adults is None or result.issues:
+            return None
+        return result.adults, result.children
+
+    def _find_dates(self, message: str, today: date) -> List[Tuple[int, int, date, float]]:
+        """ Return (start, end, date, confidence) for every date mention, in text order """
+
+        found = []
+        taken = []
+        for kind, pattern in DATE_PATTERNS:
+            for match in pattern.finditer(message):
+                if any(start < match.end() and match.start() < end for start, end in taken):
+                    continue
+                parsed = self._to_date(kind, match, today)
+                if parsed is None:
+                    continue
+                taken.append((match.start(), match.end()))
+                found.append((match.start(), match.end(), *parsed))
+        return sorted(found)
+
+    @staticmethod
+    def _to_date(kind: str, match: re.Match, today: date) -> Optional[Tuple[date, float]]:
+        try:
+            if kind == "iso":
+                year, month, day = (int(g) for g in match.groups())
+                return date(year, month, day), 1.0
+            if kind == "relative":
+                offset = {"today": 0, "tomorrow": 1, "day after tomorrow": 2}[match.group(1).lower()]
+                return today + timedelta(days=offset), 0.95
+            if kind == "day_month":
+                day, month, year = match.group(1), match.group(2), match.group(3)
+            else:
+                month, day, year = match.group(1), match.group(2), match.group(3)
+            month_number = MONTHS[month.lower()[:3]]
+            if year:
+                return date(int(year), month_number, int(day)), 0.95
+            # Without a year take the next occurrence of that day
+            value = date(today.year, month_number, int(day))
+            if value < today:
+                value = date(today.year + 1, month_number, int(day))
+            return value, 0.9
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _parse_passengers(masked: str, result: SlotParse) -> str:
+        """ Fill adults/children from the message and return it with the counts masked out """
+
+        adults = children = None
+        # A solo traveller can still bring children ("just me and 1 child")
+        solo = SOLO_PATTERN.search(masked)
+        for match in PASSENGER_PATTERN.finditer(masked):
+            count_text, kind = match.group(1).lower(), match.group(2).lower()
+            count = int(count_text) if count_text.isdigit() else NUMBER_WORDS[count_text]
+            if kind.startswith(("infant", "bab")):
+                result.issues.append("infants are not supported by the fast path")
+            elif kind.startswith(("child", "kid")):
+                children = (children or 0) + count
+            else:
+                adults = (adults or 0) + count
+        if adults is None and solo:
+            adults = 1
+        if children is not None:
+            result.children = children
+        if adults is not None:
+            result.adults = adults
+            if adults < 1:
+                result.issues.append("at least one adult is required")
+            if adults + result.children > MAX_PASSENGERS:
+                result.issues.append(f"more than {MAX_PASSENGERS} passengers")
+        masked = SOLO_PATTERN.sub(",", PASSENGER_PATTERN.sub(",", masked))
+        unparsed = PARTY_PATTERN.search(masked)
+        if unparsed:
+            result.issues.append(f"passengers not understood ({unparsed.group(0).lower()!r})")
+        return masked
+
+    def _find_routes(self, masked: str) -> List[Tuple]:
+        """ Resolve (origin, destination) around every "X to Y" that names a place on both sides, in text order """
+
+        routes = []
+        for separator in ROUTE_SEPARATOR.finditer(masked):
+            before = ORIGIN_BOUNDARY.split(masked[:separator.start()])[-1]
+            after = DESTINATION_BOUNDARY.split(masked[separator.end():])[0]
+            origin = self._resolve(self._words_with_case(before), from_end=True)
+            destination = self._resolve(self._words_with_case(after), from_end=False)
+            if origin is not None and destination is not None:
+                routes.append((origin, destination))
+        return routes
+
+    def _iata_mentions(self, masked: str) -> Set[str]:
+        """ Airport codes written anywhere in the message """
+
+        return {w for w in self._words_with_case(masked) if len(w) == 3 and w.isupper() and w in self.iata_codes}
+
+    @staticmethod
+    def _words_with_case(text: str) -> List[str]:
+        return [w.strip(".'-") for w in WORD_PATTERN.findall(text) if w.strip(".'-")]
+
+    def _resolve(self, words: List[str], from_end: bool) -> Optional[Tuple[Optional[str], float]]:
+        """
+        Resolve the place named closest to the route keyword.
+        Returns (code, confidence), (None, 0) when the place is ambiguous, or None when nothing looks like a place.
+        """
+
+        # Explicit IATA codes are written in capitals, which keeps words like "and" or "the" out
+        ordered = list(reversed(words)) if from_end else words
+        for word in ordered:
+            if len(word) == 3 and word.isupper() and word in self.iata_codes:
+                return word, 1.0
+            if word.lower() not in STOPWORDS:
+                break
+
+        lowered = [w.lower() for w in words]
+        for n in (3, 2, 1):
+            if len(lowered) < n:
+                continue
+            phrase_words = lowered[-n:] if from_end else lowered[:n]
+            if all(w in STOPWORDS for w in phrase_words):
+                continue
+            phrase = " ".join(phrase_words)
+            matches = self.city_index.get(phrase) or self.name_index.get(phrase) or self.region_index.get(phrase)
+            if not matches:
+                continue
+            if len(matches) == 1:
+                return next(iter(matches)), 0.9
+            return None, 0.0
+        return None
@@ -2,6 +2,7 @@ import os
 import sys
 import json
 import uuid
+import asyncio
 from typing import Optional
 from datetime import datetime
 from dotenv import load_dotenv
@@ -11,12 +12,25 @@ from typing import Annotated, List, Dict, Tuple
 from langgraph.graph.message import add_messages
 from langgraph.graph import END, StateGraph, START
 from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langchain_core.language_models import BaseChatModel
 from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.messages import HumanMessage, SystemMessage, ToolMessage
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
 sys.path.append(os.path.abspath(os.path.join(os.getcwd(), '..')))
 from backend.tools.airports import get_airport
 from backend.tools.flights import get_flights
+from backend.tools.result_store import result_store
+from backend.agents.slot_parser import SlotParser, SlotParse, FAST_PATH_ENABLED
+from backend.agents.llm_cache import LLMResponseCache, LLM_CACHE_ENABLED, tools_fingerprint
+from shared_utils.logger import get_logger, throttled
+from shared_utils.tracing import span, traced, current_span
 load_dotenv(override=True)
+logger = get_logger()
+
+FAST_PATH_PROMPT = """
+    A flight search for {summary} has already been started for the user's last message and the results will appear in the flight panel.
+    Briefly restate these search details to the user in one or two sentences. Do not ask for confirmation and do not ask further questions.
+"""
 
 class State(BaseModel):
     messages: Annotated[List, add_messages]
@@ -31,7 +45,12 @@ class TravelAgent:
     TOOLS = [get_airport, get_flights]
     graph = None
 
-    def __init__(self):
+    def __init__(self, llm: Optional[BaseChatModel] = None, tools: Optional[List] = None, checkpointer: Optional[BaseCheckpointSaver] = None):
+        # Overrides let benchmarks and tests run the graph with a scripted model and stubbed tools
+        if llm is not None:
+            self.llm = llm
+        if tools is not None:
+            self.TOOLS = tools
         system_message = f"""
             you are a smart travel agency agent, use the tool to lookup information.
             Do not ask multiple questions at once.
@@ -42,8 +61,13 @@ class TravelAgent:
             Once details are finalized, respond with flight options based on them.
             Do not ask the user for the current year; assume it is {self.current_year}.
         """
-        self.memory = MemorySaver()
+        self.system_message = system_message
+        self.memory = checkpointer or MemorySaver()
+        self.flights_tool = next(tool for tool in self.TOOLS if tool.name == "get_flights")
         self.graph = self._build_graph(system_message)
+        self.slot_parser = SlotParser() if FAST_PATH_ENABLED else None
+        self.llm_cache = LLMResponseCache() if LLM_CACHE_ENABLED else None
+        self.tools_fingerprint = tools_fingerprint(self.TOOLS) if self.llm_cache else None
 
     def _build_graph(self, system_message):
         """ Build the state graph for the travel agent """
@@ -59,10 +83,28 @@ class TravelAgent:
     def _worker(self, state: State, system_message: str):
         """ Worker node to process messages and invoke the LLM with tools """
 
-        messages = [SystemMessage(content=system_message)] + state.messages
-        worker_llm = self.llm.bind_tools(self.TOOLS)
-        response = worker_llm.invoke(messages)
-        return {'messages': [response]}
+        with span("agent.worker", messages=len(state.messages)) as current:
+            cache_key = None
+            if self.llm_cache and self.llm_cache.is_cacheable(state.messages):
+                cache_key = self.llm_cache.make_key(self.llm.model, system_message, self.tools_fingerprint, state.messages)
+                cached = self.llm_cache.get(cache_key)
+                current.set_attribute("cache_hit", cached is not None)
+                if cached is not None:
+                    if throttled("llm_cache_stats", 10.0):
+                        logger.info("LLM cache hit: %s", self.llm_cache.stats())
+                    return {'messages': [cached]}
+
+            messages = [SystemMessage(content=system_message)] + state.messages
+            worker_llm = self.llm.bind_tools(self.TOOLS)
+            response = worker_llm.invoke(messages)
+            usage = getattr(response, "usage_metadata", None)
+            if usage:
+                current.set_attribute("input_tokens", usage.get("input_tokens"))
+                current.set_attribute("output_tokens", usage.get("output_tokens"))
+            current.set_attribute("tool_calls", [call["name"] for call in response.tool_calls])
+            if cache_key:
+                self.llm_cache.set(cache_key, response)
+            return {'messages': [response]}
 
     def _worker_router(self, state: State) -> str:
         """ Decide whether to invoke tools or end the conversation """
@@ -78,6 +120,7 @@ class TravelAgent:
 
         return str(uuid.uuid4())
 
+    @traced("agent.turn")
     async def process_message(self, message: str, history: List, thread: str) -> Tuple[List, Dict, Dict]:
         """ Process a user message and return updated history, flight data and original params """
         if not message.strip() and len(history) == 0:
@@ -98,16 +141,34 @@ class TravelAgent:
             user = {"role": "user", "content": message}
             history = history + [user]
         
-        # As the accumulator is add_message, the state message will be updated automatically
-        state = State(messages=[HumanMessage(content=message)])
-        try:
-            result = await self.graph.ainvoke(state, config=config)
-        except Exception as e:
-            print(f"Graph error: {e}")
-            # Append error to history (which already has user)
-            error_reply = {"role": "assistant", "content": f"System error: {str(e)}"}
-            history = history + [error_reply]
-            return history, {"error": str(e)}, None
+        parsed = self.slot_parser.parse(message) if self.slot_parser else None
+        if parsed and parsed.adults is None and not parsed.children and not parsed.issues:
+            # The party may have been given in an earlier turn ("2 adults"), then only the route changes
+            party = self._stated_passengers(previous_state)
+            if party:
+                parsed.adults, parsed.children = party
+        current_span().set_attribute("fast_path", bool(parsed and parsed.complete))
+        if parsed and parsed.complete:
+            try:
+                new_messages = await self._fast_path_turn(message, parsed, previous_state, config)
+            except Exception as e:
+                logger.error("Fast path error: %s", e, exc_info=True)
+                error_reply = {"role": "assistant", "content": f"System error: {str(e)}"}
+                history = history + [error_reply]
+                return history, {"error": str(e)}, None
+            result = {"messages": new_messages}
+            previous_messages_len = 0
+        else:
+            # As the accumulator is add_message, the state message will be updated automatically
+            state = State(messages=[HumanMessage(content=message)])
+            try:
+                result = await self.graph.ainvoke(state, config=config)
+            except Exception as e:
+                logger.error("Graph error: %s", e, exc_info=True)
+                # Append error to history (which already has user)
+                error_reply = {"role": "assistant", "content": f"System error: {str(e)}"}
+                history = history + [error_reply]
+                return history, {"error": str(e)}, None
         
         ai_msg = result["messages"][-1]
         reply = {"role": "assistant", "content": ai_msg.content}
@@ -119,10 +180,8 @@ class TravelAgent:
         flights_fetched_this_turn = self._has_available_flights(flight_data)
         
         if flights_fetched_this_turn:
-            print("-"*50, "\n", original_params, "\n", "-"*50)
+            logger.debug("Flights fetched this turn with params %s", original_params)
             history[-1]["content"] += "\n\nI've loaded the available flights in the panel to the right. Please select one to view details and booking options."
-            print("**"*50)
-            print(json.dumps(state.model_dump(), indent=2, default=str))
             # Return the flight data only if fetched this turn
             return history, flight_data, original_params
         else:
@@ -130,6 +189,65 @@ class TravelAgent:
             return history, {}, None
 
 
+    def _stated_passengers(self, previous_state) -> Optional[Tuple[int, int]]:
+        """ (adults, children) of the conversation's latest flight search or latest message that stated the party """
+
+        previous_messages = previous_state.values.get("messages", []) if previous_state and previous_state.values else []
+        for message in reversed(previous_messages):
+            if isinstance(message, AIMessage):
+                for call in message.tool_calls:
+                    params = call.get("args", {}).get("params", {})
+                    if call.get("name") == "get_flights" and params.get("adults"):
+                        return params["adults"], params.get("children", 0)
+            elif isinstance(message, HumanMessage) and isinstance(message.content, str):
+                party = self.slot_parser.parse_passengers(message.content)
+                if party:
+                    return party
+        return None
+
+    async def _fast_path_turn(self, message: str, parsed: SlotParse, previous_state, config: Dict) -> List:
+        """
+        Handle a fully specified flight request without the clarify/confirm round trips.
+        The flight search and the LLM's confirmation run concurrently, then the turn is written to the
+        checkpoint as if the worker had called get_flights itself so later turns see the results.
+        """
+
+        params = parsed.to_params()
+        logger.info("Fast path hit, searching flights with %s", params)
+        previous_messages = previous_state.values.get("messages", []) if previous_state and previous_state.values else []
+        human = HumanMessage(content=message)
+        summary = ", ".join(f"{key}={value}" for key, value in params.items())
+        confirmation_messages = [
+            SystemMessage(content=self.system_message + FAST_PATH_PROMPT.format(summary=summary)),
+            *previous_messages,
+            human,
+        ]
+
+        search, confirmation = await asyncio.gather(
+            self.flights_tool.ainvoke({"params": params}),
+            self.llm.ainvoke(confirmation_messages),
+            return_exceptions=True,
+        )
+        if isinstance(search, Exception):
+            raise search
+        if isinstance(confirmation, Exception):
+            logger.error("Fast path confirmation failed: %s", confirmation)
+            confirmation = AIMessage(content=f"Searching flights for {summary}.")
+
+        tool_call_id = f"fast_path_{uuid.uuid4().hex}"
+        new_messages = [
+            human,
+            AIMessage(content="", tool_calls=[{"name": "get_flights", "args": {"params": params}, "id": tool_call_id}]),
+            ToolMessage(
+                content=search if isinstance(search, str) else json.dumps(search, ensure_ascii=False),
+                name="get_flights",
+                tool_call_id=tool_call_id,
+            ),
+            confirmation,
+        ]
+        await self.graph.aupdate_state(config, {"messages": new_messages}, as_node="worker")
+        return new_messages
+
     def _extract_flight_data_and_params(self, messages: List) -> Tuple[Dict, Optional[Dict]]:
         """ Extract flight data and original params from tool response messages in the current turn """
 
@@ -143,6 +261,10 @@ class TravelAgent:
                 try:
                     flight_data = json.loads(message.content)
                     tool_call_id = message.tool_call_id
+                    # The tool only hands the LLM a digest, resolve the full listing for the UI
+                    handle = flight_data.get("result_handle")
+                    if handle:
+                        flight_data = result_store.get(handle) or {"error": "Flight results have expired, please search again"}
                     break
                 except json.JSONDecodeError:
                     flight_data = {"error": "Failed to parse flight data"}
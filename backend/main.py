@@ -1,12 +1,32 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from shared_utils.http import close_client
+from shared_utils.tracing import set_service_name
+from backend.middleware import MetricsMiddleware, TracingMiddleware, ProfilingMiddleware
 from backend.routers.flights import router as flights_router
 from backend.routers.airports import router as airports_router
 from backend.routers.geolocation import router as geolocation_router
+from backend.routers.metrics import router as metrics_router
+from backend.routers.admin import router as admin_router
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Keep-alive connections of the shared upstream client are closed with the server
+    await close_client()
+
+# Both servers are started from a main.py, so spans are told apart by an explicit name
+set_service_name("backend")
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(TracingMiddleware)
+app.add_middleware(MetricsMiddleware)
 app.include_router(geolocation_router)
 app.include_router(airports_router)
 app.include_router(flights_router)
+app.include_router(metrics_router)
+app.include_router(admin_router)
 
 if __name__ == "__main__":
     import uvicorn
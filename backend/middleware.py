@@ -0,0 +1,108 @@
+import time
+from shared_utils.metrics import HTTP_REQUESTS, HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT, HTTP_RESPONSE_SIZE
+from shared_utils.tracing import TRACE_HEADER, span, remote_parent
+from shared_utils.profiling import profiler
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request count, latency, status and response size per route.
+
+    Routes are labelled by their path template (e.g. /api/airports) rather than the raw URL,
+    so query strings and unknown paths cannot blow up the number of series.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            route = scope.get("route")
+            route = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            HTTP_REQUEST_DURATION.labels(method, route, status).observe(time.perf_counter() - started)
+            HTTP_REQUESTS.labels(method, route, status).inc()
+            HTTP_RESPONSE_SIZE.labels(route).observe(size)
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware opening a server span per request, continuing the caller's trace when the
+    request carries a traceparent header (as the agent tools' loopback calls do).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        header = None
+        for name, value in scope.get("headers", []):
+            if name.decode("latin-1") == TRACE_HEADER:
+                header = value.decode("latin-1")
+                break
+
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        with remote_parent(header), span(f"http {scope['method']}", path=scope["path"]) as current:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = scope.get("route")
+                current.set_attribute("route", getattr(route, "path", None) or "unmatched")
+                current.set_attribute("status", status)
+                current.set_attribute("payload_bytes", size)
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling a sample of requests; profiles of requests slower than the
+    configured threshold are written to disk (see shared_utils.profiling).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not profiler.config.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        session = profiler.start(scope["path"])
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            route = getattr(scope.get("route"), "path", None) or scope["path"]
+            profiler.stop(session, f"{scope['method']} {route}")
@@ -0,0 +1,51 @@
+import os
+import secrets
+from typing import Optional
+from dotenv import load_dotenv
+from pydantic import BaseModel, Field
+from fastapi import APIRouter, Header, HTTPException
+from shared_utils.profiling import profiler
+
+load_dotenv(override=True)
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+class ProfilerUpdate(BaseModel):
+    enabled: Optional[bool] = Field(description="Profile sampled requests", default=None)
+    sample_rate: Optional[float] = Field(description="Share of requests profiled (0-1)", default=None)
+    threshold_ms: Optional[float] = Field(description="Only requests slower than this write a profile", default=None)
+    interval_ms: Optional[float] = Field(description="Stack sampling interval", default=None)
+
+
+def check_admin_token(token: Optional[str]) -> None:
+    """ Admin endpoints need ADMIN_TOKEN to be configured and sent in the X-Admin-Token header """
+
+    expected = os.getenv("ADMIN_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled, set ADMIN_TOKEN to enable them")
+    if not token or not secrets.compare_digest(token, expected):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+@router.get("/profiler")
+async def get_profiler(x_admin_token: Optional[str] = Header(default=None)):
+    """
+    Current profiler settings, number of profiled requests and the most recent profile files.
+    """
+
+    check_admin_token(x_admin_token)
+    return profiler.stats()
+
+
+@router.post("/profiler")
+async def update_profiler(update: ProfilerUpdate, x_admin_token: Optional[str] = Header(default=None)):
+    """
+    Change the profiler settings at runtime; omitted fields keep their value.
+    """
+
+    check_admin_token(x_admin_token)
+    try:
+        profiler.update(**update.model_dump(exclude_none=True))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return profiler.stats()
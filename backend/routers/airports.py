@@ -1,12 +1,15 @@
 import httpx
 from typing import List, Dict, Optional
 from shared_utils.logger import get_logger
-from backend.utils import get_access_token
+from backend.utils import get_access_token, AMADEUS_BASE_URL, BACKEND_API_URL
+from shared_utils.metrics import upstream_call
+from shared_utils.tracing import inject_headers
+from shared_utils.http import get_client
 from fastapi import APIRouter, HTTPException
 logger = get_logger()
 
 router = APIRouter(prefix="/api", tags=["airports"])
-BASE_URL = "http://localhost:8000/api"
+BASE_URL = BACKEND_API_URL
 
 async def get_airport(location: str):
     """
@@ -27,23 +30,23 @@ async def get_airport(location: str):
         raise ValueError("Location cannot be empty")
 
     coords = {}
-    async with httpx.AsyncClient(timeout=httpx.Timeout(90.0)) as client:
+    client = get_client()
+    try:
+        # response = await client.post(f"{BASE_URL}/geolocation", json={"params": location})
+        response = await client.get(f"{BASE_URL}/geolocation", params={"location": location}, headers=inject_headers())
+        response.raise_for_status()
+        result = response.json()
+        coords = result
+    except httpx.HTTPStatusError as e:
+        logger.error("HTTP error occurred: %s", e.response.status_code)
         try:
-            # response = await client.post(f"{BASE_URL}/geolocation", json={"params": location})
-            response = await client.get(f"{BASE_URL}/geolocation", params={"location": location})
-            response.raise_for_status()
-            result = response.json()
-            coords = result
-        except httpx.HTTPStatusError as e:
-            print(f"HTTP error occurred: {e.response.status_code}")
-            try:
-                print(f"Error details: {e.response.json()}")
-            except ValueError:
-                print(f"Error text: {e.response.text}")
-                raise
-        except httpx.RequestError as e:
-            print(f"Request error occurred: {e}")
+            logger.error("Error details: %s", e.response.json())
+        except ValueError:
+            logger.error("Error text: %s", e.response.text)
             raise
+    except httpx.RequestError as e:
+        logger.error("Request error occurred: %s", e)
+        raise
 
     try:
         if not coords:
@@ -51,13 +54,13 @@ async def get_airport(location: str):
         
         lat = coords["latitude"]
         lon = coords["longitude"]
-        logger.info(f"Fetched coordinates for {location}: {coords}")
+        logger.debug("Fetched coordinates for %s: %s", location, coords)
         
         access_token = await get_access_token()
         if not access_token:
             raise HTTPException(status_code=500, detail="Failed to obtain access token")
         
-        url = "https://test.api.amadeus.com/v1/reference-data/locations/airports"
+        url = f"{AMADEUS_BASE_URL}/v1/reference-data/locations/airports"
         params = {
             "latitude": lat,
             "longitude": lon,
@@ -65,22 +68,23 @@ async def get_airport(location: str):
         }
         headers = {"Authorization": f"Bearer {access_token}"}
         
-        async with httpx.AsyncClient(timeout=90.0) as client:
-            response = await client.get(url, params=params, headers=headers)
-            logger.info(f"Amadeus API response status: {response.status_code}")
-            response.raise_for_status()
+        client = get_client()
+        with upstream_call("amadeus", "airports") as call:
+            response = call.response = await client.get(url, params=params, headers=headers)
+        logger.debug("Amadeus API response status: %s", response.status_code)
+        response.raise_for_status()
 
-            data = response.json()
-            if not data.get("data"):
-                raise HTTPException(status_code=404, detail=f"No airports found near {location}")
+        data = response.json()
+        if not data.get("data"):
+            raise HTTPException(status_code=404, detail=f"No airports found near {location}")
 
-            return data["data"]
+        return data["data"]
         
     except httpx.HTTPStatusError as e:
-        logger.error(f"Amadeus API error: {str(e)}")
+        logger.error("Amadeus API error: %s", e)
         raise HTTPException(status_code=e.response.status_code, detail=f"Failed to fetch airports: {str(e)}")
     except Exception as e:
-        logger.error(f"Error processing request: {str(e)}")
+        logger.error("Error processing request: %s", e)
         raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
 
 @router.get("/airports")
@@ -99,7 +103,7 @@ async def get_nearest_airports(location: str) -> Optional[List[Dict]]:
     """
 
     try:
-        logger.info(f"Fetching releavant nearby airports for location: {location}")
+        logger.info("Fetching releavant nearby airports for location: %s", location)
         result = await get_airport(location)
         if not result:
             raise HTTPException(status_code=404, detail=f"No airports found near {location}")
@@ -107,5 +111,5 @@ async def get_nearest_airports(location: str) -> Optional[List[Dict]]:
     except HTTPException as e:
         raise e
     except Exception as e:
-        logger.error(f"Unexpected error: {str(e)}")
+        logger.error("Unexpected error: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
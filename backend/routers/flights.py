@@ -1,12 +1,15 @@
 import os
-import json
 import httpx
 import urllib.parse
 from datetime import date
-from typing import Optional, Union
+from typing import Literal, Optional, Union
 from dotenv import load_dotenv
 from shared_utils.logger import get_logger
-from backend.utils import merge_flights_fields
+from shared_utils.metrics import upstream_call
+from shared_utils.http import get_client
+from shared_utils.flight_table import FlightTable
+from shared_utils.flight_ranking import best_value_order
+from backend.utils import merge_flights_fields, SERPAPI_BASE_URL
 from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel, Field, field_validator, model_validator, ValidationError
 
@@ -19,7 +22,7 @@ serpapi_key = os.getenv("SERPAPI_API_KEY")
 if not serpapi_key:
     raise ValueError("SERPAPI_API_KEY environment variable is not set")
 
-BASE_URL = "https://serpapi.com/search.json"
+BASE_URL = f"{SERPAPI_BASE_URL}/search.json"
 SERPAPI_PARAMETERS = {
     'api_key': serpapi_key,
     'engine': 'google_flights',
@@ -102,33 +105,49 @@ async def fetch_flights_data(params: Union[FlightsInput, FlightBookingInput, Ret
     query_params = SERPAPI_PARAMETERS | params_dict
 
     url = f"{BASE_URL}?{urllib.parse.urlencode(query_params, safe='=+/')}"
+    if params_dict.get("booking_token"):
+        operation = "booking_options"
+    elif params_dict.get("departure_token"):
+        operation = "return_flights"
+    else:
+        operation = "flights"
 
-    async with httpx.AsyncClient(timeout=httpx.Timeout(90.0)) as client:
+    client = get_client()
+    try:
+        with upstream_call("serpapi", operation) as call:
+            response = call.response = await client.get(url)
+        response.raise_for_status()
+        response_data = response.json()
+        return merge_flights_fields(response_data)
+    except httpx.HTTPStatusError as e:
+        error_detail = f"HTTP {e.response.status_code}"
         try:
-            response = await client.get(url)
-            response.raise_for_status()
-            response_data = response.json()
-            return merge_flights_fields(response_data)
-        except httpx.HTTPStatusError as e:
-            error_detail = f"HTTP {e.response.status_code}"
-            try:
-                error_json = e.response.json()
-                if "error" in error_json:
-                    error_detail = error_json["error"]
-            except:
-                pass
+            error_json = e.response.json()
+            if "error" in error_json:
+                error_detail = error_json["error"]
+        except:
+            pass
             
-            logger.error(f"HTTP error from SerpAPI: {e.response.status_code} - {e.response.text}")
-            raise HTTPException(
-                status_code=400 if e.response.status_code == 400 else 502,
-                detail=f"Flight search failed: {error_detail}. Please verify your search parameters."
-            )
-        except ValueError as e:
-            logger.error(f"Failed to parse SerpAPI response as JSON: {e}")
-            raise HTTPException(status_code=502, detail="Failed to parse API response")
-        except httpx.RequestError as e:
-            logger.error(f"Request error when contacting SerpAPI: {e}")
-            raise HTTPException(status_code=503, detail="Flight service temporarily unavailable")
+        logger.error("HTTP error from SerpAPI: %s - %s", e.response.status_code, e.response.text)
+        raise HTTPException(
+            status_code=400 if e.response.status_code == 400 else 502,
+            detail=f"Flight search failed: {error_detail}. Please verify your search parameters."
+        )
+    except ValueError as e:
+        logger.error("Failed to parse SerpAPI response as JSON: %s", e)
+        raise HTTPException(status_code=502, detail="Failed to parse API response")
+    except httpx.RequestError as e:
+        logger.error("Request error when contacting SerpAPI: %s", e)
+        raise HTTPException(status_code=503, detail="Flight service temporarily unavailable")
+
+
+def sort_flights(data: dict, sort: Optional[str]) -> dict:
+    """ Reorder the merged 'flights' list; "best_value" ranks the Pareto front of price, duration, stops and CO2 first """
+
+    if sort == "best_value" and data.get("flights"):
+        table = FlightTable.from_listing(data)
+        data["flights"] = [table.flights[row] for row in best_value_order(table)]
+    return data
 
 
 @router.get("/outbound-flights")
@@ -138,7 +157,8 @@ async def get_outbound_flights(
     outbound_date: str = Query(description="Outbound date in YYYY-MM-DD format"),
     adults: Optional[int] = Query(description="Number of adults", default=1),
     children: Optional[int] = Query(description="Number of children", default=0),
-    return_date: Optional[str] = Query(description="Return date in YYYY-MM-DD format", default=None)
+    return_date: Optional[str] = Query(description="Return date in YYYY-MM-DD format", default=None),
+    sort: Optional[Literal["best_value"]] = Query(description="Order of the flights; default is SerpAPI's order", default=None)
 ):
     """
     ## Retrieve a list of outbound flights
@@ -150,6 +170,7 @@ async def get_outbound_flights(
     - **children**: Number of children travelling  
     - **outbound_date**: Outbound date in YYYY-MM-DD format  
     - **return_date**: Return date in YYYY-MM-DD format  
+    - **sort**: `best_value` ranks non-dominated options (price, duration, stops, CO2) first  
 
     ### Returns
     JSON response with:
@@ -173,7 +194,7 @@ async def get_outbound_flights(
             return_date=return_date
         )
     except ValidationError as e:
-        logger.warning(f"Validation error in outbound flights: {e}")
+        logger.warning("Validation error in outbound flights: %s", e)
         # Extract user-friendly messages
         error_messages = []
         for error in e.errors():
@@ -190,14 +211,14 @@ async def get_outbound_flights(
     
     try:
         logger.info("Fetching outbound flights")
-        logger.info(f"params: {json.dumps(params.model_dump(), indent=2)}")
+        logger.debug("params: %s", params)
         result = await fetch_flights_data(params)
-        return result
+        return sort_flights(result, sort)
     except HTTPException:
         # Re-raise HTTPException as-is
         raise
     except Exception as e:
-        logger.error(f"Unexpected error fetching outbound flights: {e}", exc_info=True)
+        logger.error("Unexpected error fetching outbound flights: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail="An unexpected error occurred")
 
 
@@ -209,7 +230,8 @@ async def get_return_flights(
     adults: Optional[int] = Query(description="Number of adults", default=1),
     children: Optional[int] = Query(description="Number of children", default=0),
     return_date: Optional[str] = Query(description="Return date in YYYY-MM-DD format", default=None),
-    departure_token: str = Query(description="Token for getting return flights")
+    departure_token: str = Query(description="Token for getting return flights"),
+    sort: Optional[Literal["best_value"]] = Query(description="Order of the flights; default is SerpAPI's order", default=None)
 ):
     """
     ## Retrieve a list of return flights
@@ -222,6 +244,7 @@ async def get_return_flights(
     - **children**: Number of children travelling  
     - **return_date**: Return date in YYYY-MM-DD format  
     - **departure_token**: Token for getting return flights
+    - **sort**: `best_value` ranks non-dominated options (price, duration, stops, CO2) first
 
     ### Returns
     JSON response with:
@@ -246,13 +269,13 @@ async def get_return_flights(
     
     try:
         logger.info("Fetching return flights")
-        logger.info(f"params: {json.dumps(params.model_dump(), indent=2)}")
+        logger.debug("params: %s", params)
         result = await fetch_flights_data(params)
-        return result
+        return sort_flights(result, sort)
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unexpected error fetching return flights: {e}", exc_info=True)
+        logger.error("Unexpected error fetching return flights: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail="An unexpected error occurred")
 
 
@@ -302,11 +325,11 @@ async def get_bookingdata(
     
     try:
         logger.info("Fetching booking options")
-        logger.info(f"params: {json.dumps(params.model_dump(), indent=2)}")
+        logger.debug("params: %s", params)
         result = await fetch_flights_data(params)
         return result
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unexpected error fetching booking data: {e}", exc_info=True)
+        logger.error("Unexpected error fetching booking data: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail="An unexpected error occurred")
\ No newline at end of file
@@ -4,6 +4,9 @@ import urllib.parse
 from dotenv import load_dotenv
 from typing import Optional, Dict
 from shared_utils.logger import get_logger
+from backend.utils import GOOGLE_GEOCODING_BASE_URL
+from shared_utils.metrics import upstream_call
+from shared_utils.http import get_client
 from fastapi import APIRouter, HTTPException
 
 load_dotenv(override=True)
@@ -33,27 +36,28 @@ async def fetch_geolocation(location: str) -> Optional[Dict[str, float]]:
 
     normalized = location.strip()
     safe_address = urllib.parse.quote_plus(normalized)
-    url = f"https://maps.googleapis.com/maps/api/geocode/json?address={safe_address}&key={GOOGLE_GEOLOCATION_API}"
+    url = f"{GOOGLE_GEOCODING_BASE_URL}/maps/api/geocode/json?address={safe_address}&key={GOOGLE_GEOLOCATION_API}"
 
     try:
-        async with httpx.AsyncClient(timeout=90.0) as client:
-            response = await client.get(url)
-            response.raise_for_status()
-            data = response.json()
+        client = get_client()
+        with upstream_call("google_geocoding", "geocode") as call:
+            response = call.response = await client.get(url)
+        response.raise_for_status()
+        data = response.json()
 
-            if data.get("status") != "OK":
-                if data.get("status") == "ZERO_RESULTS":
-                    return None
-                raise HTTPException(status_code=400, detail=f"Geocoding API error: {data.get('status')}")
+        if data.get("status") != "OK":
+            if data.get("status") == "ZERO_RESULTS":
+                return None
+            raise HTTPException(status_code=400, detail=f"Geocoding API error: {data.get('status')}")
 
-            coords = data["results"][0]["geometry"]["location"]
-            latitude = float(format(coords["lat"], ".4f"))
-            longitude = float(format(coords["lng"], ".4f"))
+        coords = data["results"][0]["geometry"]["location"]
+        latitude = float(format(coords["lat"], ".4f"))
+        longitude = float(format(coords["lng"], ".4f"))
 
-            if latitude is None or longitude is None:
-                raise ValueError("Invalid geolocation data: latitude or longitude missing")
+        if latitude is None or longitude is None:
+            raise ValueError("Invalid geolocation data: latitude or longitude missing")
 
-            return {"latitude": latitude, "longitude": longitude}
+        return {"latitude": latitude, "longitude": longitude}
 
     except httpx.HTTPStatusError as e:
         raise HTTPException(status_code=e.response.status_code, detail="Failed to fetch geolocation")
@@ -76,7 +80,7 @@ async def get_geolocation(location: str) -> Optional[Dict[str, float]]:
     """
 
     try:
-        logger.info(f"Fetching geolocation for: {location}")
+        logger.info("Fetching geolocation for: %s", location)
         result = await fetch_geolocation(location)
         return result if result else {"error": "No geolocation found for the provided location"}
     except ValueError as e:
@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+from shared_utils.metrics import REGISTRY, CONTENT_TYPE
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics")
+async def get_metrics():
+    """
+    Request, upstream and cache metrics in the Prometheus text exposition format.
+    """
+
+    return Response(REGISTRY.expose(), media_type=CONTENT_TYPE)
@@ -1,12 +1,16 @@
 import httpx
 from langchain_core.tools import tool
 from shared_utils.logger import get_logger
+from shared_utils.tracing import traced, current_span, inject_headers
+from shared_utils.http import get_client
+from backend.utils import BACKEND_API_URL
 
-BASE_URL = "http://localhost:8000/api"
+BASE_URL = BACKEND_API_URL
 
 logger = get_logger()
 
 @tool
+@traced("tool.get_airport")
 async def get_airport(location: str):
     """
     Fetch the nearest airports information for a given location.
@@ -14,14 +18,15 @@ async def get_airport(location: str):
     """
 
     payload = {"location": location}
-    async with httpx.AsyncClient(timeout=httpx.Timeout(90.0)) as client:
-        try:
-            response = await client.get(f"{BASE_URL}/airports", params=payload)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as e:
-            logger.error(f"FastAPI server error: {e.response.status_code} - {e.response.text}")
-            raise  # Propagate the error to the caller
-        except httpx.RequestError as e:
-            logger.error(f"Network error contacting FastAPI server: {e}")
-            raise 
\ No newline at end of file
+    client = get_client()
+    try:
+        response = await client.get(f"{BASE_URL}/airports", params=payload, headers=inject_headers())
+        response.raise_for_status()
+        current_span().set_attribute("payload_bytes", len(response.content))
+        return response.json()
+    except httpx.HTTPStatusError as e:
+        logger.error("FastAPI server error: %s - %s", e.response.status_code, e.response.text)
+        raise  # Propagate the error to the caller
+    except httpx.RequestError as e:
+        logger.error("Network error contacting FastAPI server: %s", e)
+        raise 
\ No newline at end of file
@@ -1,13 +1,19 @@
+import os
 import httpx
 from datetime import date
-from typing import Optional, Union, Dict, Any
+from typing import Optional, Union, Dict, Any, List
 from pydantic import BaseModel, Field
 from langchain_core.tools import tool
 from shared_utils.logger import get_logger
+from shared_utils.tracing import traced, current_span, inject_headers
+from shared_utils.http import get_client
+from backend.tools.result_store import result_store
+from backend.utils import BACKEND_API_URL
 
 logger = get_logger()
 
-BASE_URL = "http://localhost:8000/api"
+BASE_URL = BACKEND_API_URL
+FLIGHT_DIGEST_TOP_N = int(os.getenv("FLIGHT_DIGEST_TOP_N", 5))
 
 
 class FlightsInput(BaseModel):
@@ -61,7 +67,45 @@ def validate_dates_client_side(outbound_date: str, return_date: Optional[str] =
     return None
 
 
+def build_flight_digest(data: Dict[str, Any], handle: str, top_n: int = FLIGHT_DIGEST_TOP_N) -> Dict[str, Any]:
+    """
+    Build a compact digest of a flight listing for the LLM.
+    Only the top N options and the price insights are kept; the full listing stays in the result store under `handle`.
+    """
+
+    flights = data.get("flights", [])
+    top_flights: List[Dict[str, Any]] = []
+    for idx, flight in enumerate(flights[:top_n]):
+        legs = flight.get("flights", [])
+        first = legs[0] if legs else {}
+        last = legs[-1] if legs else {}
+        airlines = list(dict.fromkeys(leg.get("airline") for leg in legs if leg.get("airline")))
+        top_flights.append({
+            "option": idx + 1,
+            "price": flight.get("price"),
+            "total_duration": flight.get("total_duration"),
+            "stops": max(len(legs) - 1, 0),
+            "departure": f"{first.get('departure_airport', {}).get('id', '')} {first.get('departure_airport', {}).get('time', '')}".strip(),
+            "arrival": f"{last.get('arrival_airport', {}).get('id', '')} {last.get('arrival_airport', {}).get('time', '')}".strip(),
+            "airlines": airlines,
+        })
+
+    digest = {
+        "result_handle": handle,
+        "total_flights": len(flights),
+        "top_flights": top_flights,
+    }
+    price_insights = data.get("price_insights")
+    if price_insights:
+        # price_history is a long time series the model does not need
+        digest["price_insights"] = {k: v for k, v in price_insights.items() if k != "price_history"}
+    if data.get("error"):
+        digest["error"] = data["error"]
+    return digest
+
+
 @tool(args_schema=FlightsInputSchema)
+@traced("tool.get_flights")
 async def get_flights(params: FlightsInput):
     """
     Find flights using the Google Flights engine via SerpAPI.
@@ -70,7 +114,8 @@ async def get_flights(params: FlightsInput):
         params: FlightsInput object containing departure_id, arrival_id, outbound_date, adults, children, and optional return_date.
 
     Returns:
-        dict: Flight search results containing 'best_flights' or error details.
+        dict: A compact digest with 'result_handle', 'total_flights', the 'top_flights' options and 'price_insights', or error details.
+              The full listing is shown to the user in the flight panel.
     
     Raises:
         HTTPException: If the FastAPI server returns an error (e.g., invalid parameters or SerpAPI failure).
@@ -80,69 +125,74 @@ async def get_flights(params: FlightsInput):
     # Client-side date validation (defense in depth)
     date_error = validate_dates_client_side(params.outbound_date, params.return_date)
     if date_error:
-        logger.warning(f"Client-side date validation failed: {date_error}")
+        logger.warning("Client-side date validation failed: %s", date_error)
         return date_error
     
     params_dict = params.model_dump(exclude_none=True)
+    # Same order as the cards, so "option 1" in the digest is the first card
+    params_dict["sort"] = "best_value"
     
-    async with httpx.AsyncClient(timeout=httpx.Timeout(90.0)) as client:
-        try:
-            response = await client.get(f"{BASE_URL}/outbound-flights", params=params_dict)
-            response.raise_for_status()
-            return response.json()
+    client = get_client()
+    try:
+        response = await client.get(f"{BASE_URL}/outbound-flights", params=params_dict, headers=inject_headers())
+        response.raise_for_status()
+        current_span().set_attribute("payload_bytes", len(response.content))
+        data = response.json()
+        handle = result_store.put(data)
+        return build_flight_digest(data, handle)
         
-        except httpx.HTTPStatusError as e:
-            logger.error(f"FastAPI server error: {e.response.status_code} - {e.response.text}")
+    except httpx.HTTPStatusError as e:
+        logger.error("FastAPI server error: %s - %s", e.response.status_code, e.response.text)
             
-            # Try to parse the error response
-            try:
-                error_detail = e.response.json()
-                error_message = error_detail.get("detail", "Unknown error")
-                
-                # Handle validation errors (422)
-                if e.response.status_code == 422:
-                    return {
-                        "error": "validation_error",
-                        "message": str(error_message)
-                    }
-                
-                # Handle bad request errors (400)
-                if e.response.status_code == 400:
-                    return {
-                        "error": "invalid_request",
-                        "message": str(error_message)
-                    }
+        # Try to parse the error response
+        try:
+            error_detail = e.response.json()
+            error_message = error_detail.get("detail", "Unknown error")
                 
-                # Handle gateway errors (502, 503)
-                if e.response.status_code in [502, 503]:
-                    return {
-                        "error": "service_error",
-                        "message": "Flight service is temporarily unavailable. Please try again later."
-                    }
+            # Handle validation errors (422)
+            if e.response.status_code == 422:
+                return {
+                    "error": "validation_error",
+                    "message": str(error_message)
+                }
                 
-                # Generic error handling
+            # Handle bad request errors (400)
+            if e.response.status_code == 400:
                 return {
-                    "error": "api_error",
-                    "message": f"Unable to fetch flights: {error_message}"
+                    "error": "invalid_request",
+                    "message": str(error_message)
                 }
-            
-            except Exception as parse_error:
-                logger.error(f"Failed to parse error response: {parse_error}")
+                
+            # Handle gateway errors (502, 503)
+            if e.response.status_code in [502, 503]:
                 return {
-                    "error": "api_error",
-                    "message": f"Unable to fetch flights. Server returned error: {e.response.status_code}"
+                    "error": "service_error",
+                    "message": "Flight service is temporarily unavailable. Please try again later."
                 }
-        
-        except httpx.RequestError as e:
-            logger.error(f"Network error contacting FastAPI server: {e}")
+                
+            # Generic error handling
             return {
-                "error": "network_error",
-                "message": "Unable to connect to the flight search service. Please check your connection and try again."
+                "error": "api_error",
+                "message": f"Unable to fetch flights: {error_message}"
             }
-        
-        except Exception as e:
-            logger.error(f"Unexpected error in get_flights: {e}", exc_info=True)
+            
+        except Exception as parse_error:
+            logger.error("Failed to parse error response: %s", parse_error)
             return {
-                "error": "unexpected_error",
-                "message": "An unexpected error occurred while searching for flights. Please try again."
-            }
\ No newline at end of file
+                "error": "api_error",
+                "message": f"Unable to fetch flights. Server returned error: {e.response.status_code}"
+            }
+        
+    except httpx.RequestError as e:
+        logger.error("Network error contacting FastAPI server: %s", e)
+        return {
+            "error": "network_error",
+            "message": "Unable to connect to the flight search service. Please check your connection and try again."
+        }
+        
+    except Exception as e:
+        logger.error("Unexpected error in get_flights: %s", e, exc_info=True)
+        return {
+            "error": "unexpected_error",
+            "message": "An unexpected error occurred while searching for flights. Please try again."
+        }
\ No newline at end of file
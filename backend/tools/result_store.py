@@ -0,0 +1,61 @@
+import os
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+from dotenv import load_dotenv
+from shared_utils.metrics import record_cache
+
+load_dotenv(override=True)
+
+RESULT_STORE_TTL = float(os.getenv("RESULT_STORE_TTL", 3600))
+RESULT_STORE_MAX_ENTRIES = int(os.getenv("RESULT_STORE_MAX_ENTRIES", 256))
+
+
+class ResultStore:
+    """
+    Server-side store for full tool results kept out of the LLM context.
+
+    Tools put the raw payload here and hand the model only a handle id, which the
+    agent resolves again when it needs the complete data (e.g. to feed the UI).
+    Entries expire after `ttl` seconds and the oldest are evicted beyond `max_entries`.
+    """
+
+    def __init__(self, ttl: float = RESULT_STORE_TTL, max_entries: int = RESULT_STORE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, data: Any) -> str:
+        """ Store a result and return its handle id """
+
+        handle = uuid.uuid4().hex
+        with self._lock:
+            self._entries[handle] = (time.monotonic() + self.ttl, data)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return handle
+
+    def get(self, handle: str) -> Optional[Any]:
+        """ Return the result stored under a handle, or None if unknown or expired """
+
+        with self._lock:
+            entry = self._entries.get(handle)
+            if entry is None:
+                record_cache("result_store", False)
+                return None
+            expires_at, data = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[handle]
+                record_cache("result_store", False)
+                return None
+            record_cache("result_store", True)
+            return data
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+result_store = ResultStore()
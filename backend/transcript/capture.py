@@ -0,0 +1,138 @@
+"""
+Local capture of the microphone audio sent for transcription.
+
+The transcriber used to append every chunk to a list for the whole session, only for
+save_wav_file to read it, so RSS grew with every minute of dictation. A capture policy now
+decides what is kept:
+    off    nothing (default); the send path does no extra work
+    ring   the last AUDIO_CAPTURE_SECONDS in a preallocated buffer, one copy per chunk
+    wav    every chunk streamed to a WAV file in AUDIO_CAPTURE_DIR as it arrives
+Memory stays flat in all three, however long the session.
+"""
+import os
+import wave
+import threading
+from datetime import datetime
+from typing import Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+AUDIO_CAPTURE = os.getenv("AUDIO_CAPTURE", "off")
+AUDIO_CAPTURE_SECONDS = float(os.getenv("AUDIO_CAPTURE_SECONDS", 30))
+AUDIO_CAPTURE_DIR = os.getenv("AUDIO_CAPTURE_DIR", ".")
+CAPTURE_MODES = ("off", "ring", "wav")
+
+
+def capture_filename(directory: str = AUDIO_CAPTURE_DIR) -> str:
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(directory, f"recorded_audio_{timestamp}.wav")
+
+
+class AudioCapture:
+    """ Keeps nothing; base of the capture policies """
+
+    def __init__(self, sample_rate: int, channels: int = 1, sample_width: int = 2):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.sample_width = sample_width
+
+    def write(self, chunk: bytes) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def save_wav(self) -> Optional[str]:
+        """ Write what was kept to a WAV file and return its path, None when there is nothing """
+
+        return None
+
+    def _open_wav(self, filename: str) -> wave.Wave_write:
+        wf = wave.open(filename, "wb")
+        wf.setnchannels(self.channels)
+        wf.setsampwidth(self.sample_width)
+        wf.setframerate(self.sample_rate)
+        return wf
+
+
+class RingCapture(AudioCapture):
+    """ The last `seconds` of audio in a fixed bytearray; older audio is overwritten """
+
+    def __init__(self, sample_rate: int, channels: int = 1, sample_width: int = 2, seconds: float = AUDIO_CAPTURE_SECONDS):
+        super().__init__(sample_rate, channels, sample_width)
+        frame_size = channels * sample_width
+        self.capacity = int(seconds * sample_rate) * frame_size
+        self.buffer = bytearray(self.capacity)
+        self.view = memoryview(self.buffer)
+        self.position = 0
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def write(self, chunk: bytes) -> None:
+        if not self.capacity:
+            return
+        data = memoryview(chunk)[-self.capacity:]
+        with self.lock:
+            first = min(len(data), self.capacity - self.position)
+            self.view[self.position:self.position + first] = data[:first]
+            self.view[:len(data) - first] = data[first:]
+            self.position = (self.position + len(data)) % self.capacity
+            self.size = min(self.size + len(data), self.capacity)
+
+    def snapshot(self) -> bytes:
+        """ The kept audio, oldest first """
+
+        with self.lock:
+            if self.size < self.capacity:
+                return bytes(self.view[:self.size])
+            return bytes(self.view[self.position:]) + bytes(self.view[:self.position])
+
+    def save_wav(self) -> Optional[str]:
+        audio = self.snapshot()
+        if not audio:
+            return None
+        filename = capture_filename()
+        with self._open_wav(filename) as wf:
+            wf.writeframes(audio)
+        return filename
+
+
+class WavCapture(AudioCapture):
+    """ Streams every chunk to a WAV file; the header is completed on close """
+
+    def __init__(self, sample_rate: int, channels: int = 1, sample_width: int = 2, filename: Optional[str] = None):
+        super().__init__(sample_rate, channels, sample_width)
+        self.filename = filename or capture_filename()
+        self.wav = self._open_wav(self.filename)
+        self.written = 0
+        self.lock = threading.Lock()
+
+    def write(self, chunk: bytes) -> None:
+        with self.lock:
+            if self.wav is not None:
+                # writeframesraw leaves the header alone; close() patches it once
+                self.wav.writeframesraw(chunk)
+                self.written += len(chunk)
+
+    def close(self) -> None:
+        with self.lock:
+            if self.wav is not None:
+                self.wav.close()
+                self.wav = None
+
+    def save_wav(self) -> Optional[str]:
+        self.close()
+        return self.filename if self.written else None
+
+
+def create_capture(sample_rate: int, channels: int = 1, sample_width: int = 2, mode: str = AUDIO_CAPTURE) -> AudioCapture:
+    """ The capture policy named by `mode` (see CAPTURE_MODES) """
+
+    if mode == "ring":
+        return RingCapture(sample_rate, channels, sample_width)
+    if mode == "wav":
+        return WavCapture(sample_rate, channels, sample_width)
+    if mode != "off":
+        raise ValueError(f"Unknown AUDIO_CAPTURE mode: {mode} (expected one of {', '.join(CAPTURE_MODES)})")
+    return AudioCapture(sample_rate, channels, sample_width)
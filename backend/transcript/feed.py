@@ -0,0 +1,118 @@
+"""
+Audio recorded in the browser, fed to a transcription session.
+
+The Gradio microphone component streams what the browser records, at the browser's rate
+(typically 44.1 or 48 kHz) and in chunks of about half a second. AudioFeed turns those into
+what the transcription websocket expects, 16 kHz mono int16 in FRAMES_PER_BUFFER chunks, and
+hands them to the session's sender as an async iterator, so no thread is involved.
+
+Backpressure: the sender awaits every websocket send, which waits while the socket's write
+buffer is full, and only then takes the next chunk. Chunks the upstream cannot take yet wait in
+the feed, at most BROWSER_AUDIO_BUFFER_SECONDS of them; beyond that the oldest are dropped and
+counted (transcribe_audio_seconds_total{result="overflow"}) rather than letting a stalled
+upstream grow memory without bound.
+"""
+import os
+import asyncio
+from collections import deque
+from typing import Deque, Optional
+import numpy as np
+from dotenv import load_dotenv
+from backend.transcript.main import FRAMES_PER_BUFFER, SAMPLE_RATE
+from shared_utils.metrics import TRANSCRIBE_AUDIO
+
+load_dotenv()
+
+BROWSER_AUDIO_BUFFER_SECONDS = float(os.getenv("BROWSER_AUDIO_BUFFER_SECONDS", 10.0))
+
+
+class Resampler:
+    """ Converts a stream of chunks at any rate and channel count to 16 kHz mono int16 """
+
+    def __init__(self, rate_out: int = SAMPLE_RATE):
+        self.rate_out = rate_out
+        self.rate_in: Optional[int] = None
+
+    def reset(self, rate_in: int) -> None:
+        self.rate_in = rate_in
+        self.step = rate_in / self.rate_out
+        # Moving average over one output period, against aliasing when downsampling
+        self.width = max(1, int(round(self.step)))
+        self.history = np.zeros(self.width - 1, dtype=np.float32)
+        # Last filtered sample of the previous chunk, and the next output position counted from it
+        self.last: Optional[float] = None
+        self.position = 0.0
+
+    def __call__(self, rate_in: int, samples: np.ndarray) -> np.ndarray:
+        x = np.asarray(samples)
+        if x.ndim > 1:
+            x = x.mean(axis=1)
+        x = x.astype(np.float32) * (32767 if np.asarray(samples).dtype.kind == "f" else 1)
+        if rate_in == self.rate_out:
+            return np.clip(x, -32768, 32767).astype(np.int16)
+        if rate_in != self.rate_in:
+            self.reset(rate_in)
+        if self.width > 1:
+            padded = np.concatenate([self.history, x])
+            self.history = padded[len(padded) - (self.width - 1):]
+            x = np.convolve(padded, np.full(self.width, 1 / self.width, dtype=np.float32), mode="valid")
+        if self.last is not None:
+            x = np.concatenate([[self.last], x])
+        if len(x) < 2:
+            return np.zeros(0, dtype=np.int16)
+        positions = np.arange(self.position, len(x) - 1, self.step)
+        out = np.interp(positions, np.arange(len(x)), x)
+        self.position = (positions[-1] + self.step if len(positions) else self.position) - (len(x) - 1)
+        self.last = float(x[-1])
+        return np.clip(out, -32768, 32767).astype(np.int16)
+
+
+class AudioFeed:
+    """ One recording's browser audio, resampled and cut into chunks for the session's sender """
+
+    def __init__(self, max_seconds: float = BROWSER_AUDIO_BUFFER_SECONDS):
+        self.resampler = Resampler()
+        self.chunk_bytes = FRAMES_PER_BUFFER * 2
+        self.pending = bytearray()
+        self.chunks: Deque[bytes] = deque()
+        self.max_chunks = max(1, int(max_seconds * SAMPLE_RATE / FRAMES_PER_BUFFER))
+        self.ready = asyncio.Event()
+        self.closed = False
+        self.dropped_seconds = 0.0
+        self.high_water = 0
+
+    def put(self, sample_rate: int, samples: np.ndarray) -> None:
+        """ Add a chunk as the Gradio microphone streams it; never waits """
+
+        if self.closed:
+            return
+        self.pending += self.resampler(sample_rate, samples).tobytes()
+        while len(self.pending) >= self.chunk_bytes:
+            self.chunks.append(bytes(self.pending[:self.chunk_bytes]))
+            del self.pending[:self.chunk_bytes]
+        while len(self.chunks) > self.max_chunks:
+            seconds = len(self.chunks.popleft()) / (2 * SAMPLE_RATE)
+            self.dropped_seconds += seconds
+            TRANSCRIBE_AUDIO.labels("overflow").inc(seconds)
+        self.high_water = max(self.high_water, len(self.chunks))
+        self.ready.set()
+
+    def close(self) -> None:
+        """ No more audio: the iteration ends once what is buffered has been taken """
+
+        if self.pending:
+            self.chunks.append(bytes(self.pending))
+            self.pending.clear()
+        self.closed = True
+        self.ready.set()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> bytes:
+        while not self.chunks:
+            if self.closed:
+                raise StopAsyncIteration
+            self.ready.clear()
+            await self.ready.wait()
+        return self.chunks.popleft()
@@ -1,14 +1,13 @@
-import pyaudio
 import websocket
 import json
 import threading
-import time
-import wave
 from urllib.parse import urlencode
 from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
 from dotenv import load_dotenv
 import os
-from queue import Queue
+from backend.transcript.capture import AudioCapture, create_capture
+from backend.transcript.vad import VoiceGate
 
 load_dotenv()
 YOUR_API_KEY = os.getenv("ASSEMBLYAI_API_KEY")
@@ -17,14 +16,72 @@ CONNECTION_PARAMS = {
     "sample_rate": 16000,
     "format_turns": True,
 }
-API_ENDPOINT_BASE_URL = "wss://streaming.assemblyai.com/v3/ws"
+# Overridable to point at the local stand-in (benchmarks.standin)
+API_ENDPOINT_BASE_URL = os.getenv("ASSEMBLYAI_STREAMING_URL", "wss://streaming.assemblyai.com/v3/ws")
 API_ENDPOINT = f"{API_ENDPOINT_BASE_URL}?{urlencode(CONNECTION_PARAMS)}"
+# Upper bound on how long stop() waits for the server's final turn and Termination
+TRANSCRIBE_STOP_TIMEOUT = float(os.getenv("TRANSCRIBE_STOP_TIMEOUT", 5.0))
 
 # Audio Configuration
 FRAMES_PER_BUFFER = 800
 SAMPLE_RATE = CONNECTION_PARAMS["sample_rate"]
 CHANNELS = 1
-FORMAT = pyaudio.paInt16
+
+
+def open_microphone() -> Optional[Tuple[Any, Any]]:
+    """ (PyAudio, input stream) on the local microphone, None when it cannot be opened """
+
+    try:
+        import pyaudio
+    except ImportError:
+        print("pyaudio is not installed; install the server-mic extra or use TRANSCRIBE_AUDIO_INPUT=browser")
+        return None
+    audio = pyaudio.PyAudio()
+    try:
+        stream = audio.open(
+            format=pyaudio.paInt16,
+            channels=CHANNELS,
+            rate=SAMPLE_RATE,
+            input=True,
+            frames_per_buffer=FRAMES_PER_BUFFER
+        )
+    except Exception as e:
+        print(f"Error opening microphone stream: {e}")
+        audio.terminate()
+        return None
+    return audio, stream
+
+
+def close_microphone(audio, stream) -> None:
+    if stream:
+        if stream.is_active():
+            stream.stop_stream()
+        stream.close()
+    if audio:
+        audio.terminate()
+
+
+class TurnBuffer:
+    """ A session's turns by turn_order; a formatted turn replaces its unformatted versions """
+
+    def __init__(self):
+        self.turns: Dict[int, Tuple[str, bool]] = {}
+        self.lock = threading.Lock()
+
+    def add(self, data: dict) -> None:
+        transcript = data.get('transcript', '')
+        formatted = data.get('turn_is_formatted', False)
+        with self.lock:
+            order = data.get('turn_order', len(self.turns))
+            if formatted or not self.turns.get(order, ("", False))[1]:
+                self.turns[order] = (transcript, formatted)
+
+    def text(self) -> str:
+        """ The turns in order, each formatted when the server has sent that version, else its latest partial """
+
+        with self.lock:
+            return " ".join(text for _, (text, _) in sorted(self.turns.items()) if text)
+
 
 class AssemblyAITranscriber:
     def __init__(self):
@@ -34,44 +91,60 @@ class AssemblyAITranscriber:
         self.audio_thread = None
         self.ws_thread = None
         self.stop_event = threading.Event()
-        self.transcript_queue = Queue()
+        # Set by the server's Termination message (or a closed/failed connection)
+        self.terminated = threading.Event()
+        self.turns = TurnBuffer()
         self.current_transcript = ""
-        self.recorded_frames = []
-        self.recording_lock = threading.Lock()
+        # What is kept of the sent audio, see backend.transcript.capture (AUDIO_CAPTURE)
+        self.capture = AudioCapture(SAMPLE_RATE, CHANNELS)
+
+    def open_microphone(self) -> Optional[Iterable[bytes]]:
+        """ PCM chunks from the local microphone, None when it cannot be opened """
+
+        microphone = open_microphone()
+        if microphone is None:
+            return None
+        self.audio, self.stream = microphone
+
+        def read_chunks():
+            while True:
+                yield self.stream.read(FRAMES_PER_BUFFER, exception_on_overflow=False)
+
+        return read_chunks()
+
+    def start(self, audio_source: Optional[Iterable[bytes]] = None):
+        """ Stream `audio_source` (16 kHz mono int16 chunks), by default the microphone """
 
-    def start(self):
         self.current_transcript = ""
-        self.recorded_frames = []
-        self.stop_event.clear()
-        self.audio = pyaudio.PyAudio()
-        try:
-            self.stream = self.audio.open(
-                format=FORMAT,
-                channels=CHANNELS,
-                rate=SAMPLE_RATE,
-                input=True,
-                frames_per_buffer=FRAMES_PER_BUFFER
-            )
-        except Exception as e:
-            print(f"Error opening microphone stream: {e}")
-            if self.audio:
-                self.audio.terminate()
-                self.audio = None
+        self.capture.close()
+        # Fresh per-session state: callbacks of a previous connection still closing must not touch it
+        stop_event = self.stop_event = threading.Event()
+        terminated = self.terminated = threading.Event()
+        turns = self.turns = TurnBuffer()
+        chunks = audio_source if audio_source is not None else self.open_microphone()
+        if chunks is None:
             return
+        audio, stream = self.audio, self.stream
+        capture = self.capture = create_capture(SAMPLE_RATE, CHANNELS)
+        gate = VoiceGate(SAMPLE_RATE, CHANNELS)
 
-        def stream_audio():
-            while not self.stop_event.is_set():
-                try:
-                    data = self.stream.read(FRAMES_PER_BUFFER, exception_on_overflow=False)
-                    with self.recording_lock:
-                        self.recorded_frames.append(data)
-                    self.ws_app.send(data, websocket.ABNF.OPCODE_BINARY)
-                except:
-                    break
+        def stream_audio(ws):
+            try:
+                for data in chunks:
+                    if stop_event.is_set():
+                        break
+                    capture.write(data)
+                    for chunk in gate.process(data):
+                        ws.send(chunk, websocket.ABNF.OPCODE_BINARY)
+            except Exception:
+                pass
+            finally:
+                gate.close()
+                print(f"Sent {gate.sent_seconds:.1f}s of {gate.audio_seconds:.1f}s recorded ({gate.suppressed_share:.0%} silence suppressed)")
 
         def on_open(ws):
             print("WebSocket connection opened.")
-            self.audio_thread = threading.Thread(target=stream_audio)
+            self.audio_thread = threading.Thread(target=stream_audio, args=(ws,))
             self.audio_thread.daemon = True
             self.audio_thread.start()
 
@@ -81,9 +154,8 @@ class AssemblyAITranscriber:
                 msg_type = data.get('type')
                 if msg_type == 'Turn':
                     transcript = data.get('transcript', '')
-                    formatted = data.get('turn_is_formatted', False)
-                    print(f"\r{transcript}" if not formatted else transcript)
-                    self.transcript_queue.put((transcript, formatted))
+                    print(transcript if data.get('turn_is_formatted') else f"\r{transcript}")
+                    turns.add(data)
                 elif msg_type == "Begin":
                     session_id = data.get('id')
                     expires_at = data.get('expires_at')
@@ -92,24 +164,21 @@ class AssemblyAITranscriber:
                     audio_duration = data.get('audio_duration_seconds', 0)
                     session_duration = data.get('session_duration_seconds', 0)
                     print(f"Session Terminated: Audio Duration={audio_duration}s, Session Duration={session_duration}s")
+                    terminated.set()
             except json.JSONDecodeError as e:
                 print(f"Error decoding message: {e}")
 
         def on_error(ws, error):
             print(f"WebSocket Error: {error}")
-            self.stop_event.set()
+            stop_event.set()
+            terminated.set()
 
         def on_close(ws, close_status_code, close_msg):
             print(f"WebSocket Disconnected: Status={close_status_code}, Msg={close_msg}")
-            # self.save_wav_file()
-            if self.stream:
-                if self.stream.is_active():
-                    self.stream.stop_stream()
-                self.stream.close()
-                self.stream = None
-            if self.audio:
-                self.audio.terminate()
-                self.audio = None
+            stop_event.set()
+            terminated.set()
+            capture.close()
+            close_microphone(audio, stream)
 
         self.ws_app = websocket.WebSocketApp(
             API_ENDPOINT,
@@ -123,41 +192,43 @@ class AssemblyAITranscriber:
         self.ws_thread.daemon = True
         self.ws_thread.start()
 
-    def stop(self):
+    def stop(self, timeout: float = TRANSCRIBE_STOP_TIMEOUT):
+        """ Stop sending audio, then wait (at most `timeout`) for the server to finish the last turn """
+
         self.stop_event.set()
+        # The reader exits after the chunk in hand (50 ms), so no audio follows Terminate
+        if self.audio_thread and self.audio_thread.is_alive():
+            self.audio_thread.join(timeout=1)
         if self.ws_app and self.ws_app.sock and self.ws_app.sock.connected:
             try:
                 self.ws_app.send(json.dumps({"type": "Terminate"}))
-                time.sleep(2)  # Wait for final messages
+                if not self.terminated.wait(timeout):
+                    print(f"No Termination within {timeout}s, keeping the partial transcript")
             except Exception as e:
                 print(f"Error sending termination message: {e}")
-        while not self.transcript_queue.empty():
-            trans, formatted = self.transcript_queue.get()
-            if formatted:
-                self.current_transcript += trans + " "
-        if self.audio_thread and self.audio_thread.is_alive():
-            self.audio_thread.join(timeout=2)
-        if self.ws_app:
-            self.ws_app.close()
         if self.ws_thread and self.ws_thread.is_alive():
-            self.ws_thread.join(timeout=2)
+            # The server closes the connection after Termination; closing it from here as well
+            # races that close and can stall the websocket thread, so only do it as a fallback
+            if self.terminated.is_set():
+                self.ws_thread.join(timeout=0.5)
+            if self.ws_thread.is_alive():
+                # No need to wait for the thread: its callbacks only touch this session's state
+                self.ws_app.close()
+        self.current_transcript = self.transcript()
+
+    def transcript(self) -> str:
+        return self.turns.text()
 
     def get_transcript(self):
         return self.current_transcript.strip()
 
     def save_wav_file(self):
-        if not self.recorded_frames:
-            print("No audio data recorded.")
-            return
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"recorded_audio_{timestamp}.wav"
         try:
-            with wave.open(filename, 'wb') as wf:
-                wf.setnchannels(CHANNELS)
-                wf.setsampwidth(2)  # 16-bit
-                wf.setframerate(SAMPLE_RATE)
-                with self.recording_lock:
-                    wf.writeframes(b''.join(self.recorded_frames))
-            print(f"Audio saved to: {filename}")
+            filename = self.capture.save_wav()
         except Exception as e:
-            print(f"Error saving WAV file: {e}")
\ No newline at end of file
+            print(f"Error saving WAV file: {e}")
+            return
+        if not filename:
+            print("No audio data recorded (set AUDIO_CAPTURE=ring or wav to keep it).")
+            return
+        print(f"Audio saved to: {filename}")
@@ -0,0 +1,300 @@
+"""
+Voice transcription for every browser session of the app.
+
+create_travel_app used to share one AssemblyAITranscriber between all sessions, so two users
+recording at once overwrote each other's stream and transcript, and every recording held two
+OS threads (websocket loop and audio reader). TranscriberManager keeps one TranscriptionSession
+per Gradio session hash instead, all of them tasks on the caller's event loop:
+    - each session's websocket is driven by asyncio, not by a thread of its own
+    - blocking audio sources (the microphone) are read on one shared executor of
+      TRANSCRIBE_MAX_SESSIONS threads; async sources need no thread at all
+    - at most TRANSCRIBE_MAX_SESSIONS recordings run at once, start() beyond that raises
+      TranscriberBusy
+    - a recording that neither sends audio nor receives a message for TRANSCRIBE_IDLE_TIMEOUT
+      seconds is dropped, and release() drops a session whose tab was closed
+stream() follows a recording's transcript as the turns arrive, for the message box to show
+while the user speaks.
+
+Audio comes from the browser by default (TRANSCRIBE_AUDIO_INPUT=browser): start() a recording
+with an AudioFeed and push() the chunks the Gradio microphone streams. Gradio may handle the first
+stream events before the start_recording event, so chunks pushed before start() are kept and the
+recording begins with them; chunks arriving just after a recording stopped are its late tail
+and are dropped. TRANSCRIBE_AUDIO_INPUT=server records the server's own microphone instead,
+which needs pyaudio (the server-mic extra) and only makes sense when browser and server are the
+same machine.
+"""
+import os
+import json
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Dict, Iterable, Iterator, Optional, Union
+import numpy as np
+from dotenv import load_dotenv
+from websockets.asyncio.client import ClientConnection, connect
+from websockets.exceptions import ConnectionClosed, WebSocketException
+from backend.transcript.capture import AudioCapture, create_capture
+from backend.transcript.feed import AudioFeed
+from backend.transcript.vad import VoiceGate
+from backend.transcript.main import (
+    API_ENDPOINT, CHANNELS, FRAMES_PER_BUFFER, SAMPLE_RATE, TRANSCRIBE_STOP_TIMEOUT, YOUR_API_KEY,
+    TurnBuffer, close_microphone, open_microphone,
+)
+from shared_utils.logger import get_logger
+
+load_dotenv()
+logger = get_logger()
+
+TRANSCRIBE_AUDIO_INPUT = os.getenv("TRANSCRIBE_AUDIO_INPUT", "browser")
+TRANSCRIBE_MAX_SESSIONS = int(os.getenv("TRANSCRIBE_MAX_SESSIONS", 8))
+TRANSCRIBE_IDLE_TIMEOUT = float(os.getenv("TRANSCRIBE_IDLE_TIMEOUT", 60.0))
+# Longest a stopped recording waits for its audio sender and socket to wind down
+SESSION_CLOSE_TIMEOUT = 1.0
+# Browser audio pushed this soon after a recording stopped belongs to it, not to the next one
+LATE_AUDIO_WINDOW = 1.0
+
+AudioSource = Union[Iterable[bytes], AsyncIterator[bytes]]
+
+
+class TranscriberBusy(RuntimeError):
+    """ All TRANSCRIBE_MAX_SESSIONS recordings are in use """
+
+
+class TranscriptionSession:
+    """ One recording: streams its audio to the transcription websocket and collects the turns """
+
+    def __init__(self, key: str, capture: AudioCapture):
+        self.key = key
+        self.turns = TurnBuffer()
+        self.capture = capture
+        self.gate = VoiceGate(SAMPLE_RATE, CHANNELS)
+        # Set when the audio comes from the browser, see push()
+        self.feed: Optional[AudioFeed] = None
+        self.stopping = asyncio.Event()
+        # Set by the server's Termination message (or a closed/failed connection)
+        self.terminated = asyncio.Event()
+        # Set on every new turn and when the recording is finished, see updates()
+        self.changed = asyncio.Event()
+        self.finished = False
+        self.ws: Optional[ClientConnection] = None
+        self.task: Optional[asyncio.Task] = None
+        self.sender: Optional[asyncio.Task] = None
+        self.last_active = time.monotonic()
+
+    async def run(self, chunks: AsyncIterator[bytes]) -> None:
+        try:
+            async with connect(
+                API_ENDPOINT,
+                additional_headers={"Authorization": YOUR_API_KEY},
+                close_timeout=SESSION_CLOSE_TIMEOUT,
+            ) as ws:
+                self.ws = ws
+                self.sender = asyncio.create_task(self.send_audio(ws, chunks))
+                async for message in ws:
+                    self.last_active = time.monotonic()
+                    self.on_message(message)
+        except (OSError, WebSocketException) as e:
+            logger.warning("Transcription session %s ended: %s", self.key, e)
+        finally:
+            self.stopping.set()
+            self.terminated.set()
+            if self.sender:
+                self.sender.cancel()
+            self.capture.close()
+
+    async def send_audio(self, ws: ClientConnection, chunks: AsyncIterator[bytes]) -> None:
+        try:
+            async for data in chunks:
+                if self.stopping.is_set():
+                    break
+                self.capture.write(data)
+                for chunk in self.gate.process(data):
+                    await ws.send(chunk)
+                self.last_active = time.monotonic()
+        except ConnectionClosed:
+            pass
+        finally:
+            self.gate.close()
+            logger.info("Transcription session %s sent %.1fs of %.1fs recorded (%.0f%% silence suppressed)",
+                        self.key, self.gate.sent_seconds, self.gate.audio_seconds, self.gate.suppressed_share * 100)
+            aclose = getattr(chunks, "aclose", None)
+            if aclose:
+                await aclose()
+
+    def on_message(self, message: Union[str, bytes]) -> None:
+        try:
+            data = json.loads(message)
+        except json.JSONDecodeError as e:
+            logger.warning("Error decoding transcription message: %s", e)
+            return
+        msg_type = data.get("type")
+        if msg_type == "Turn":
+            self.turns.add(data)
+            self.changed.set()
+        elif msg_type == "Begin":
+            logger.debug("Transcription session %s began: ID=%s", self.key, data.get("id"))
+        elif msg_type == "Termination":
+            logger.debug("Transcription session %s terminated: audio=%ss", self.key, data.get("audio_duration_seconds", 0))
+            self.terminated.set()
+
+    async def stop(self, timeout: float = TRANSCRIBE_STOP_TIMEOUT) -> str:
+        """ Stop sending audio, wait (at most `timeout`) for the last turn and return the transcript """
+
+        if self.feed is not None:
+            # Browser audio still buffered is sent first, then the feed ends the sender
+            self.feed.close()
+        else:
+            self.stopping.set()
+        if self.sender:
+            # The sender exits after the chunk in hand, so no audio follows Terminate
+            await asyncio.wait({self.sender}, timeout=SESSION_CLOSE_TIMEOUT)
+            self.sender.cancel()
+        self.stopping.set()
+        if self.ws is not None and not self.terminated.is_set():
+            try:
+                await self.ws.send(json.dumps({"type": "Terminate"}))
+                await asyncio.wait_for(self.terminated.wait(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning("No Termination within %ss for session %s, keeping the partial transcript", timeout, self.key)
+            except ConnectionClosed:
+                pass
+        await self.close()
+        return self.turns.text().strip()
+
+    async def close(self) -> None:
+        """ Drop the connection without waiting for the final turn """
+
+        self.stopping.set()
+        if self.task and not self.task.done():
+            # After Termination the server closes the socket itself; give it the chance first
+            await asyncio.wait({self.task}, timeout=SESSION_CLOSE_TIMEOUT if self.terminated.is_set() else 0)
+            self.task.cancel()
+        self.finished = True
+        self.changed.set()
+
+    async def updates(self) -> AsyncIterator[str]:
+        """ The transcript each time it changes, partial turns included, ending with the final one """
+
+        shown = ""
+        while not self.finished:
+            await self.changed.wait()
+            self.changed.clear()
+            text = self.turns.text().strip()
+            if text != shown:
+                shown = text
+                yield text
+
+
+class TranscriberManager:
+    """ The recordings of all browser sessions, keyed by Gradio session hash """
+
+    def __init__(self, max_sessions: int = TRANSCRIBE_MAX_SESSIONS, idle_timeout: float = TRANSCRIBE_IDLE_TIMEOUT):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.sessions: Dict[str, TranscriptionSession] = {}
+        # Browser audio pushed before its recording was started, see push()
+        self.early_feeds: Dict[str, AudioFeed] = {}
+        # When each session's last recording stopped
+        self.stopped_at: Dict[str, float] = {}
+        self.executor = ThreadPoolExecutor(max_workers=max_sessions, thread_name_prefix="transcriber-audio")
+        self.reaper: Optional[asyncio.Task] = None
+
+    async def start(self, key: str, audio_source: Optional[AudioSource] = None) -> bool:
+        """ Start recording `audio_source` (16 kHz mono int16 chunks, by default the microphone) for session `key` """
+
+        early_feed = self.early_feeds.pop(key, None)
+        if isinstance(audio_source, AudioFeed) and early_feed is not None:
+            audio_source = early_feed
+        if key in self.sessions:
+            await self.release(key)
+        if len(self.sessions) >= self.max_sessions:
+            raise TranscriberBusy(f"All {self.max_sessions} voice input slots are in use, please try again shortly")
+        chunks = await self.audio_chunks(audio_source)
+        if chunks is None:
+            return False
+        session = self.sessions[key] = TranscriptionSession(key, create_capture(SAMPLE_RATE, CHANNELS))
+        if isinstance(audio_source, AudioFeed):
+            session.feed = audio_source
+        session.task = asyncio.create_task(session.run(chunks))
+        if self.reaper is None or self.reaper.done():
+            self.reaper = asyncio.create_task(self.reap())
+        return True
+
+    async def stop(self, key: str, timeout: float = TRANSCRIBE_STOP_TIMEOUT) -> str:
+        """ The transcript of session `key`'s recording, "" when it has none """
+
+        self.stopped_at[key] = time.monotonic()
+        self.early_feeds.pop(key, None)
+        session = self.sessions.pop(key, None)
+        if session is None:
+            return ""
+        return await session.stop(timeout)
+
+    def push(self, key: str, sample_rate: int, samples: np.ndarray) -> None:
+        """ Add browser audio to session `key`'s recording, or keep it for the recording about to start """
+
+        session = self.sessions.get(key)
+        if session is not None:
+            if session.feed is not None:
+                session.feed.put(sample_rate, samples)
+            return
+        if time.monotonic() - self.stopped_at.get(key, float("-inf")) < LATE_AUDIO_WINDOW:
+            return
+        self.early_feeds.setdefault(key, AudioFeed()).put(sample_rate, samples)
+
+    async def stream(self, key: str) -> AsyncIterator[str]:
+        """ Session `key`'s transcript as it grows, until its recording is stopped or dropped """
+
+        session = self.sessions.get(key)
+        if session is None:
+            return
+        async for text in session.updates():
+            yield text
+
+    async def release(self, key: str) -> None:
+        """ Drop session `key`'s recording, e.g. when its tab is closed """
+
+        self.early_feeds.pop(key, None)
+        self.stopped_at.pop(key, None)
+        session = self.sessions.pop(key, None)
+        if session is not None:
+            await session.close()
+
+    async def reap(self) -> None:
+        """ Drop idle recordings until none are left """
+
+        while self.sessions:
+            await asyncio.sleep(min(self.idle_timeout, 5.0))
+            now = time.monotonic()
+            for key, session in list(self.sessions.items()):
+                if now - session.last_active > self.idle_timeout:
+                    logger.info("Dropping transcription session %s after %.0fs idle", key, self.idle_timeout)
+                    await self.release(key)
+
+    async def audio_chunks(self, audio_source: Optional[AudioSource]) -> Optional[AsyncIterator[bytes]]:
+        if audio_source is None:
+            # Initialising PortAudio takes a while; keep it off the event loop
+            microphone = await asyncio.get_running_loop().run_in_executor(self.executor, open_microphone)
+            if microphone is None:
+                return None
+            audio, stream = microphone
+
+            def read_microphone() -> Iterator[bytes]:
+                while True:
+                    yield stream.read(FRAMES_PER_BUFFER, exception_on_overflow=False)
+
+            return self.read_in_executor(read_microphone(), lambda: close_microphone(audio, stream))
+        if hasattr(audio_source, "__aiter__"):
+            return audio_source
+        return self.read_in_executor(iter(audio_source))
+
+    async def read_in_executor(self, chunks: Iterator[bytes], on_close: Optional[Callable[[], None]] = None) -> AsyncIterator[bytes]:
+        """ A blocking chunk iterator read one chunk at a time on the shared executor """
+
+        loop = asyncio.get_running_loop()
+        try:
+            while (data := await loop.run_in_executor(self.executor, next, chunks, None)) is not None:
+                yield data
+        finally:
+            if on_close:
+                on_close()
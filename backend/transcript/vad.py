@@ -0,0 +1,129 @@
+"""
+Local voice-activity gate for the audio sent to the transcription service.
+
+Every 50 ms chunk used to be streamed, long silences included, and streamed audio is billed by
+the second. VoiceGate looks at two cheap NumPy features of each chunk's int16 samples, energy
+(dBFS) and zero-crossing rate, and
+    - sends speech, preceded by up to VAD_PREROLL_MS of the audio before it so that word
+      onsets are not clipped
+    - keeps sending VAD_HANGOVER_MS of silence after speech, long enough for the server's
+      end-of-turn detection to hear the pause
+    - drops the rest of a silence, except one chunk every VAD_KEEPALIVE_SECONDS so that the
+      session is not closed for inactivity
+The energy threshold follows the background noise floor (VAD_MARGIN_DB above it, never below
+VAD_THRESHOLD_DB); quieter chunks still count as speech when their zero-crossing rate is that
+of a fricative ("s", "f"). TRANSCRIBE_VAD=off sends everything, as before.
+"""
+import os
+from collections import deque
+from typing import Deque, List
+import numpy as np
+from dotenv import load_dotenv
+from shared_utils.metrics import TRANSCRIBE_AUDIO
+
+load_dotenv()
+
+TRANSCRIBE_VAD = os.getenv("TRANSCRIBE_VAD", "on").lower() == "on"
+VAD_THRESHOLD_DB = float(os.getenv("VAD_THRESHOLD_DB", -50.0))
+VAD_MARGIN_DB = float(os.getenv("VAD_MARGIN_DB", 9.0))
+# AssemblyAI ends a turn after at most 1280 ms of silence (max_turn_silence)
+VAD_HANGOVER_MS = float(os.getenv("VAD_HANGOVER_MS", 1500))
+VAD_PREROLL_MS = float(os.getenv("VAD_PREROLL_MS", 200))
+VAD_KEEPALIVE_SECONDS = float(os.getenv("VAD_KEEPALIVE_SECONDS", 5.0))
+# Fricatives: noise-like, so many sign changes, and a few dB quieter than vowels
+FRICATIVE_ZCR = 0.3
+FRICATIVE_RELIEF_DB = 6.0
+# How fast the noise floor rises towards louder chunks (it falls at once): about 5 s of 50 ms
+# chunks, so a steady noise is learned while speech, with its pauses between syllables, is not
+NOISE_FLOOR_RISE = 0.01
+
+
+def chunk_features(chunk: bytes) -> tuple:
+    """ (energy in dBFS, zero-crossing rate) of a chunk of int16 samples """
+
+    samples = np.frombuffer(chunk, dtype=np.int16)
+    if not len(samples):
+        return -100.0, 0.0
+    power = np.dot(samples, samples.astype(np.float64)) / len(samples)
+    energy_db = 10 * np.log10(power / 32768 ** 2 + 1e-10)
+    crossings = np.count_nonzero(np.signbit(samples[1:]) != np.signbit(samples[:-1]))
+    return float(energy_db), crossings / max(len(samples) - 1, 1)
+
+
+class VoiceGate:
+    """ Decides, chunk by chunk, what of a recording is sent; see the module docstring """
+
+    def __init__(self, sample_rate: int, channels: int = 1, sample_width: int = 2, enabled: bool = TRANSCRIBE_VAD,
+                 threshold_db: float = VAD_THRESHOLD_DB, margin_db: float = VAD_MARGIN_DB,
+                 hangover_ms: float = VAD_HANGOVER_MS, preroll_ms: float = VAD_PREROLL_MS,
+                 keepalive_seconds: float = VAD_KEEPALIVE_SECONDS):
+        self.bytes_per_second = sample_rate * channels * sample_width
+        self.enabled = enabled
+        self.threshold_db = threshold_db
+        self.margin_db = margin_db
+        self.hangover = hangover_ms / 1000
+        self.preroll_seconds = preroll_ms / 1000
+        self.keepalive = keepalive_seconds
+        self.noise_floor_db = threshold_db - margin_db
+        self.preroll: Deque[bytes] = deque()
+        # Silence since the last speech; a recording starts as if after a long silence
+        self.silence = self.hangover
+        self.since_sent = 0.0
+        self.audio_seconds = 0.0
+        self.sent_seconds = 0.0
+        self.keepalives = 0
+
+    @property
+    def suppressed_share(self) -> float:
+        """ Share of the recording's audio that was not sent """
+
+        return 1 - self.sent_seconds / self.audio_seconds if self.audio_seconds else 0.0
+
+    def is_speech(self, chunk: bytes) -> bool:
+        energy_db, zcr = chunk_features(chunk)
+        threshold = max(self.threshold_db, self.noise_floor_db + self.margin_db)
+        if energy_db < self.noise_floor_db:
+            self.noise_floor_db = energy_db
+        else:
+            self.noise_floor_db += NOISE_FLOOR_RISE * (energy_db - self.noise_floor_db)
+        return energy_db > threshold or (energy_db > threshold - FRICATIVE_RELIEF_DB and zcr > FRICATIVE_ZCR)
+
+    def process(self, chunk: bytes) -> List[bytes]:
+        """ The chunks to send now for `chunk`: none, the chunk, or the pre-roll and the chunk """
+
+        seconds = len(chunk) / self.bytes_per_second
+        self.audio_seconds += seconds
+        if not self.enabled:
+            return self._send([chunk], "speech")
+        if self.is_speech(chunk):
+            self.silence = 0.0
+            held, self.preroll = list(self.preroll), deque()
+            return self._send(held + [chunk], "speech")
+        if self.silence < self.hangover:
+            self.silence += seconds
+            return self._send([chunk], "hangover")
+        if self.since_sent + seconds >= self.keepalive:
+            self.keepalives += 1
+            self._drop(len(self.preroll))
+            return self._send([chunk], "keepalive")
+        self.since_sent += seconds
+        self.preroll.append(chunk)
+        if sum(len(held) for held in self.preroll) > self.preroll_seconds * self.bytes_per_second:
+            self._drop(1)
+        return []
+
+    def close(self) -> None:
+        """ Count the pre-roll that was never sent """
+
+        self._drop(len(self.preroll))
+
+    def _send(self, chunks: List[bytes], result: str) -> List[bytes]:
+        seconds = sum(len(chunk) for chunk in chunks) / self.bytes_per_second
+        self.sent_seconds += seconds
+        self.since_sent = 0.0
+        TRANSCRIBE_AUDIO.labels(result).inc(seconds)
+        return chunks
+
+    def _drop(self, count: int) -> None:
+        for _ in range(count):
+            TRANSCRIBE_AUDIO.labels("suppressed").inc(len(self.preroll.popleft()) / self.bytes_per_second)
@@ -1,8 +1,16 @@
 import os
 import time
-import httpx
 from dotenv import load_dotenv
+from shared_utils.metrics import upstream_call, record_cache
+from shared_utils.http import get_client
 load_dotenv(override=True)
+
+# Upstream base URLs, overridable to point the backend at a local stand-in (see benchmarks/standin.py)
+SERPAPI_BASE_URL = os.getenv("SERPAPI_BASE_URL", "https://serpapi.com")
+AMADEUS_BASE_URL = os.getenv("AMADEUS_BASE_URL", "https://test.api.amadeus.com")
+GOOGLE_GEOCODING_BASE_URL = os.getenv("GOOGLE_GEOCODING_BASE_URL", "https://maps.googleapis.com")
+BACKEND_API_URL = os.getenv("BACKEND_API_URL", "http://localhost:8000/api")
+
 _access_token = None
 _token_expiry = 0
 
@@ -11,25 +19,28 @@ async def get_access_token():
 
     global _access_token, _token_expiry
     if _access_token and time.time() < _token_expiry:
+        record_cache("amadeus_token", True)
         return _access_token
+    record_cache("amadeus_token", False)
 
     AMADEUS_CLIENT_ID = os.getenv("AMADEUS_CLIENT_ID")
     AMADEUS_CLIENT_SECRET = os.getenv("AMADEUS_CLIENT_SECRET")
     if not AMADEUS_CLIENT_ID or not AMADEUS_CLIENT_SECRET:
         raise ValueError("Amadeus API credentials not found")
     
-    async with httpx.AsyncClient(timeout=float(os.getenv("HTTP_TIMEOUT", 90.0))) as client:
-        token_url = "https://test.api.amadeus.com/v1/security/oauth2/token"
-        payload = {
-            "grant_type": "client_credentials",
-            "client_id": AMADEUS_CLIENT_ID,
-            "client_secret": AMADEUS_CLIENT_SECRET,
-        }
-        headers = {"Content-Type": "application/x-www-form-urlencoded"}
-
-        response = await client.post(token_url, data=payload, headers=headers)
-        response.raise_for_status()        
-        token_data = response.json()
+    client = get_client()
+    token_url = f"{AMADEUS_BASE_URL}/v1/security/oauth2/token"
+    payload = {
+        "grant_type": "client_credentials",
+        "client_id": AMADEUS_CLIENT_ID,
+        "client_secret": AMADEUS_CLIENT_SECRET,
+    }
+    headers = {"Content-Type": "application/x-www-form-urlencoded"}
+
+    with upstream_call("amadeus", "token") as call:
+        response = call.response = await client.post(token_url, data=payload, headers=headers)
+    response.raise_for_status()        
+    token_data = response.json()
     
     _access_token = token_data["access_token"]
     _token_expiry = time.time() + token_data["expires_in"] - 10
@@ -0,0 +1,162 @@
+"""
+TravelAgent turn benchmark with a scripted LLM and stubbed tools (no Gemini, SerpAPI or Amadeus keys needed).
+
+Run with: python -m benchmarks.agent_turns [--threads 50] [--max-p95-ms 50] [--json]
+
+Every simulated user drives process_message through a three-turn conversation (airport lookup,
+confirmation, flight search) on its own thread id, all users concurrently. Per-turn latency is
+split into LLM, tools, checkpointer and JSON handling time; whatever remains is graph overhead
+(including, with many threads, time spent queued behind other users on the event loop).
+With --max-p95-ms / --min-throughput the run exits non-zero when a threshold is missed, so it
+can gate regressions in CI.
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tracemalloc
+import statistics
+from typing import Dict, List
+from langgraph.checkpoint.memory import MemorySaver
+from benchmarks.fakes import ScriptedChatModel, build_stub_tools, scripted_conversation, turn_timings, record_timing
+from backend.agents.travel_agent import TravelAgent
+
+BUCKETS = ["llm", "tools", "checkpointer", "json", "graph"]
+
+
+class TimedMemorySaver(MemorySaver):
+    """ MemorySaver that books its read/write time to the current turn """
+
+    def get_tuple(self, config):
+        started = time.perf_counter()
+        try:
+            return super().get_tuple(config)
+        finally:
+            record_timing("checkpointer", time.perf_counter() - started)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        started = time.perf_counter()
+        try:
+            return super().put(config, checkpoint, metadata, new_versions)
+        finally:
+            record_timing("checkpointer", time.perf_counter() - started)
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        started = time.perf_counter()
+        try:
+            return super().put_writes(config, writes, task_id, task_path)
+        finally:
+            record_timing("checkpointer", time.perf_counter() - started)
+
+
+def build_agent(llm_latency: float, tool_latency: float) -> TravelAgent:
+    conversation = scripted_conversation()
+    responses = [response for _, turn_responses in conversation for response in turn_responses]
+    agent = TravelAgent(
+        llm=ScriptedChatModel(responses=responses, latency=llm_latency),
+        tools=build_stub_tools(tool_latency),
+        checkpointer=TimedMemorySaver(),
+    )
+    # The fast path would bypass the scripted worker calls
+    agent.slot_parser = None
+
+    # Tool results are parsed back from JSON here; book that time as JSON handling
+    extract = agent._extract_flight_data_and_params
+
+    def timed_extract(messages):
+        started = time.perf_counter()
+        try:
+            return extract(messages)
+        finally:
+            record_timing("json", time.perf_counter() - started)
+
+    agent._extract_flight_data_and_params = timed_extract
+    return agent
+
+
+async def run_user(agent: TravelAgent, user: int, turns: List[Dict[str, float]]) -> None:
+    thread = f"bench-{user}"
+    history: List = []
+    for message, _ in scripted_conversation():
+        timings: Dict[str, float] = {}
+        token = turn_timings.set(timings)
+        started = time.perf_counter()
+        history, _, _ = await agent.process_message(message, history, thread)
+        timings["total"] = time.perf_counter() - started
+        turn_timings.reset(token)
+        timings["graph"] = max(timings["total"] - sum(timings.get(b, 0.0) for b in BUCKETS if b != "graph"), 0.0)
+        turns.append(timings)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def run(args) -> Dict:
+    agent = build_agent(args.llm_latency_ms / 1000, args.tool_latency_ms / 1000)
+    # Warm up imports, pydantic schemas and the graph once outside the measurement
+    await run_user(agent, -1, [])
+
+    turns: List[Dict[str, float]] = []
+    started = time.perf_counter()
+    await asyncio.gather(*(run_user(agent, user, turns) for user in range(args.threads)))
+    elapsed = time.perf_counter() - started
+
+    # Memory is measured in a second pass on fresh threads, tracemalloc would distort the timings
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    await asyncio.gather(*(run_user(agent, args.threads + user, []) for user in range(args.threads)))
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    totals_ms = [t["total"] * 1000 for t in turns]
+    return {
+        "threads": args.threads,
+        "turns": len(turns),
+        "throughput_turns_per_s": len(turns) / elapsed,
+        "latency_ms": {
+            "p50": percentile(totals_ms, 50),
+            "p95": percentile(totals_ms, 95),
+            "p99": percentile(totals_ms, 99),
+            "mean": statistics.fmean(totals_ms),
+        },
+        "mean_split_ms": {bucket: statistics.fmean(t.get(bucket, 0.0) for t in turns) * 1000 for bucket in BUCKETS},
+        "retained_kb_per_thread": (retained - baseline) / 1024 / args.threads,
+        "peak_kb": (peak - baseline) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=50, help="concurrent conversations")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="simulated model latency per call")
+    parser.add_argument("--tool-latency-ms", type=float, default=0.0, help="simulated tool latency per call")
+    parser.add_argument("--max-p95-ms", type=float, help="fail when the p95 turn latency exceeds this")
+    parser.add_argument("--min-throughput", type=float, help="fail when turns/s falls below this")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        latency = report["latency_ms"]
+        print(f"threads {report['threads']}, turns {report['turns']}, throughput {report['throughput_turns_per_s']:.1f} turns/s")
+        print(f"turn latency  p50 {latency['p50']:.2f} ms  p95 {latency['p95']:.2f} ms  p99 {latency['p99']:.2f} ms")
+        print("mean split    " + "  ".join(f"{bucket} {ms:.2f} ms" for bucket, ms in report["mean_split_ms"].items()))
+        print(f"memory        {report['retained_kb_per_thread']:.1f} KiB retained per thread, peak {report['peak_kb']:.0f} KiB")
+
+    failures = []
+    if args.max_p95_ms is not None and report["latency_ms"]["p95"] > args.max_p95_ms:
+        failures.append(f"p95 {report['latency_ms']['p95']:.2f} ms > {args.max_p95_ms} ms")
+    if args.min_throughput is not None and report["throughput_turns_per_s"] < args.min_throughput:
+        failures.append(f"throughput {report['throughput_turns_per_s']:.1f} turns/s < {args.min_throughput}")
+    if failures:
+        print("FAILED: " + "; ".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+"""
+Load test for the FastAPI backend against the local upstream stand-in.
+
+Run with: python -m benchmarks.backend_load [--users 50] [--duration 30] [--think-ms 500]
+                                            [--max-p95-ms 1500] [--max-error-rate 0.01] [--json]
+
+The stand-in (benchmarks.standin) and the backend are started as subprocesses on free ports,
+the backend pointed at the stand-in through the *_BASE_URL variables. Each simulated user then
+loops through a search session with exponential think-time between steps:
+    airports (origin) -> airports (destination) -> outbound-flights
+    -> return-flights (round trips) -> bookingdata (a share of sessions)
+Latency percentiles, throughput and error rate are reported per endpoint, together with the
+backend's event-loop lag, sampled inside the backend process. Use --target to drive an already
+running backend instead. With thresholds set the run exits non-zero when one is missed.
+"""
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import statistics
+import subprocess
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+import httpx
+
+ORIGINS = ["Ahmedabad", "Delhi", "Mumbai", "Bangalore", "Chennai"]
+DESTINATIONS = ["London", "Dubai", "Singapore", "Paris", "New York"]
+ROUTES = [("AMD", "LHR"), ("DEL", "DXB"), ("BOM", "SIN"), ("BLR", "CDG"), ("MAA", "JFK")]
+ENDPOINTS = ["airports", "outbound-flights", "return-flights", "bookingdata"]
+LAG_INTERVAL = 0.01
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def serve_backend(port: int) -> None:
+    """ Run backend.main with an event-loop lag probe mounted at /_loadtest/lag """
+
+    import uvicorn
+    from backend.main import app
+
+    samples: List[float] = []
+
+    async def probe():
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(LAG_INTERVAL)
+            samples.append(max(loop.time() - started - LAG_INTERVAL, 0.0))
+
+    app_lifespan = app.router.lifespan_context
+
+    @asynccontextmanager
+    async def lifespan(app):
+        task = asyncio.create_task(probe())
+        async with app_lifespan(app):
+            yield
+        task.cancel()
+
+    app.router.lifespan_context = lifespan
+
+    @app.get("/_loadtest/lag")
+    async def lag(reset: bool = False):
+        values = [s * 1000 for s in samples]
+        if reset:
+            samples.clear()
+        return {"samples": len(values), "p50": percentile(values, 50), "p99": percentile(values, 99), "max": max(values, default=0.0)}
+
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+async def wait_ready(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+
+
+class LoadRun:
+    """ Drives simulated users and collects per-request samples """
+
+    def __init__(self, base_url: str, args):
+        self.base_url = base_url
+        self.args = args
+        self.samples: Dict[str, List[float]] = {endpoint: [] for endpoint in ENDPOINTS}
+        self.errors: Dict[str, int] = {endpoint: 0 for endpoint in ENDPOINTS}
+        self.client_lag: List[float] = []
+        self.stop_at = 0.0
+
+    async def call(self, client: httpx.AsyncClient, endpoint: str, params: Dict) -> Optional[dict]:
+        started = time.perf_counter()
+        try:
+            response = await client.get(f"{self.base_url}/api/{endpoint}", params=params)
+            ok = response.status_code == 200
+        except httpx.HTTPError:
+            response, ok = None, False
+        self.samples[endpoint].append((time.perf_counter() - started) * 1000)
+        if not ok:
+            self.errors[endpoint] += 1
+            return None
+        return response.json()
+
+    async def think(self) -> None:
+        if self.args.think_ms:
+            await asyncio.sleep(random.expovariate(1000 / self.args.think_ms))
+
+    async def session(self, client: httpx.AsyncClient, rng: random.Random) -> None:
+        route = rng.randrange(len(ROUTES))
+        departure_id, arrival_id = ROUTES[route]
+        await self.call(client, "airports", {"location": ORIGINS[route]})
+        await self.think()
+        await self.call(client, "airports", {"location": DESTINATIONS[route]})
+        await self.think()
+
+        outbound_date = time.strftime("%Y-%m-%d", time.localtime(time.time() + rng.randint(7, 90) * 86400))
+        params = {"departure_id": departure_id, "arrival_id": arrival_id, "outbound_date": outbound_date, "adults": rng.randint(1, 3)}
+        round_trip = rng.random() < self.args.round_trip_share
+        if round_trip:
+            params["return_date"] = time.strftime("%Y-%m-%d", time.localtime(time.time() + rng.randint(91, 120) * 86400))
+
+        listing = await self.call(client, "outbound-flights", params)
+        flights = (listing or {}).get("flights") or []
+        if not flights:
+            return
+        await self.think()
+
+        chosen = rng.choice(flights)
+        if round_trip:
+            listing = await self.call(client, "return-flights", {**params, "departure_token": chosen.get("departure_token", "")})
+            flights = (listing or {}).get("flights") or []
+            if not flights:
+                return
+            chosen = rng.choice(flights)
+            await self.think()
+
+        if rng.random() < self.args.booking_share and chosen.get("booking_token"):
+            await self.call(client, "bookingdata", {**params, "booking_token": chosen["booking_token"]})
+
+    async def user(self, client: httpx.AsyncClient, user: int) -> None:
+        rng = random.Random(user)
+        # Spread user arrival over the ramp-up period
+        await asyncio.sleep(self.args.ramp_up * user / max(self.args.users, 1))
+        while time.monotonic() < self.stop_at:
+            await self.session(client, rng)
+            await self.think()
+
+    async def monitor_client_lag(self) -> None:
+        loop = asyncio.get_running_loop()
+        while time.monotonic() < self.stop_at:
+            started = loop.time()
+            await asyncio.sleep(LAG_INTERVAL)
+            self.client_lag.append(max(loop.time() - started - LAG_INTERVAL, 0.0) * 1000)
+
+    async def run(self) -> Dict:
+        limits = httpx.Limits(max_connections=self.args.users, max_keepalive_connections=self.args.users)
+        async with httpx.AsyncClient(limits=limits, timeout=httpx.Timeout(self.args.timeout)) as client:
+            server_lag = await self.server_lag(client, reset=True)
+            started = time.monotonic()
+            self.stop_at = started + self.args.duration
+            await asyncio.gather(self.monitor_client_lag(), *(self.user(client, user) for user in range(self.args.users)))
+            elapsed = time.monotonic() - started
+            server_lag = await self.server_lag(client)
+        return self.report(elapsed, server_lag)
+
+    async def server_lag(self, client: httpx.AsyncClient, reset: bool = False) -> Optional[Dict]:
+        try:
+            response = await client.get(f"{self.base_url}/_loadtest/lag", params={"reset": reset})
+            return response.json() if response.status_code == 200 else None
+        except httpx.HTTPError:
+            return None
+
+    def report(self, elapsed: float, server_lag: Optional[Dict]) -> Dict:
+        all_samples = [ms for samples in self.samples.values() for ms in samples]
+        errors = sum(self.errors.values())
+
+        def summary(samples: List[float], error_count: int) -> Dict:
+            return {
+                "requests": len(samples),
+                "throughput_rps": len(samples) / elapsed,
+                "error_rate": error_count / len(samples) if samples else 0.0,
+                "p50_ms": percentile(samples, 50),
+                "p95_ms": percentile(samples, 95),
+                "p99_ms": percentile(samples, 99),
+                "mean_ms": statistics.fmean(samples) if samples else 0.0,
+            }
+
+        return {
+            "users": self.args.users,
+            "duration_s": elapsed,
+            "think_ms": self.args.think_ms,
+            "overall": summary(all_samples, errors),
+            "endpoints": {endpoint: summary(self.samples[endpoint], self.errors[endpoint]) for endpoint in ENDPOINTS},
+            "event_loop_lag_ms": {
+                "backend": server_lag,
+                "client": {"p50": percentile(self.client_lag, 50), "p99": percentile(self.client_lag, 99), "max": max(self.client_lag, default=0.0)},
+            },
+        }
+
+
+def print_table(report: Dict) -> None:
+    print(f"users {report['users']}, {report['duration_s']:.1f} s, think-time {report['think_ms']:.0f} ms")
+    print(f"{'endpoint':<18}{'requests':>10}{'req/s':>9}{'errors':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    rows = list(report["endpoints"].items()) + [("overall", report["overall"])]
+    for name, row in rows:
+        print(f"{name:<18}{row['requests']:>10}{row['throughput_rps']:>9.1f}{row['error_rate']:>9.1%}"
+              f"{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}")
+    backend_lag = report["event_loop_lag_ms"]["backend"]
+    if backend_lag:
+        print(f"backend loop lag  p50 {backend_lag['p50']:.2f} ms  p99 {backend_lag['p99']:.2f} ms  max {backend_lag['max']:.2f} ms")
+    client_lag = report["event_loop_lag_ms"]["client"]
+    print(f"client loop lag   p50 {client_lag['p50']:.2f} ms  p99 {client_lag['p99']:.2f} ms  max {client_lag['max']:.2f} ms")
+
+
+def start_servers(args) -> tuple:
+    """ Start the stand-in and the backend; returns (stand-in URL, backend URL, processes) """
+
+    standin_port, backend_port = free_port(), free_port()
+    standin_url = f"http://127.0.0.1:{standin_port}"
+    backend_url = f"http://127.0.0.1:{backend_port}"
+    standin_cmd = [sys.executable, "-m", "benchmarks.standin", "--port", str(standin_port), "--error-rate", str(args.upstream_error_rate)]
+    for spec in args.upstream_latency:
+        standin_cmd += ["--latency", spec]
+    env = {
+        **os.environ,
+        "SERPAPI_BASE_URL": standin_url,
+        "AMADEUS_BASE_URL": standin_url,
+        "GOOGLE_GEOCODING_BASE_URL": standin_url,
+        "BACKEND_API_URL": f"{backend_url}/api",
+        "SERPAPI_API_KEY": "load-test",
+        "AMADEUS_CLIENT_ID": "load-test",
+        "AMADEUS_CLIENT_SECRET": "load-test",
+        "GOOGLE_GEOLOCATION_API": "load-test",
+    }
+    backend_log = open(args.backend_log, "w") if args.backend_log else subprocess.DEVNULL
+    processes = [
+        subprocess.Popen(standin_cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL),
+        subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.backend_load", "--serve-backend", str(backend_port)],
+            env=env, stdout=backend_log, stderr=None if args.verbose else subprocess.DEVNULL,
+        ),
+    ]
+    return standin_url, backend_url, processes
+
+
+async def main_async(args) -> Dict:
+    processes = []
+    try:
+        if args.target:
+            base_url = args.target.rstrip("/")
+        else:
+            standin_url, base_url, processes = start_servers(args)
+            await wait_ready(f"{standin_url}/standin/stats")
+        await wait_ready(f"{base_url}/docs")
+        return await LoadRun(base_url, args).run()
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50, help="concurrent simulated users")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of load after ramp-up starts")
+    parser.add_argument("--ramp-up", type=float, default=5.0, help="seconds over which users join")
+    parser.add_argument("--think-ms", type=float, default=500.0, help="mean user think-time between steps (exponential)")
+    parser.add_argument("--round-trip-share", type=float, default=0.6, help="share of sessions searching round trips")
+    parser.add_argument("--booking-share", type=float, default=0.5, help="share of sessions opening booking options")
+    parser.add_argument("--timeout", type=float, default=30.0, help="client timeout per request in seconds")
+    parser.add_argument("--upstream-latency", action="append", default=[], help="stand-in latency spec, e.g. serpapi=lognormal:800,0.4")
+    parser.add_argument("--upstream-error-rate", type=float, default=0.0, help="stand-in injected error rate")
+    parser.add_argument("--target", help="base URL of an already running backend (skips starting servers)")
+    parser.add_argument("--max-p95-ms", type=float, help="fail when the overall p95 latency exceeds this")
+    parser.add_argument("--max-error-rate", type=float, help="fail when the overall error rate exceeds this")
+    parser.add_argument("--max-loop-lag-ms", type=float, help="fail when the backend p99 event-loop lag exceeds this")
+    parser.add_argument("--min-throughput", type=float, help="fail when requests/s falls below this")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    parser.add_argument("--verbose", action="store_true", help="show backend errors on stderr")
+    parser.add_argument("--backend-log", help="write the backend's stdout (its JSON logs) to this file")
+    parser.add_argument("--serve-backend", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve_backend:
+        serve_backend(args.serve_backend)
+        return
+
+    report = asyncio.run(main_async(args))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_table(report)
+
+    overall = report["overall"]
+    backend_lag = report["event_loop_lag_ms"]["backend"] or {}
+    failures = []
+    if args.max_p95_ms is not None and overall["p95_ms"] > args.max_p95_ms:
+        failures.append(f"p95 {overall['p95_ms']:.1f} ms > {args.max_p95_ms} ms")
+    if args.max_error_rate is not None and overall["error_rate"] > args.max_error_rate:
+        failures.append(f"error rate {overall['error_rate']:.2%} > {args.max_error_rate:.2%}")
+    if args.max_loop_lag_ms is not None and backend_lag.get("p99", 0.0) > args.max_loop_lag_ms:
+        failures.append(f"backend loop lag p99 {backend_lag['p99']:.2f} ms > {args.max_loop_lag_ms} ms")
+    if args.min_throughput is not None and overall["throughput_rps"] < args.min_throughput:
+        failures.append(f"throughput {overall['throughput_rps']:.1f} req/s < {args.min_throughput}")
+    if failures:
+        print("FAILED: " + "; ".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Booking click latency: the previous book_flight (a new requests connection per leg, legs one
+after the other) vs. BookingClient (pooled connection, legs resolved concurrently) vs.
+BookingClient with the option pre-resolved when the booking view opened.
+
+Run with: python -m benchmarks.booking_redirects [--clicks 30] [--think-ms 1000]
+                                                 [--latency booking=lognormal:300,0.3]
+
+The stand-in (benchmarks.standin) is started on a free port and serves /travel/clk/f with the
+given latency. Each click resolves one option: a "together" ticket (one leg) or separate
+tickets (departing and returning legs). In the prefetch setup the view opens, prefetch() starts,
+and the user clicks --think-ms later; a click before the resolution finishes waits for the
+running one. The stand-in speaks plain HTTP, so the TLS handshake the old path paid per click
+against google.com is not part of these numbers; only connection setup and the legs'
+serialisation are.
+"""
+import sys
+import time
+import asyncio
+import argparse
+import subprocess
+from typing import List
+import requests
+from benchmarks.backend_load import free_port, percentile, wait_ready
+from frontend.utils import extract_redirect_url
+from frontend.components.booking_client import BookingClient, BROWSER_HEADERS
+
+
+def legacy_book(url: str, post_data: str) -> bool:
+    """ book_flight as it was: requests.post with no session, so no pooling and no retries """
+
+    response = requests.post(url, data={"u": post_data}, headers=BROWSER_HEADERS, timeout=10)
+    return response.status_code == 200 and extract_redirect_url(response.text) is not None
+
+
+async def run_legacy(url: str, legs: int, clicks: int) -> List[float]:
+    samples = []
+    for click in range(clicks):
+        started = time.perf_counter()
+        # Gradio ran the sync handler on a worker thread
+        ok = await asyncio.to_thread(lambda: all(legacy_book(url, f"leg{leg}-{click}") for leg in range(legs)))
+        assert ok, "legacy booking failed"
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+async def run_pooled(client: BookingClient, legs: int, clicks: int) -> List[float]:
+    samples = []
+    for click in range(clicks):
+        started = time.perf_counter()
+        results = await client.book_all([(f"leg{leg}-{click}", "") for leg in range(legs)])
+        assert all(result["success"] for result in results), "pooled booking failed"
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+async def run_prefetched(client: BookingClient, legs: int, clicks: int, think_ms: float) -> List[float]:
+    samples = []
+    for click in range(clicks):
+        pending = [(f"prefetched-leg{leg}-{click}", "") for leg in range(legs)]
+        client.prefetch([post_data for post_data, _ in pending])
+        await asyncio.sleep(think_ms / 1000)
+        started = time.perf_counter()
+        results = await client.book_all(pending)
+        assert all(result["success"] for result in results), "prefetched booking failed"
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+async def main_async(args) -> None:
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    cmd = [sys.executable, "-m", "benchmarks.standin", "--port", str(port)]
+    for spec in args.latency:
+        cmd += ["--latency", spec]
+    standin = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        await wait_ready(f"{base_url}/standin/stats")
+        client = BookingClient(base_url=base_url)
+        print(f"{args.clicks} clicks per row, stand-in latency {', '.join(args.latency)}, think-time {args.think_ms:.0f} ms")
+        print(f"{'ticket':<18}{'setup':<26}{'p50 ms':>10}{'p95 ms':>10}")
+        for ticket, legs in (("together", 1), ("separate tickets", 2)):
+            for setup, samples in (
+                ("book_flight", await run_legacy(f"{base_url}/travel/clk/f", legs, args.clicks)),
+                ("BookingClient", await run_pooled(client, legs, args.clicks)),
+                ("BookingClient + prefetch", await run_prefetched(client, legs, args.clicks, args.think_ms)),
+            ):
+                print(f"{ticket:<18}{setup:<26}{percentile(samples, 50):>10.1f}{percentile(samples, 95):>10.1f}")
+    finally:
+        standin.terminate()
+        standin.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clicks", type=int, default=30, help="booking clicks per setup")
+    parser.add_argument("--think-ms", type=float, default=1000.0, help="time between the booking view opening and the click")
+    parser.add_argument("--latency", action="append", help="stand-in latency spec, e.g. booking=lognormal:300,0.3")
+    args = parser.parse_args()
+    args.latency = args.latency or ["booking=lognormal:300,0.3"]
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Offline stand-ins for the LLM and the agent tools, shared by the benchmarks.
+
+ScriptedChatModel replays a fixed conversation: the n-th model call of a thread returns the
+n-th scripted response, so every simulated user follows the same path through the graph.
+The stub tools answer from the fixtures in flight_responses/ instead of the FastAPI backend.
+"""
+import os
+import json
+import time
+import uuid
+import contextvars
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.tools import StructuredTool
+
+# The agent module builds a Gemini client at import time, which needs a key even when unused
+os.environ.setdefault("google_api_key", "offline-benchmark")
+
+from shared_utils.load_data import load_json_data
+from backend.utils import merge_flights_fields
+from backend.tools.result_store import result_store
+from backend.tools.flights import FlightsInputSchema, build_flight_digest, get_flights
+from backend.tools.airports import get_airport
+
+AIRPORT_FIXTURES = {"ahmedabad": "airport_ahmedabad.json", "london": "airport_london.json"}
+FLIGHTS_FIXTURE = "one_way_flights.json"
+
+# Per-turn timing accumulator, set by the benchmark driver for each process_message call
+turn_timings: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar("turn_timings", default=None)
+
+
+def record_timing(bucket: str, seconds: float) -> None:
+    """ Add time to the current turn's bucket (no-op outside a measured turn) """
+
+    timings = turn_timings.get()
+    if timings is not None:
+        timings[bucket] = timings.get(bucket, 0.0) + seconds
+
+
+def scripted_conversation(outbound_date: Optional[str] = None) -> List[tuple]:
+    """ (user message, model responses for that turn) for a typical three-turn booking conversation """
+
+    outbound_date = outbound_date or (date.today() + timedelta(days=30)).isoformat()
+    params = {"departure_id": "AMD", "arrival_id": "LHR", "outbound_date": outbound_date, "adults": 1, "children": 0}
+    return [
+        ("I want to fly from Ahmedabad to London", [
+            {"tool_calls": [{"name": "get_airport", "args": {"location": "Ahmedabad"}}]},
+            {"tool_calls": [{"name": "get_airport", "args": {"location": "London"}}]},
+            {"content": "The nearest airports are AMD for Ahmedabad and LHR, LGW or STN for London. Which would you like?"},
+        ]),
+        (f"AMD to LHR on {outbound_date}, 1 adult", [
+            {"content": f"To confirm: AMD to LHR on {outbound_date} for 1 adult. Shall I search?"},
+        ]),
+        ("Yes please", [
+            {"tool_calls": [{"name": "get_flights", "args": {"params": params}}]},
+            {"content": "Here are the best options I found."},
+        ]),
+    ]
+
+
+class ScriptedChatModel(BaseChatModel):
+    """ Chat model that answers with the n-th scripted response, n being the number of AI messages so far """
+
+    responses: List[Dict[str, Any]]
+    model: str = "scripted"
+    latency: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        started = time.perf_counter()
+        if self.latency:
+            time.sleep(self.latency)
+        turn = sum(1 for message in messages if isinstance(message, AIMessage))
+        response = self.responses[min(turn, len(self.responses) - 1)]
+        message = AIMessage(
+            content=response.get("content", ""),
+            tool_calls=[{**call, "id": str(uuid.uuid4())} for call in response.get("tool_calls", [])],
+        )
+        record_timing("llm", time.perf_counter() - started)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def build_stub_tools(tool_latency: float = 0.0) -> List[StructuredTool]:
+    """ get_airport/get_flights replacements that replay flight_responses/ fixtures """
+
+    import asyncio
+
+    airports = {location: load_json_data(filename)["data"] for location, filename in AIRPORT_FIXTURES.items()}
+    listing = merge_flights_fields(load_json_data(FLIGHTS_FIXTURE))
+
+    async def stub_get_airport(location: str):
+        started = time.perf_counter()
+        if tool_latency:
+            await asyncio.sleep(tool_latency)
+        data = airports.get(location.strip().lower(), [])
+        record_timing("tools", time.perf_counter() - started)
+        encode_started = time.perf_counter()
+        encoded = json.dumps(data, ensure_ascii=False)
+        record_timing("json", time.perf_counter() - encode_started)
+        return encoded
+
+    async def stub_get_flights(params):
+        started = time.perf_counter()
+        if tool_latency:
+            await asyncio.sleep(tool_latency)
+        digest = build_flight_digest(listing, result_store.put(listing))
+        record_timing("tools", time.perf_counter() - started)
+        encode_started = time.perf_counter()
+        encoded = json.dumps(digest, ensure_ascii=False)
+        record_timing("json", time.perf_counter() - encode_started)
+        return encoded
+
+    return [
+        StructuredTool.from_function(coroutine=stub_get_airport, name="get_airport", description=get_airport.description),
+        StructuredTool.from_function(
+            coroutine=stub_get_flights, name="get_flights", description=get_flights.description, args_schema=FlightsInputSchema
+        ),
+    ]
@@ -0,0 +1,54 @@
+"""
+Token-count benchmark: full SerpAPI flight listings vs. the compact digest handed to the LLM.
+
+Run with: python -m benchmarks.flight_digest_tokens [--top-n 5]
+
+Token counts are estimated at ~4 characters per token on the serialized JSON, which is
+close enough to Gemini's tokenizer to compare the two payloads.
+"""
+import os
+import json
+import argparse
+from shared_utils.load_data import FLIGHT_RESPONSES_DIR, load_json_data
+from backend.utils import merge_flights_fields
+from backend.tools.flights import build_flight_digest, FLIGHT_DIGEST_TOP_N
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(payload) -> int:
+    """ Estimate the prompt tokens of a payload serialized the way ToolNode does. """
+    return len(json.dumps(payload, ensure_ascii=False)) // CHARS_PER_TOKEN
+
+
+def listing_fixtures():
+    """ Yield (filename, merged listing) for every flight listing fixture. """
+    for filename in sorted(os.listdir(FLIGHT_RESPONSES_DIR)):
+        if not filename.endswith(".json"):
+            continue
+        data = load_json_data(filename)
+        if not any(key in data for key in ("flights", "best_flights", "other_flights")):
+            continue
+        yield filename, merge_flights_fields(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top-n", type=int, default=FLIGHT_DIGEST_TOP_N, help="number of options kept in the digest")
+    args = parser.parse_args()
+
+    rows = []
+    for filename, data in listing_fixtures():
+        digest = build_flight_digest(data, handle="0" * 32, top_n=args.top_n)
+        rows.append((filename, len(data.get("flights", [])), estimate_tokens(data), estimate_tokens(digest)))
+
+    print(f"{'fixture':<36}{'flights':>8}{'full':>10}{'digest':>10}{'saved':>8}")
+    for filename, count, full, digest in rows:
+        print(f"{filename:<36}{count:>8}{full:>10}{digest:>10}{1 - digest / full:>8.0%}")
+    total_full = sum(r[2] for r in rows)
+    total_digest = sum(r[3] for r in rows)
+    print(f"{'total':<36}{'':>8}{total_full:>10}{total_digest:>10}{1 - total_digest / total_full:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
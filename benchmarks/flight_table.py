@@ -0,0 +1,160 @@
+"""
+Sort, filter and top-k over a large flight listing: walking the nested SerpAPI dicts vs. the
+columnar FlightTable.
+
+Run with: python -m benchmarks.flight_table [--rows 10000] [--repeat 20]
+
+The listing is the options of one_way_flights.json, round_go_flights.json and
+round_return_flights.json repeated to --rows, with prices, durations and emissions jittered so
+the sorts have work to do. The dict path is what the UI and the agent did per request (sorted()
+with key functions digging into each flight, list comprehensions for filters, heapq for top-k);
+the table path pays for ingestion once per listing and then works on the columns. Times are
+the median of --repeat runs.
+
+The "best value" ranking (shared_utils.flight_ranking) has no dict counterpart: a pairwise
+Pareto check in Python is quadratic. It is checked against that brute force on the first
+--check-rows options, then timed on the whole listing.
+"""
+import heapq
+import random
+import argparse
+import statistics
+import time
+from typing import Callable, Dict, List
+import numpy as np
+from shared_utils.load_data import load_json_data
+from shared_utils.flight_table import FlightTable
+from shared_utils.flight_ranking import objective_matrix, weighted_scores, best_value_order
+from backend.utils import merge_flights_fields
+
+FIXTURES = ["one_way_flights.json", "round_go_flights.json", "round_return_flights.json"]
+AIRLINES = ["Air India", "British Airways", "Lufthansa", "Emirates", "IndiGo"]
+
+
+def listing(rows: int) -> Dict:
+    flights = [flight for name in FIXTURES for flight in merge_flights_fields(load_json_data(name)).get("flights", [])]
+    rng = random.Random(7)
+    scaled = []
+    for i in range(rows):
+        flight = flights[i % len(flights)]
+        scaled.append({
+            **flight,
+            "price": int(flight["price"] * rng.uniform(0.7, 1.3)) if flight.get("price") else None,
+            "total_duration": int(flight["total_duration"] * rng.uniform(0.8, 1.2)),
+            "carbon_emissions": {**flight.get("carbon_emissions", {}), "this_flight": rng.randint(500, 5000) * 1000},
+        })
+    return {"flights": scaled}
+
+
+def median_ms(fn: Callable, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times)
+
+
+def missing_last(value):
+    return (value is None, value if value is not None else 0)
+
+
+def dict_departure(flight: Dict):
+    legs = flight.get("flights", [])
+    return legs[0].get("departure_airport", {}).get("time") if legs else None
+
+
+def dict_filter(flights: List[Dict]) -> List[int]:
+    """ At most one stop, only the AIRLINES, departing 12:00-24:00, layovers up to 5 hours """
+
+    allowed = set(AIRLINES)
+    kept = []
+    for idx, flight in enumerate(flights):
+        legs = flight.get("flights", [])
+        departure = dict_departure(flight)
+        if len(legs) - 1 > 1:
+            continue
+        if not {leg.get("airline") for leg in legs} <= allowed:
+            continue
+        if not departure or not 12 <= int(departure[11:13]) < 24:
+            continue
+        if max((layover.get("duration") or 0 for layover in flight.get("layovers", [])), default=0) > 300:
+            continue
+        kept.append(idx)
+    return kept
+
+
+def brute_force_best_value(table: FlightTable) -> List[int]:
+    """ Pareto front by comparing every pair, then each group by weighted score """
+
+    scaled = objective_matrix(table).tolist()
+    scores = weighted_scores(objective_matrix(table)).tolist()
+    dominated = [
+        any(all(o <= m for o, m in zip(other, mine)) and any(o < m for o, m in zip(other, mine)) for other in scaled)
+        for mine in scaled
+    ]
+    return sorted(range(len(scaled)), key=lambda i: (dominated[i], scores[i], i))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000, help="flight options in the listing")
+    parser.add_argument("--repeat", type=int, default=20, help="runs per operation")
+    parser.add_argument("--check-rows", type=int, default=500, help="options the best-value ranking is checked on by brute force")
+    args = parser.parse_args()
+
+    data = listing(args.rows)
+    flights = data["flights"]
+    table = FlightTable.from_listing(data)
+    all_rows = range(len(flights))
+
+    def table_filter():
+        keep = table.mask(stops=[0, 1], airlines=AIRLINES, departure_windows=[(12, 24)], max_layover=300)
+        return np.flatnonzero(keep)
+
+    checks = {
+        "sort by price": (
+            lambda: sorted(all_rows, key=lambda i: missing_last(flights[i].get("price"))),
+            lambda: table.argsort("price"),
+        ),
+        "sort by departure time": (
+            lambda: sorted(all_rows, key=lambda i: missing_last(dict_departure(flights[i]))),
+            lambda: table.argsort("departure"),
+        ),
+        "sort by CO2": (
+            lambda: sorted(all_rows, key=lambda i: missing_last(flights[i].get("carbon_emissions", {}).get("this_flight"))),
+            lambda: table.argsort("carbon_emissions"),
+        ),
+        "filter (4 conditions)": (
+            lambda: dict_filter(flights),
+            table_filter,
+        ),
+        "filter + sort by price": (
+            lambda: sorted(dict_filter(flights), key=lambda i: missing_last(flights[i].get("price"))),
+            lambda: table.argsort("price", rows=table_filter()),
+        ),
+        "top 5 by duration": (
+            lambda: heapq.nsmallest(5, all_rows, key=lambda i: missing_last(flights[i].get("total_duration"))),
+            lambda: table.top_k("total_duration", 5),
+        ),
+    }
+
+    # Both paths must agree before their timings mean anything
+    for name, (dict_path, table_path) in checks.items():
+        assert list(dict_path()) == list(table_path()), f"{name}: dict and table results differ"
+    sample = FlightTable.from_listing({"flights": flights[:args.check_rows]})
+    assert best_value_order(sample).tolist() == brute_force_best_value(sample), "best value: ranking and brute force differ"
+
+    print(f"{len(flights)} flight options, median of {args.repeat} runs")
+    print(f"{'operation':<26}{'dicts (ms)':>12}{'table (ms)':>12}{'speedup':>10}")
+    ingest = median_ms(lambda: FlightTable.from_listing(data), args.repeat)
+    print(f"{'ingest (once per listing)':<26}{'-':>12}{ingest:>12.2f}{'':>10}")
+    for name, (dict_path, table_path) in checks.items():
+        old, new = median_ms(dict_path, args.repeat), median_ms(table_path, args.repeat)
+        print(f"{name:<26}{old:>12.2f}{new:>12.3f}{old / new:>9.0f}x")
+    ranking = median_ms(lambda: best_value_order(table), args.repeat)
+    print(f"{'best value ranking':<26}{'-':>12}{ranking:>12.2f}{'':>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Cost of a request's log calls on the calling thread: the previous synchronous JSON logger with
+eager f-string/json.dumps(indent=2) formatting vs. the queue-based logger with lazy formatting.
+
+Run with: python -m benchmarks.logging_overhead [--calls 20000] [--output /tmp/bench.log]
+
+Records are written to --output (default: a temporary file) so the I/O is real but does not
+flood the terminal. The figure that matters for the backend is the time the event loop thread
+spends per request; with the queue handler the formatting and the write happen on the
+listener thread.
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+from shared_utils import logger as log_module
+
+PARAMS = {
+    "departure_id": "AMD", "arrival_id": "LHR", "outbound_date": "2026-11-20", "return_date": "2026-11-27",
+    "adults": 2, "children": 1, "departure_token": "W1siQU1EIiwiMjAyNi0xMS0yMCIsIkxIUiIsbnVsbCwiQUkiLCIxNzEiXV0=" * 4,
+}
+
+
+def synchronous_logger(stream) -> logging.Logger:
+    """ The logger as it was: StreamHandler writing JSON in the calling thread, DEBUG level """
+
+    logger = logging.getLogger("bench_sync")
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(log_module.JSONFormatter())
+    logger.handlers = [handler]
+    return logger
+
+
+def old_request(logger, params) -> None:
+    logger.info("Fetching outbound flights")
+    logger.info(f"params: {json.dumps(params, indent=2)}")
+
+
+def new_request(logger, params) -> None:
+    logger.info("Fetching outbound flights")
+    logger.debug("params: %s", params)
+
+
+def measure(fn, logger, calls: int) -> float:
+    started = time.perf_counter()
+    for _ in range(calls):
+        fn(logger, PARAMS)
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--output", help="file the log records are written to")
+    args = parser.parse_args()
+
+    output = args.output or os.path.join(tempfile.mkdtemp(), "bench.log")
+    with open(output, "w") as stream:
+        old_us = measure(old_request, synchronous_logger(stream), args.calls)
+
+    # Route the shared queue listener's stdout handler into the same file; an unbounded queue
+    # keeps this burst from dropping records, which would flatter the figures
+    sys.stdout = open(output, "a")
+    log_module.LOG_QUEUE_SIZE = 0
+    try:
+        rows = []
+        for level in ("INFO", "DEBUG"):
+            logger = log_module.get_logger("bench_queue", level=level)
+            started = time.perf_counter()
+            per_call = measure(new_request, logger, args.calls)
+            # Draining shows the writer keeps up; the next level starts a fresh listener
+            log_module.shutdown_logging()
+            rows.append((level, per_call, (time.perf_counter() - started) / args.calls * 1e6))
+    finally:
+        sys.stdout.close()
+        sys.stdout = sys.__stdout__
+
+    print(f"per request ({args.calls} requests)                    calling thread   incl. background write")
+    print(f"  sync handler, eager f-string + json.dumps(indent=2)   {old_us:7.1f} us       {old_us:7.1f} us")
+    for level, per_call, total in rows:
+        print(f"  queue handler, lazy %s args, LOG_LEVEL={level:<5}        {per_call:7.1f} us       {total:7.1f} us  ({old_us / per_call:.1f}x on the caller)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+Fast-path slot parser benchmark: hit rate, accuracy and per-turn parse latency on sample utterances.
+
+Run with: python -m benchmarks.slot_parser [--repeat 200] [--llm-latency-ms 1200] [--tool-latency-ms 2500]
+
+A "hit" is an utterance the parser marks complete, i.e. one that skips the LLM clarification
+round trips. Hits are checked against the expected slots; utterances expected to fall back to
+the LLM (expected=None) count as false hits if the parser accepts them. The corpus includes
+adversarial inputs that name a full route without asking for a new search.
+
+Turn latency is measured end to end through TravelAgent.process_message with the scripted LLM
+and stub tools of benchmarks.agent_turns, their latencies set by --llm-latency-ms and
+--tool-latency-ms: a fully specified request until its flights are shown. Without the fast
+path the agent restates the details and asks for confirmation, then searches once the user
+says yes (two turns, three LLM calls); with it the search and a one-call confirmation run
+concurrently in the first turn. The user's own time between turns is not counted.
+"""
+import time
+import asyncio
+import argparse
+import statistics
+from datetime import date, timedelta
+from typing import List
+from benchmarks.fakes import ScriptedChatModel, build_stub_tools
+from backend.agents.slot_parser import SlotParser
+from backend.agents.travel_agent import TravelAgent
+
+REFERENCE_DATE = date(2026, 10, 1)
+
+# (utterance, expected get_flights params or None when the LLM should handle it)
+CORPUS = [
+    ("AMD to LHR on 2026-11-20 returning 2026-11-25, 2 adults 1 child",
+     {"departure_id": "AMD", "arrival_id": "LHR", "outbound_date": "2026-11-20", "return_date": "2026-11-25", "adults": 2, "children": 1}),
+    ("DEL to BOM on 2026-10-15 for 1 adult",
+     {"departure_id": "DEL", "arrival_id": "BOM", "outbound_date": "2026-10-15", "adults": 1, "children": 0}),
+    ("Flights from BLR to SIN on 12 December for 2 adults",
+     {"departure_id": "BLR", "arrival_id": "SIN", "outbound_date": "2026-12-12", "adults": 2, "children": 0}),
+    ("I want to fly alone from Chennai to Dubai on 3rd Nov 2026",
+     {"departure_id": "MAA", "arrival_id": "DXB", "outbound_date": "2026-11-03", "adults": 1, "children": 0}),
+    ("round trip BOM -> SIN, 5 jan to 12 jan, two adults and one child",
+     {"departure_id": "BOM", "arrival_id": "SIN", "outbound_date": "2027-01-05", "return_date": "2027-01-12", "adults": 2, "children": 1}),
+    ("Book a flight from New Delhi to Heathrow on November 20th returning November 30th, 2 adults",
+     {"departure_id": "DEL", "arrival_id": "LHR", "outbound_date": "2026-11-20", "return_date": "2026-11-30", "adults": 2, "children": 0}),
+    ("JFK to CDG tomorrow just me",
+     {"departure_id": "JFK", "arrival_id": "CDG", "outbound_date": "2026-10-02", "adults": 1, "children": 0}),
+    ("from Amsterdam to Frankfurt on 2026-12-24 for 3 adults", None),  # FRA and HHN both carry the name
+    ("from Amsterdam to Heathrow on 2026-12-24 for 3 adults",
+     {"departure_id": "AMS", "arrival_id": "LHR", "outbound_date": "2026-12-24", "adults": 3, "children": 0}),
+    ("Need tickets HYD → CCU on Dec 1, 2026 for three adults",
+     {"departure_id": "HYD", "arrival_id": "CCU", "outbound_date": "2026-12-01", "adults": 3, "children": 0}),
+    ("GOI to DEL on 2026-10-20 and back on 2026-10-27 with 2 kids and 2 adults",
+     {"departure_id": "GOI", "arrival_id": "DEL", "outbound_date": "2026-10-20", "return_date": "2026-10-27", "adults": 2, "children": 2}),
+    ("Show me flights from Chennai to Singapore on 14 feb, just me",
+     {"departure_id": "MAA", "arrival_id": "SIN", "outbound_date": "2027-02-14", "adults": 1, "children": 0}),
+    # City names, resolved through flight_responses/city-airports.csv
+    ("Mumbai to Delhi on 2026-11-20 for 1 adult",
+     {"departure_id": "BOM", "arrival_id": "DEL", "outbound_date": "2026-11-20", "adults": 1, "children": 0}),
+    ("Ahmedabad to Heathrow on 2026-12-05, 2 adults",
+     {"departure_id": "AMD", "arrival_id": "LHR", "outbound_date": "2026-12-05", "adults": 2, "children": 0}),
+    ("Bengaluru to Kolkata on 2 Nov, just me",
+     {"departure_id": "BLR", "arrival_id": "CCU", "outbound_date": "2026-11-02", "adults": 1, "children": 0}),
+    ("Hyderabad to Kochi on 2026-11-15 for two adults and one child",
+     {"departure_id": "HYD", "arrival_id": "COK", "outbound_date": "2026-11-15", "adults": 2, "children": 1}),
+    ("Flights from Pune to Doha on 2026-12-10 for 1 adult",
+     {"departure_id": "PNQ", "arrival_id": "DOH", "outbound_date": "2026-12-10", "adults": 1, "children": 0}),
+    ("Colombo to Chennai on 2026-11-05 solo",
+     {"departure_id": "CMB", "arrival_id": "MAA", "outbound_date": "2026-11-05", "adults": 1, "children": 0}),
+    ("Mumbai to London on 2026-11-20 for 1 adult", None),  # six London airports
+    ("Delhi to Bangkok on 2026-11-20 for 1 adult", None),  # BKK and DMK
+    ("hi", None),
+    ("Hello, I need help planning a trip", None),
+    ("I want to go to London", None),
+    ("London to Paris next week", None),
+    ("from Mumbai to Tokyo on 2026-11-10", None),
+    ("AMD to LHR", None),
+    ("AMD to LHR on 2026-11-20 round trip", None),
+    ("DEL to BOM on 2025-01-01", None),
+    ("AMD to LHR on 2026-11-20 with 1 infant", None),
+    ("Option 2 please", None),
+    ("yes, go ahead", None),
+    ("What is the cheapest date to fly to Goa?", None),
+    ("Paris to Toronto on 2026-12-01", None),
+    # Full routes that are not new searches: comparisons, cancellations, corrections, second routes
+    ("Is BOM to DEL on 2026-11-20 cheaper than BOM to GOI?", None),
+    ("cancel my BOM to DEL flight on 2026-11-20", None),
+    ("BOM to DEL on 2026-11-20, actually make it GOI", None),
+    ("BOM to DEL on 2026-11-20 instead of GOI", None),
+    ("change my AMD to LHR flight on 2026-11-20 to 2 adults", None),
+    ("AMD to LHR or AMD to LGW on 2026-11-20", None),
+    ("compare DEL to BOM on 2026-10-15 with the train", None),
+    ("DEL to BOM on 2026-10-15, then BOM to GOI", None),
+    ("Chennai to Dubai on 3rd Nov 2026, Chennai to Singapore on 5th Nov 2026", None),
+    ("AMD to LHR on 2026-11-20 for 100 adults", None),
+    # Party not stated, or not understood: the LLM asks
+    ("DEL to BOM on 2026-10-15", None),
+    ("Flights from AMD to LHR on 2026-11-20", None),
+    ("AMD to LHR on 2026-11-20 for my family of 4", None),
+    ("AMD to LHR on 2026-11-20 for 3 adults and 2 seniors", None),
+    ("We want to fly DEL to BOM on 2026-10-15", None),
+    ("BOM to GOI on 2026-11-20 for a group of 5", None),
+    ("JFK to CDG tomorrow with the kids", None),
+    ("JFK to CDG tomorrow for 6 adults and 4 children", None),
+]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def turns_until_flights(fast_path: bool, llm_latency: float, tool_latency: float, run: int) -> List[float]:
+    """ Milliseconds each turn took, from a fully specified request until its flights are returned """
+
+    outbound_date = (date.today() + timedelta(days=30)).isoformat()
+    params = {"departure_id": "AMD", "arrival_id": "LHR", "outbound_date": outbound_date, "adults": 1, "children": 0}
+    responses = [
+        {"content": f"To confirm: AMD to LHR on {outbound_date} for 1 adult. Shall I search?"},
+        {"tool_calls": [{"name": "get_flights", "args": {"params": params}}]},
+        {"content": "Here are the best options I found."},
+    ]
+    agent = TravelAgent(llm=ScriptedChatModel(responses=responses, latency=llm_latency), tools=build_stub_tools(tool_latency))
+    if not fast_path:
+        agent.slot_parser = None
+    history, durations = [], []
+    for message in (f"AMD to LHR on {outbound_date} for 1 adult", "Yes please"):
+        started = time.perf_counter()
+        history, flight_data, _ = await agent.process_message(message, history, f"turns-{fast_path}-{run}")
+        durations.append((time.perf_counter() - started) * 1000)
+        if flight_data.get("flights"):
+            return durations
+    raise AssertionError("the scripted conversation never returned flights")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200, help="parses per utterance for the latency figures")
+    parser.add_argument("--llm-latency-ms", type=float, default=1200.0, help="simulated model latency per call")
+    parser.add_argument("--tool-latency-ms", type=float, default=2500.0, help="simulated flight search latency")
+    parser.add_argument("--turn-runs", type=int, default=3, help="conversations per setup for the turn latency")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    slot_parser = SlotParser()
+    build_ms = (time.perf_counter() - started) * 1000
+
+    hits = correct = false_hits = missed = 0
+    latencies = []
+    expected_hits = sum(1 for _, expected in CORPUS if expected)
+    for utterance, expected in CORPUS:
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            parsed = slot_parser.parse(utterance, today=REFERENCE_DATE)
+            latencies.append((time.perf_counter() - started) * 1e6)
+        if parsed.complete:
+            hits += 1
+            if expected is None:
+                false_hits += 1
+                print(f"FALSE HIT  {utterance!r} -> {parsed.to_params()}")
+            elif parsed.to_params() == expected:
+                correct += 1
+            else:
+                print(f"WRONG      {utterance!r} -> {parsed.to_params()}")
+        elif expected is not None:
+            missed += 1
+            print(f"MISSED     {utterance!r} ({', '.join(parsed.issues) or 'incomplete'})")
+
+    print()
+    print(f"utterances           {len(CORPUS)}")
+    print(f"fast-path hit rate   {hits / len(CORPUS):.0%} ({hits}/{len(CORPUS)})")
+    print(f"recall on searchable {correct / expected_hits:.0%} ({correct}/{expected_hits})")
+    print(f"false hits           {false_hits}")
+    print(f"index build          {build_ms:.1f} ms")
+    print(f"parse latency        p50 {percentile(latencies, 50):.0f} us, p95 {percentile(latencies, 95):.0f} us, "
+          f"mean {statistics.fmean(latencies):.0f} us")
+
+
+    print()
+    print(f"until flights shown (LLM {args.llm_latency_ms:.0f} ms/call, search {args.tool_latency_ms:.0f} ms, mean of {args.turn_runs} runs)")
+    for setup, fast_path in (("without fast path", False), ("with fast path", True)):
+        runs = [asyncio.run(turns_until_flights(fast_path, args.llm_latency_ms / 1000, args.tool_latency_ms / 1000, run))
+                for run in range(args.turn_runs)]
+        per_turn = "  ".join(f"turn {index + 1} {statistics.fmean(run[index] for run in runs):.0f} ms" for index in range(len(runs[0])))
+        print(f"  {setup:<20} {len(runs[0])} turn(s), {statistics.fmean(sum(run) for run in runs):>6.0f} ms   ({per_turn})")
+
+
+if __name__ == "__main__":
+    main()
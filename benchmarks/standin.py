@@ -0,0 +1,403 @@
+"""
+Local stand-in for the upstream APIs used by the app: SerpAPI Google Flights, Amadeus
+(OAuth + nearby airports), the Google Geocoding API, Google's booking redirect
+(/travel/clk/f, used by the frontend) and AssemblyAI's streaming transcription websocket
+(/v3/ws, used by backend.transcript).
+
+Run with: python -m benchmarks.standin [--port 8900] [--latency serpapi=lognormal:800,0.4]
+                                       [--error-rate 0.01] [--rate-limit 20] [--record]
+
+Then point the backend at it:
+    SERPAPI_BASE_URL=http://localhost:8900 AMADEUS_BASE_URL=http://localhost:8900 \
+    GOOGLE_GEOCODING_BASE_URL=http://localhost:8900 python -m backend.main
+and the frontend's booking links with GOOGLE_TRAVEL_BASE_URL=http://localhost:8900 and voice
+input with ASSEMBLYAI_STREAMING_URL=ws://localhost:8900/v3/ws.
+
+Replay mode serves the fixtures in flight_responses/ (preferring responses captured by record
+mode for the exact same request). Record mode forwards every request to the real upstream and
+stores the response in flight_responses/ as recorded_<provider>_<hash>.json (booking redirect
+pages are passed through, not recorded).
+
+Latency specs (milliseconds): fixed:50, uniform:20,200, normal:300,80, lognormal:300,0.5
+(median, sigma). They can be set per provider (serpapi, amadeus, geocoding, booking, assemblyai)
+or as default; for assemblyai it is the time between Terminate and the final turn.
+The transcription stand-in ignores the audio's content: it sends a partial Turn every
+TRANSCRIPT_PARTIAL_SECONDS of audio received and ends a turn every TRANSCRIPT_TURN_SECONDS,
+with words from TRANSCRIPT_WORDS.
+Latency, error rate and rate limit can also be changed at runtime with POST /standin/config.
+"""
+import os
+import json
+import time
+import uuid
+import random
+import asyncio
+import hashlib
+import argparse
+import threading
+from copy import deepcopy
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qsl
+import httpx
+from fastapi import FastAPI, Request, WebSocket
+from fastapi.responses import HTMLResponse, JSONResponse, Response
+from pydantic import BaseModel, Field
+from shared_utils.load_data import FLIGHT_RESPONSES_DIR, load_json_data, load_airports
+
+PROVIDERS = ("serpapi", "amadeus", "geocoding", "booking", "assemblyai")
+REAL_UPSTREAMS = {
+    "serpapi": "https://serpapi.com",
+    "amadeus": "https://test.api.amadeus.com",
+    "geocoding": "https://maps.googleapis.com",
+    "booking": "https://www.google.com",
+}
+AIRPORT_FIXTURES = ["airport_ahmedabad.json", "airport_london.json", "releavant_airport.json"]
+TRANSCRIPT_WORDS = "i would like to fly from london to paris on the first of december for two adults".split()
+TRANSCRIPT_WORDS_PER_SECOND = 2.5
+TRANSCRIPT_PARTIAL_SECONDS = 0.5
+TRANSCRIPT_TURN_SECONDS = 3.0
+# Query parameters that identify the caller rather than the request
+SECRET_PARAMS = {"api_key", "key", "client_id", "client_secret"}
+
+
+def parse_latency(spec: str) -> Callable[[], float]:
+    """ Turn a latency spec like 'lognormal:300,0.5' into a sampler returning seconds """
+
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v] if args else []
+    if kind == "fixed":
+        return lambda: values[0] / 1000
+    if kind == "uniform":
+        return lambda: random.uniform(values[0], values[1]) / 1000
+    if kind == "normal":
+        return lambda: max(random.gauss(values[0], values[1]), 0.0) / 1000
+    if kind == "lognormal":
+        median, sigma = values
+        return lambda: random.lognormvariate(0.0, sigma) * median / 1000
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+class StandinConfig(BaseModel):
+    latency: Dict[str, str] = Field(description="Latency spec per provider, 'default' applies to the rest", default={"default": "fixed:0"})
+    error_rate: float = Field(description="Share of requests answered with a provider-style 5xx error", default=0.0)
+    rate_limit: Optional[float] = Field(description="Requests per second per provider before 429s are returned", default=None)
+    record: bool = Field(description="Forward requests to the real upstreams and save the responses", default=False)
+    upstreams: Dict[str, str] = Field(description="Upstream base URLs used in record mode", default=REAL_UPSTREAMS)
+
+
+class TokenBucket:
+    """ Per-provider token bucket used to emulate upstream rate limits """
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+ERROR_RESPONSES = {
+    "serpapi": (500, {"error": "Google Flights hasn't returned any results for this query due to an internal error."}),
+    "amadeus": (500, {"errors": [{"status": 500, "code": 141, "title": "SYSTEM ERROR HAS OCCURRED"}]}),
+    "geocoding": (200, {"results": [], "status": "UNKNOWN_ERROR"}),
+    "booking": (502, {"error": "Bad Gateway"}),
+}
+RATE_LIMIT_RESPONSES = {
+    "serpapi": (429, {"error": "Your account has exceeded its hourly throughput limit."}),
+    "amadeus": (429, {"errors": [{"status": 429, "code": 38194, "title": "Too many requests"}]}),
+    "geocoding": (200, {"results": [], "status": "OVER_QUERY_LIMIT"}),
+    "booking": (429, {"error": "Too Many Requests"}),
+}
+
+
+def request_key(provider: str, path: str, params: Dict[str, str]) -> str:
+    """ Stable id of a request, ignoring credentials """
+
+    relevant = sorted((k, v) for k, v in params.items() if k not in SECRET_PARAMS)
+    return hashlib.sha1(json.dumps([provider, path, relevant]).encode()).hexdigest()[:16]
+
+
+@lru_cache(maxsize=1024)
+def geocode_address(wanted: str) -> Tuple[float, float]:
+    """ Coordinates of the first airport whose region or name matches the address """
+
+    for row in load_airports():
+        if row["icao"] and (row["region_name"].lower() in wanted or wanted in row["airport"].lower()):
+            return float(row["latitude"]), float(row["longitude"])
+    # Unknown places still geocode, deterministically, so load tests never hit ZERO_RESULTS
+    digest = int(hashlib.sha1(wanted.encode()).hexdigest(), 16)
+    return (digest % 12000) / 100 - 60, (digest // 12000 % 36000) / 100 - 180
+
+
+def create_standin_app(config: Optional[StandinConfig] = None) -> FastAPI:
+    """ Build the stand-in ASGI app """
+
+    app = FastAPI(title="Upstream stand-in")
+    app.state.config = config or StandinConfig()
+    app.state.stats = {provider: {} for provider in PROVIDERS}
+    app.state.buckets = {}
+    fixtures: Dict[str, dict] = {}
+
+    def fixture(filename: str) -> dict:
+        if filename not in fixtures:
+            fixtures[filename] = load_json_data(filename)
+        return fixtures[filename]
+
+    def sample_latency(provider: str) -> float:
+        specs = app.state.config.latency
+        return parse_latency(specs.get(provider, specs.get("default", "fixed:0")))()
+
+    def count(provider: str, status: int) -> None:
+        stats = app.state.stats[provider]
+        stats[status] = stats.get(status, 0) + 1
+
+    async def emulate(provider: str, request: Request, replay: Callable[[], Response], body: bytes = b"") -> Response:
+        """ Apply latency, rate limit and error injection, then record or replay the response; `body` is forwarded when recording """
+
+        config: StandinConfig = app.state.config
+        await asyncio.sleep(sample_latency(provider))
+
+        if config.rate_limit:
+            bucket = app.state.buckets.get(provider)
+            if bucket is None or bucket.rate != config.rate_limit:
+                bucket = app.state.buckets[provider] = TokenBucket(config.rate_limit)
+            if not bucket.allow():
+                status, body = RATE_LIMIT_RESPONSES[provider]
+                count(provider, 429)
+                return JSONResponse(body, status_code=status, headers={"Retry-After": "1"})
+
+        if config.error_rate and random.random() < config.error_rate:
+            status, body = ERROR_RESPONSES[provider]
+            count(provider, 500)
+            return JSONResponse(body, status_code=status)
+
+        params = dict(request.query_params)
+        key = request_key(provider, request.url.path, params)
+        recorded_name = f"recorded_{provider}_{key}.json"
+        recorded_path = os.path.join(FLIGHT_RESPONSES_DIR, recorded_name)
+
+        if config.record:
+            response = await forward(provider, request, body)
+            if "json" not in response.headers.get("content-type", ""):
+                count(provider, response.status_code)
+                return Response(response.content, status_code=response.status_code, media_type=response.headers.get("content-type"))
+            if response.status_code == 200:
+                with open(recorded_path, "w") as file:
+                    json.dump(response.json(), file, indent=2)
+            count(provider, response.status_code)
+            return JSONResponse(response.json(), status_code=response.status_code)
+
+        if os.path.exists(recorded_path):
+            count(provider, 200)
+            return JSONResponse(fixture(recorded_name))
+        result = replay()
+        count(provider, result.status_code)
+        return result
+
+    async def forward(provider: str, request: Request, body: bytes) -> httpx.Response:
+        upstream = app.state.config.upstreams[provider]
+        headers = {k: v for k, v in request.headers.items() if k.lower() in ("authorization", "content-type")}
+        async with httpx.AsyncClient(timeout=httpx.Timeout(90.0)) as client:
+            return await client.request(
+                request.method,
+                f"{upstream}{request.url.path}",
+                params=request.query_params,
+                content=body,
+                headers=headers,
+            )
+
+    @app.get("/search.json")
+    async def serpapi_search(request: Request):
+        params = dict(request.query_params)
+
+        def replay() -> JSONResponse:
+            if not params.get("api_key"):
+                return JSONResponse({"error": "Invalid API key. Your API key should be here: https://serpapi.com/manage-api-key"}, status_code=401)
+            if params.get("engine") != "google_flights":
+                return JSONResponse({"error": "Unsupported `engine` parameter."}, status_code=400)
+            round_trip = str(params.get("type", "1")) == "1"
+            if params.get("booking_token"):
+                filename = "round_booking_options.json" if round_trip else "one_way_booking_option.json"
+            elif params.get("departure_token"):
+                filename = "round_return_flights.json"
+            else:
+                filename = "round_go_flights.json" if round_trip else "one_way_flights.json"
+            data = deepcopy(fixture(filename))
+            data["search_parameters"] = {k: v for k, v in params.items() if k not in SECRET_PARAMS}
+            return JSONResponse(data)
+
+        return await emulate("serpapi", request, replay)
+
+    @app.post("/v1/security/oauth2/token")
+    async def amadeus_token(request: Request):
+        # The body is read once: parsed here and forwarded as is when recording
+        body = await request.body()
+        form = dict(parse_qsl(body.decode()))
+
+        def replay() -> JSONResponse:
+            if form.get("grant_type") != "client_credentials" or not form.get("client_id"):
+                return JSONResponse({"error": "invalid_client", "error_description": "Client credentials are invalid"}, status_code=401)
+            return JSONResponse({
+                "type": "amadeusOAuth2Token",
+                "token_type": "Bearer",
+                "access_token": hashlib.sha1(str(time.time()).encode()).hexdigest(),
+                "expires_in": 1799,
+                "state": "approved",
+            })
+
+        return await emulate("amadeus", request, replay, body)
+
+    @app.get("/v1/reference-data/locations/airports")
+    async def amadeus_airports(request: Request, latitude: float, longitude: float):
+        def replay() -> JSONResponse:
+            if not request.headers.get("authorization", "").startswith("Bearer "):
+                return JSONResponse({"errors": [{"status": 401, "code": 38191, "title": "Invalid HTTP header"}]}, status_code=401)
+
+            # Serve the fixture whose closest airport is nearest to the requested point
+            def distance(filename):
+                geo = fixture(filename)["data"][0]["geoCode"]
+                return (geo["latitude"] - latitude) ** 2 + (geo["longitude"] - longitude) ** 2
+
+            return JSONResponse(fixture(min(AIRPORT_FIXTURES, key=distance)))
+
+        return await emulate("amadeus", request, replay)
+
+    @app.get("/maps/api/geocode/json")
+    async def geocode(request: Request, address: str, key: Optional[str] = None):
+        def replay() -> JSONResponse:
+            if not key:
+                return JSONResponse({"error_message": "You must use an API key to authenticate each request.", "results": [], "status": "REQUEST_DENIED"})
+            lat, lng = geocode_address(address.lower())
+            return JSONResponse({
+                "results": [{"formatted_address": address, "geometry": {"location": {"lat": lat, "lng": lng}}}],
+                "status": "OK",
+            })
+
+        return await emulate("geocoding", request, replay)
+
+    @app.post("/travel/clk/f")
+    async def booking_redirect(request: Request):
+        body = await request.body()
+        form = dict(parse_qsl(body.decode()))
+
+        def replay() -> Response:
+            if not form.get("u"):
+                return HTMLResponse("<html><body>Bad Request</body></html>", status_code=400)
+            # Google answers with a meta refresh to the partner's booking page
+            ref = hashlib.sha1(form["u"].encode()).hexdigest()[:16]
+            return HTMLResponse(f"<html><head><meta http-equiv=\"refresh\" content=\"0;url='https://booking.example.com/checkout?ref={ref}'\"></head></html>")
+
+        return await emulate("booking", request, replay, body)
+
+    @app.websocket("/v3/ws")
+    async def assemblyai_stream(ws: WebSocket):
+        if not ws.headers.get("authorization"):
+            count("assemblyai", 401)
+            await ws.close(code=1008, reason="Missing Authorization header")
+            return
+        await ws.accept()
+        started = time.monotonic()
+        sample_rate = int(ws.query_params.get("sample_rate", 16000))
+        format_turns = ws.query_params.get("format_turns", "").lower() == "true"
+        await ws.send_json({"type": "Begin", "id": uuid.uuid4().hex, "expires_at": int(time.time()) + 3600})
+        audio_bytes = turn_start = words_sent = turn = 0
+        partials = 0
+
+        def turn_text() -> str:
+            seconds = (audio_bytes - turn_start) / (2 * sample_rate)
+            count_words = max(1, int(seconds * TRANSCRIPT_WORDS_PER_SECOND))
+            return " ".join(TRANSCRIPT_WORDS[(words_sent + i) % len(TRANSCRIPT_WORDS)] for i in range(count_words))
+
+        async def end_turn() -> None:
+            nonlocal turn, turn_start, words_sent, partials
+            text = turn_text()
+            await ws.send_json({"type": "Turn", "turn_order": turn, "end_of_turn": True, "turn_is_formatted": False, "transcript": text})
+            if format_turns:
+                await ws.send_json({"type": "Turn", "turn_order": turn, "end_of_turn": True, "turn_is_formatted": True, "transcript": text.capitalize() + "."})
+            words_sent += len(text.split())
+            turn, turn_start, partials = turn + 1, audio_bytes, 0
+
+        while True:
+            message = await ws.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes") is not None:
+                audio_bytes += len(message["bytes"])
+                seconds = (audio_bytes - turn_start) / (2 * sample_rate)
+                if seconds >= TRANSCRIPT_TURN_SECONDS:
+                    await end_turn()
+                elif seconds >= (partials + 1) * TRANSCRIPT_PARTIAL_SECONDS:
+                    partials += 1
+                    await ws.send_json({"type": "Turn", "turn_order": turn, "end_of_turn": False, "turn_is_formatted": False, "transcript": turn_text()})
+            elif json.loads(message.get("text") or "{}").get("type") == "Terminate":
+                await asyncio.sleep(sample_latency("assemblyai"))
+                if audio_bytes > turn_start:
+                    await end_turn()
+                await ws.send_json({
+                    "type": "Termination",
+                    "audio_duration_seconds": round(audio_bytes / (2 * sample_rate), 2),
+                    "session_duration_seconds": round(time.monotonic() - started, 2),
+                })
+                await ws.close()
+                break
+        count("assemblyai", 200)
+
+    @app.get("/standin/config")
+    async def get_config():
+        return app.state.config
+
+    @app.post("/standin/config")
+    async def update_config(update: dict):
+        app.state.config = StandinConfig(**{**app.state.config.model_dump(), **update})
+        return app.state.config
+
+    @app.get("/standin/stats")
+    async def get_stats():
+        return app.state.stats
+
+    return app
+
+
+def parse_latency_args(values) -> Dict[str, str]:
+    latency = {"default": "fixed:0"}
+    for value in values or []:
+        provider, sep, spec = value.partition("=")
+        if not sep:
+            provider, spec = "default", value
+        parse_latency(spec)  # fail fast on a malformed spec
+        latency[provider] = spec
+    return latency
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", action="append", help="SPEC or PROVIDER=SPEC, repeatable")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, help="requests per second per provider")
+    parser.add_argument("--record", action="store_true", help="forward to the real upstreams and save responses")
+    args = parser.parse_args()
+
+    import uvicorn
+    config = StandinConfig(
+        latency=parse_latency_args(args.latency),
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        record=args.record,
+    )
+    uvicorn.run(create_standin_app(config), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
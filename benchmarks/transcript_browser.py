@@ -0,0 +1,148 @@
+"""
+File-fed harness for the browser audio path: WAV files are streamed through AudioFeed and
+TranscriberManager exactly as the Gradio microphone component's stream events push them, to the
+stand-in's /v3/ws. No audio hardware is needed.
+
+Run with: python -m benchmarks.transcript_browser [--seconds 6] [--stream-every 0.25] [--speed 1] [--early-chunks 1]
+                                                  [--wav recording.wav ...] [--latency assemblyai=fixed:300]
+
+Synthetic recordings of a 440 Hz tone are written at the rates browsers record at (16 kHz mono,
+44.1 kHz mono, 48 kHz stereo) and read back like any --wav file, which may have any rate and
+channel count. Each is cut into --stream-every second chunks and pushed at --speed times real
+time, the first --early-chunks of them before the recording is started (Gradio may handle
+stream events ahead of start_recording); the recording is then stopped. "forwarded s" is the
+16 kHz audio that reached the session (before the voice gate), early chunks included, "push µs"
+is the time push() took per chunk (resampling and cutting into 50 ms chunks, on the event
+loop), "buffered" the most 50 ms chunks waiting for the websocket, "dropped s" the audio lost
+to BROWSER_AUDIO_BUFFER_SECONDS overflowing and "threads" the peak number of threads added
+while recording. Recordings of the same length must end with the same transcript, whatever
+their format.
+"""
+import os
+import sys
+import time
+import wave
+import asyncio
+import argparse
+import tempfile
+import contextlib
+import subprocess
+from typing import List, Tuple
+import numpy as np
+from benchmarks.backend_load import free_port, wait_ready
+from benchmarks.transcript_sessions import ThreadPeak
+
+FORMATS = (("16 kHz mono", 16000, 1), ("44.1 kHz mono", 44100, 1), ("48 kHz stereo", 48000, 2))
+
+
+def write_tone(filename: str, seconds: float, rate: int, channels: int) -> None:
+    t = np.arange(int(seconds * rate)) / rate
+    samples = (np.sin(2 * np.pi * 440 * t) * 8000).astype(np.int16)
+    with wave.open(filename, "wb") as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(np.repeat(samples[:, None], channels, axis=1).tobytes())
+
+
+def read_chunks(filename: str, stream_every: float) -> Tuple[int, List[np.ndarray]]:
+    """ (rate, int16 arrays of `stream_every` seconds, (frames, channels) when multichannel) like gr.Audio streams them """
+
+    with wave.open(filename, "rb") as wf:
+        if wf.getsampwidth() != 2:
+            raise ValueError(f"{filename}: expected 16-bit audio, got {wf.getsampwidth() * 8}-bit")
+        rate, channels = wf.getframerate(), wf.getnchannels()
+        samples = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+    if channels > 1:
+        samples = samples.reshape(-1, channels)
+    step = int(rate * stream_every)
+    return rate, [samples[offset:offset + step] for offset in range(0, len(samples), step)]
+
+
+async def record(filename: str, args) -> dict:
+    from backend.transcript.feed import AudioFeed
+    from backend.transcript.sessions import TranscriberManager
+
+    rate, chunks = read_chunks(filename, args.stream_every)
+    manager = TranscriberManager()
+    # The recording is started before the last chunk at the latest
+    early_chunks = min(args.early_chunks, len(chunks) - 1)
+    push_seconds = 0.0
+    with ThreadPeak() as threads:
+        started = time.monotonic()
+        for index, chunk in enumerate(chunks):
+            if index == early_chunks:
+                await manager.start("browser", AudioFeed())
+                session = manager.sessions["browser"]
+            pushed = time.perf_counter()
+            manager.push("browser", rate, chunk)
+            push_seconds += time.perf_counter() - pushed
+            await asyncio.sleep(max(0.0, started + (index + 1) * args.stream_every / args.speed - time.monotonic()))
+        stopped = time.perf_counter()
+        transcript = await manager.stop("browser")
+        stop_ms = (time.perf_counter() - stopped) * 1000
+    return {
+        "audio": sum(len(chunk) for chunk in chunks) / rate,
+        "forwarded": session.gate.audio_seconds,
+        "push_us": push_seconds / len(chunks) * 1e6,
+        "buffered": session.feed.high_water,
+        "dropped": session.feed.dropped_seconds,
+        "stop_ms": stop_ms,
+        "threads": threads.added,
+        "transcript": transcript,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=6.0, help="length of the synthetic recordings")
+    parser.add_argument("--stream-every", type=float, default=0.25, help="seconds of audio per stream event, as in the app")
+    parser.add_argument("--speed", type=float, default=1.0, help="push the audio this many times faster than real time")
+    parser.add_argument("--early-chunks", type=int, default=1, help="chunks pushed before the recording is started")
+    parser.add_argument("--wav", action="append", default=[], help="16-bit WAV file of any rate and channel count to stream as well")
+    parser.add_argument("--latency", action="append", help="stand-in latency spec, e.g. assemblyai=fixed:300")
+    args = parser.parse_args()
+    args.latency = args.latency or ["assemblyai=fixed:300"]
+
+    port = free_port()
+    cmd = [sys.executable, "-m", "benchmarks.standin", "--port", str(port)]
+    for spec in args.latency:
+        cmd += ["--latency", spec]
+    standin = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    # Read by backend.transcript.main at import
+    os.environ["ASSEMBLYAI_STREAMING_URL"] = f"ws://127.0.0.1:{port}/v3/ws"
+    os.environ.setdefault("ASSEMBLYAI_API_KEY", "benchmark")
+    results = []
+    try:
+        asyncio.run(wait_ready(f"http://127.0.0.1:{port}/standin/stats"))
+        with tempfile.TemporaryDirectory() as directory, open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            recordings = []
+            for name, rate, channels in FORMATS:
+                filename = f"{directory}/{rate}_{channels}.wav"
+                write_tone(filename, args.seconds, rate, channels)
+                recordings.append((name, filename))
+            recordings += [(filename, filename) for filename in args.wav]
+            for name, filename in recordings:
+                results.append((name, asyncio.run(record(filename, args))))
+    finally:
+        standin.terminate()
+        standin.wait()
+
+    print(f"stream events of {args.stream_every:.2f} s at {args.speed:g}x real time, stand-in latency {', '.join(args.latency)}")
+    print(f"{'recording':<24}{'audio s':>9}{'forwarded s':>13}{'push µs':>9}{'buffered':>10}{'dropped s':>11}{'stop ms':>9}{'threads':>9}")
+    for name, result in results:
+        print(f"{name[-24:]:<24}{result['audio']:>9.2f}{result['forwarded']:>13.2f}{result['push_us']:>9.0f}{result['buffered']:>10}"
+              f"{result['dropped']:>11.2f}{result['stop_ms']:>9.0f}{result['threads']:>9}")
+    by_length = {}
+    for name, result in results:
+        by_length.setdefault(round(result["audio"], 1), set()).add(result["transcript"])
+    assert all(len(transcripts) == 1 and "" not in transcripts for transcripts in by_length.values()), \
+        f"recordings of the same length ended with different transcripts: {by_length}"
+    # Within the resampler's last partial 50 ms chunk
+    assert all(result["forwarded"] > result["audio"] - 0.05 for _, result in results), \
+        "audio pushed before the recording was started did not reach it"
+    print(f"transcript: {results[0][1]['transcript']}")
+
+
+if __name__ == "__main__":
+    main()
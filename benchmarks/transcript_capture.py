@@ -0,0 +1,96 @@
+"""
+Memory of the transcriber's audio capture over a long dictation: the previous list of chunks
+vs. the capture policies of backend.transcript.capture.
+
+Run with: python -m benchmarks.transcript_capture [--minutes 30] [--max-growth-mb 1]
+
+A 16 kHz mono 16-bit stream is simulated chunk by chunk (800 frames, 50 ms, as the microphone
+delivers them; each chunk a fresh bytes object like stream.read returns) and written to each
+policy the way the send path does. Python heap usage is sampled with tracemalloc after the
+first minute and at the end; "growth" is the difference. The ring's buffer is allocated up
+front (32 kB per second kept) and so shows in neither. The cost per chunk is timed in a second
+run without tracemalloc, which would otherwise dominate it. With --max-growth-mb set the run
+exits non-zero when a capture policy grows by more than that.
+"""
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+from typing import Callable, Tuple
+from backend.transcript.capture import AudioCapture, RingCapture, WavCapture
+
+SAMPLE_RATE = 16000
+FRAMES_PER_BUFFER = 800
+CHUNK_BYTES = FRAMES_PER_BUFFER * 2
+CHUNKS_PER_MINUTE = SAMPLE_RATE * 60 // FRAMES_PER_BUFFER
+
+
+class ListCapture(AudioCapture):
+    """ The previous behaviour: every chunk appended to a list for the whole session """
+
+    def __init__(self, sample_rate: int):
+        super().__init__(sample_rate)
+        self.recorded_frames = []
+
+    def write(self, chunk: bytes) -> None:
+        self.recorded_frames.append(chunk)
+
+
+TEMPLATE = (bytearray(range(256)) * (CHUNK_BYTES // 256 + 1))[:CHUNK_BYTES]
+
+
+def traced_stream(capture: AudioCapture, minutes: int) -> Tuple[float, float]:
+    """ Feed `minutes` of audio; returns (MB after the first minute, MB at the end) """
+
+    tracemalloc.start()
+    first_minute = 0.0
+    for chunk_index in range(minutes * CHUNKS_PER_MINUTE):
+        capture.write(bytes(TEMPLATE))
+        if chunk_index == CHUNKS_PER_MINUTE - 1:
+            first_minute = tracemalloc.get_traced_memory()[0] / 2**20
+    end = tracemalloc.get_traced_memory()[0] / 2**20
+    tracemalloc.stop()
+    capture.close()
+    return first_minute, end
+
+
+def timed_stream(capture: AudioCapture, minutes: int) -> float:
+    """ µs per chunk written, including the read's fresh bytes object """
+
+    chunks = minutes * CHUNKS_PER_MINUTE
+    started = time.perf_counter()
+    for _ in range(chunks):
+        capture.write(bytes(TEMPLATE))
+    elapsed = time.perf_counter() - started
+    capture.close()
+    return elapsed / chunks * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=int, default=30, help="length of the simulated dictation")
+    parser.add_argument("--max-growth-mb", type=float, help="fail when a capture policy grows by more than this")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        policies: Tuple[Tuple[str, Callable[[], AudioCapture]], ...] = (
+            ("list (previous)", lambda: ListCapture(SAMPLE_RATE)),
+            ("off", lambda: AudioCapture(SAMPLE_RATE)),
+            ("ring (30 s)", lambda: RingCapture(SAMPLE_RATE, seconds=30)),
+            ("wav (streamed)", lambda: WavCapture(SAMPLE_RATE, filename=f"{directory}/capture.wav")),
+        )
+        print(f"{args.minutes} minutes of 16 kHz audio, {CHUNK_BYTES}-byte chunks")
+        print(f"{'policy':<18}{'MB @1 min':>11}{'MB @end':>10}{'growth MB':>11}{'µs/chunk':>10}")
+        failed = False
+        for name, factory in policies:
+            first, end = traced_stream(factory(), args.minutes)
+            per_chunk = timed_stream(factory(), args.minutes)
+            print(f"{name:<18}{first:>11.2f}{end:>10.2f}{end - first:>11.2f}{per_chunk:>10.2f}")
+            if args.max_growth_mb is not None and name != "list (previous)" and end - first > args.max_growth_mb:
+                failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
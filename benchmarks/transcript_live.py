@@ -0,0 +1,91 @@
+"""
+How soon a voice user sees their words: the previous flow (the transcript appears when the
+recording is stopped) vs. TranscriberManager.stream, which the message box follows while the user
+speaks.
+
+Run with: python -m benchmarks.transcript_live [--sessions 10] [--seconds 6]
+                                               [--latency assemblyai=fixed:300]
+
+The stand-in (benchmarks.standin) is started on a free port and sends a partial Turn every
+TRANSCRIPT_PARTIAL_SECONDS of audio and a formatted one every TRANSCRIPT_TURN_SECONDS. Each
+simulated user records --seconds of synthetic audio and then stops. "first text" is the time from
+pressing the mic to the first words shown, "update gap" the longest wait between two updates
+while recording; for the previous flow both are the recording plus the stop. The last text
+streamed must equal what stop() returns.
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import contextlib
+import subprocess
+from typing import List, Tuple
+from benchmarks.backend_load import free_port, percentile, wait_ready
+from benchmarks.transcript_sessions import STOP_AFTER, synthetic_stream
+
+
+async def user(manager, key: str, seconds: float) -> Tuple[float, float, int, float]:
+    """ (first text ms, longest update gap ms, updates, stop ms) of one recording """
+
+    pressed = time.perf_counter()
+    await manager.start(key, synthetic_stream(seconds))
+    shown: List[Tuple[float, str]] = []
+
+    async def follow():
+        async for text in manager.stream(key):
+            shown.append((time.perf_counter(), text))
+
+    follower = asyncio.create_task(follow())
+    await asyncio.sleep(seconds + STOP_AFTER)
+    stopped = time.perf_counter()
+    transcript = await manager.stop(key)
+    stop_ms = (time.perf_counter() - stopped) * 1000
+    await follower
+    assert shown and shown[-1][1] == transcript, f"streamed {shown[-1:]} but stop() returned {transcript!r}"
+    times = [pressed] + [at for at, _ in shown if at < stopped]
+    gap = max(later - earlier for earlier, later in zip(times, times[1:] + [stopped]))
+    return (shown[0][0] - pressed) * 1000, gap * 1000, len(shown), stop_ms
+
+
+async def run(args) -> List[Tuple[float, float, int, float]]:
+    from backend.transcript.sessions import TranscriberManager
+
+    manager = TranscriberManager(max_sessions=args.sessions)
+    return list(await asyncio.gather(*(user(manager, f"session-{index}", args.seconds) for index in range(args.sessions))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=10, help="users recording at the same time")
+    parser.add_argument("--seconds", type=float, default=6.0, help="audio recorded per user")
+    parser.add_argument("--latency", action="append", help="stand-in latency spec, e.g. assemblyai=fixed:300")
+    args = parser.parse_args()
+    args.latency = args.latency or ["assemblyai=fixed:300"]
+
+    port = free_port()
+    cmd = [sys.executable, "-m", "benchmarks.standin", "--port", str(port)]
+    for spec in args.latency:
+        cmd += ["--latency", spec]
+    standin = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    # Read by backend.transcript.main at import
+    os.environ["ASSEMBLYAI_STREAMING_URL"] = f"ws://127.0.0.1:{port}/v3/ws"
+    os.environ.setdefault("ASSEMBLYAI_API_KEY", "benchmark")
+    try:
+        asyncio.run(wait_ready(f"http://127.0.0.1:{port}/standin/stats"))
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            results = asyncio.run(run(args))
+    finally:
+        standin.terminate()
+        standin.wait()
+
+    first, gaps, updates, stops = zip(*results)
+    at_stop = [(args.seconds + STOP_AFTER) * 1000 + stop for stop in stops]
+    print(f"{args.sessions} users recording {args.seconds:.0f} s, stand-in latency {', '.join(args.latency)}")
+    print(f"{'flow':<22}{'first text p50 ms':>19}{'update gap p95 ms':>19}{'updates':>9}")
+    print(f"{'shown at stop':<22}{percentile(at_stop, 50):>19.0f}{percentile(at_stop, 95):>19.0f}{1:>9}")
+    print(f"{'streamed':<22}{percentile(first, 50):>19.0f}{percentile(gaps, 95):>19.0f}{percentile(updates, 50):>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
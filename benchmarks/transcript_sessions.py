@@ -0,0 +1,205 @@
+"""
+Concurrent voice users: the previous single AssemblyAITranscriber shared by every browser
+session vs. one threaded transcriber per session vs. TranscriberManager.
+
+Run with: python -m benchmarks.transcript_sessions [--sessions 20] [--seconds 3]
+                                                   [--max-sessions 20] [--latency assemblyai=fixed:300]
+
+The stand-in (benchmarks.standin) is started on a free port and the transcribers are pointed at
+its /v3/ws. Every simulated user presses the mic within the same 200 ms, streams synthetic audio
+in real time and stops; user i records --seconds + i % 3 seconds, so a transcript that picked up
+another user's audio or turns differs from the one expected for its length (taken from one
+recording per length made alone beforehand). "threads" is the peak number of threads the setup
+added, not counting the threads driving the simulated users of the threaded setups (Gradio's
+workers in the app). Users beyond --max-sessions are turned away by TranscriberManager. Finally
+a recording whose audio stalls is checked to be dropped after the idle timeout.
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import threading
+import contextlib
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from benchmarks.backend_load import free_port, percentile, wait_ready
+from benchmarks.transcript_stop import CHUNK_SECONDS, synthetic_audio, tone_chunk
+
+START_JITTER = 0.2
+# The user presses stop this long after the audio ends
+STOP_AFTER = 0.25
+# A user's result: (stop latency in ms, transcript), None when turned away
+Result = Optional[Tuple[float, str]]
+
+
+async def synthetic_stream(seconds: float) -> AsyncIterator[bytes]:
+    """ synthetic_audio for the event loop: paced with asyncio.sleep, no thread needed """
+
+    chunk = tone_chunk()
+    started = time.monotonic()
+    for index in range(int(seconds / CHUNK_SECONDS)):
+        await asyncio.sleep(max(0.0, started + (index + 1) * CHUNK_SECONDS - time.monotonic()))
+        yield chunk
+
+
+class ThreadPeak:
+    """ Peak threading.active_count() above the count when entered, sampled every 10 ms """
+
+    def __enter__(self):
+        self.done = threading.Event()
+        self.sampler = threading.Thread(target=self.sample, daemon=True)
+        self.sampler.start()
+        self.baseline = threading.active_count()
+        self.peak = self.baseline
+        return self
+
+    def sample(self) -> None:
+        while not self.done.wait(0.01):
+            self.peak = max(self.peak, threading.active_count())
+
+    def __exit__(self, *exc):
+        self.done.set()
+        self.sampler.join()
+
+    @property
+    def added(self) -> int:
+        return self.peak - self.baseline
+
+
+def user_seconds(args, user: int) -> float:
+    return args.seconds + user % 3
+
+
+def run_threaded(args, shared: bool) -> Tuple[List[Result], int]:
+    from backend.transcript.main import AssemblyAITranscriber
+
+    shared_transcriber = AssemblyAITranscriber()
+
+    def user(index: int) -> Result:
+        transcriber = shared_transcriber if shared else AssemblyAITranscriber()
+        seconds = user_seconds(args, index)
+        time.sleep(random.uniform(0, START_JITTER))
+        transcriber.start(synthetic_audio(seconds))
+        time.sleep(seconds + STOP_AFTER)
+        started = time.perf_counter()
+        transcriber.stop()
+        return (time.perf_counter() - started) * 1000, transcriber.get_transcript()
+
+    with ThreadPoolExecutor(max_workers=args.sessions) as drivers:
+        # Start the drivers first so that they are not counted
+        list(drivers.map(lambda _: time.sleep(0.05), range(args.sessions)))
+        with ThreadPeak() as threads:
+            results = list(drivers.map(user, range(args.sessions)))
+    return results, threads.added
+
+
+async def run_manager(args) -> Tuple[List[Result], int]:
+    from backend.transcript.sessions import TranscriberBusy, TranscriberManager
+
+    manager = TranscriberManager(max_sessions=args.max_sessions)
+
+    async def user(index: int) -> Result:
+        seconds = user_seconds(args, index)
+        await asyncio.sleep(random.uniform(0, START_JITTER))
+        try:
+            await manager.start(f"session-{index}", synthetic_stream(seconds))
+        except TranscriberBusy:
+            return None
+        await asyncio.sleep(seconds + STOP_AFTER)
+        started = time.perf_counter()
+        transcript = await manager.stop(f"session-{index}")
+        return (time.perf_counter() - started) * 1000, transcript
+
+    with ThreadPeak() as threads:
+        results = await asyncio.gather(*(user(index) for index in range(args.sessions)))
+    return list(results), threads.added
+
+
+async def expected_transcripts(args) -> Dict[float, str]:
+    """ The transcript of each recording length, recorded one at a time """
+
+    from backend.transcript.sessions import TranscriberManager
+
+    manager = TranscriberManager(max_sessions=1)
+    expected = {}
+    for seconds in sorted({user_seconds(args, index) for index in range(args.sessions)}):
+        await manager.start("reference", synthetic_stream(seconds))
+        await asyncio.sleep(seconds + STOP_AFTER)
+        expected[seconds] = await manager.stop("reference")
+    return expected
+
+
+async def idle_reaped(idle_timeout: float) -> float:
+    """ Seconds until a recording whose audio stalls after the first chunk is dropped """
+
+    from backend.transcript.sessions import TranscriberManager
+
+    async def stalled() -> AsyncIterator[bytes]:
+        yield tone_chunk()
+        await asyncio.Event().wait()
+
+    manager = TranscriberManager(idle_timeout=idle_timeout)
+    await manager.start("stalled", stalled())
+    started = time.monotonic()
+    while "stalled" in manager.sessions:
+        assert time.monotonic() - started < idle_timeout + 10, "idle recording was not dropped"
+        await asyncio.sleep(0.1)
+    return time.monotonic() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=20, help="simulated users recording at the same time")
+    parser.add_argument("--seconds", type=float, default=3.0, help="shortest recording")
+    parser.add_argument("--max-sessions", type=int, help="TranscriberManager's cap (default: --sessions)")
+    parser.add_argument("--idle-timeout", type=float, default=2.0, help="idle timeout for the stalled recording check")
+    parser.add_argument("--latency", action="append", help="stand-in latency spec, e.g. assemblyai=fixed:300")
+    args = parser.parse_args()
+    args.latency = args.latency or ["assemblyai=fixed:300"]
+    args.max_sessions = args.max_sessions or args.sessions
+
+    port = free_port()
+    cmd = [sys.executable, "-m", "benchmarks.standin", "--port", str(port)]
+    for spec in args.latency:
+        cmd += ["--latency", spec]
+    standin = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    # Read by backend.transcript.main at import
+    os.environ["ASSEMBLYAI_STREAMING_URL"] = f"ws://127.0.0.1:{port}/v3/ws"
+    os.environ.setdefault("ASSEMBLYAI_API_KEY", "benchmark")
+    # The threaded transcriber prints every turn and connection event, including the shared
+    # setup's leftover connections being closed when the stand-in stops
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        try:
+            asyncio.run(wait_ready(f"http://127.0.0.1:{port}/standin/stats"))
+            expected = asyncio.run(expected_transcripts(args))
+            results = {
+                "shared (previous)": run_threaded(args, shared=True),
+                "one per session": run_threaded(args, shared=False),
+                "TranscriberManager": asyncio.run(run_manager(args)),
+            }
+            reaped_after = asyncio.run(idle_reaped(args.idle_timeout))
+        finally:
+            standin.terminate()
+            standin.wait()
+            time.sleep(0.2)
+
+    print(f"{args.sessions} users recording {args.seconds:.0f}-{args.seconds + 2:.0f} s at once, "
+          f"stand-in latency {', '.join(args.latency)}, TranscriberManager cap {args.max_sessions}")
+    print(f"{'setup':<21}{'correct':>9}{'turned away':>13}{'threads':>9}{'stop p50 ms':>13}{'stop p95 ms':>13}")
+    for setup, (user_results, threads) in results.items():
+        served = [(index, result) for index, result in enumerate(user_results) if result is not None]
+        correct = sum(result[1] == expected[user_seconds(args, index)] for index, result in served)
+        samples = [result[0] for _, result in served]
+        print(f"{setup:<21}{correct:>9}{len(user_results) - len(served):>13}{threads:>9}"
+              f"{percentile(samples, 50):>13.1f}{percentile(samples, 95):>13.1f}")
+    manager_results = results["TranscriberManager"][0]
+    assert all(result[1] == expected[user_seconds(args, index)] for index, result in enumerate(manager_results) if result is not None), \
+        "TranscriberManager mixed up transcripts"
+    print(f"stalled recording dropped after {reaped_after:.1f} s (idle timeout {args.idle_timeout:.0f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Latency of stopping a voice recording: the previous fixed wait (Terminate, sleep 2 s, joins)
+vs. AssemblyAITranscriber.stop waiting for the server's Termination.
+
+Run with: python -m benchmarks.transcript_stop [--sessions 5] [--seconds 4]
+                                               [--latency assemblyai=fixed:300]
+
+The stand-in (benchmarks.standin) is started on a free port with the given server turnaround
+(time from Terminate to the final turn) and the transcriber is pointed at its /v3/ws. Each
+session streams --seconds of synthetic 16 kHz audio in real time, no microphone needed, then
+stops. Both setups must end with the same transcript.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import contextlib
+import subprocess
+from typing import Iterator, List
+from benchmarks.backend_load import free_port, percentile, wait_ready
+
+CHUNK_SECONDS = 0.05
+
+
+def tone_chunk() -> bytes:
+    """ 50 ms of a 440 Hz tone, 16 kHz mono int16 """
+
+    import numpy as np
+    t = np.arange(int(16000 * CHUNK_SECONDS)) / 16000
+    return (np.sin(2 * np.pi * 440 * t) * 8000).astype(np.int16).tobytes()
+
+
+def synthetic_audio(seconds: float) -> Iterator[bytes]:
+    """ 50 ms chunks of a 440 Hz tone, paced like a microphone """
+
+    chunk = tone_chunk()
+    started = time.monotonic()
+    for index in range(int(seconds / CHUNK_SECONDS)):
+        # Paced against the start, so that slow iterations do not add up
+        time.sleep(max(0.0, started + (index + 1) * CHUNK_SECONDS - time.monotonic()))
+        yield chunk
+
+
+def legacy_stop(transcriber) -> None:
+    """ stop() as it was: Terminate, a fixed 2 s sleep, then the joins """
+
+    transcriber.stop_event.set()
+    if transcriber.ws_app and transcriber.ws_app.sock and transcriber.ws_app.sock.connected:
+        transcriber.ws_app.send(json.dumps({"type": "Terminate"}))
+        time.sleep(2)
+    if transcriber.audio_thread and transcriber.audio_thread.is_alive():
+        transcriber.audio_thread.join(timeout=2)
+    transcriber.ws_app.close()
+    if transcriber.ws_thread and transcriber.ws_thread.is_alive():
+        transcriber.ws_thread.join(timeout=2)
+    transcriber.current_transcript = transcriber.transcript()
+
+
+def run(setup: str, sessions: int, seconds: float) -> tuple:
+    from backend.transcript.main import AssemblyAITranscriber
+
+    samples: List[float] = []
+    transcripts = set()
+    transcriber = AssemblyAITranscriber()
+    for _ in range(sessions):
+        transcriber.start(synthetic_audio(seconds))
+        time.sleep(seconds + 0.1)
+        started = time.perf_counter()
+        legacy_stop(transcriber) if setup == "sleep 2 s" else transcriber.stop()
+        samples.append((time.perf_counter() - started) * 1000)
+        transcripts.add(transcriber.get_transcript())
+    return samples, transcripts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=5, help="recordings per setup")
+    parser.add_argument("--seconds", type=float, default=4.0, help="audio streamed per recording")
+    parser.add_argument("--latency", action="append", help="stand-in latency spec, e.g. assemblyai=fixed:300")
+    args = parser.parse_args()
+    args.latency = args.latency or ["assemblyai=fixed:300"]
+
+    port = free_port()
+    cmd = [sys.executable, "-m", "benchmarks.standin", "--port", str(port)]
+    for spec in args.latency:
+        cmd += ["--latency", spec]
+    standin = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    # Read by backend.transcript.main at import
+    os.environ["ASSEMBLYAI_STREAMING_URL"] = f"ws://127.0.0.1:{port}/v3/ws"
+    os.environ.setdefault("ASSEMBLYAI_API_KEY", "benchmark")
+    try:
+        asyncio.run(wait_ready(f"http://127.0.0.1:{port}/standin/stats"))
+        # The transcriber prints every turn and connection event
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            results = {setup: run(setup, args.sessions, args.seconds) for setup in ("sleep 2 s", "wait for Termination")}
+    finally:
+        standin.terminate()
+        standin.wait()
+
+    print(f"{args.sessions} recordings of {args.seconds:.1f} s per setup, stand-in latency {', '.join(args.latency)}")
+    print(f"{'setup':<22}{'stop p50 ms':>13}{'stop max ms':>13}")
+    for setup, (samples, _) in results.items():
+        print(f"{setup:<22}{percentile(samples, 50):>13.1f}{max(samples):>13.1f}")
+    transcripts = set.union(*(transcripts for _, transcripts in results.values()))
+    assert len(transcripts) == 1 and "" not in transcripts, f"setups ended with different transcripts: { {s: t for s, (_, t) in results.items()} }"
+    print(f"transcript: {transcripts.pop()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Audio sent for transcription with and without the local voice gate (backend.transcript.vad).
+
+Run with: python -m benchmarks.transcript_vad [--minutes 5] [--wav recorded_audio_*.wav ...]
+
+Synthetic recordings (16 kHz mono int16, seeded) are written to WAV files and read back the same
+way as recorded ones, then fed to VoiceGate in 50 ms chunks as the send path does:
+    dictation     speech bursts of 1-4 s and pauses of 0.3-8 s over a quiet room (-65 dBFS)
+    noisy room    the same over fan hum and hiss at -45 dBFS
+    no pauses     speech back to back, nothing should be suppressed
+"Speech" is synthesised from voiced syllables (a harmonic series on a 100-220 Hz pitch,
+amplitude-modulated at 4 Hz) and fricatives (high-passed noise, some 12 dB quieter). "missed"
+counts chunks of speech that were not sent and must stay at 0 for the synthetic recordings.
+Recordings passed with --wav (e.g. captured with AUDIO_CAPTURE=wav) have no labels, so only the
+share suppressed is shown for them.
+"""
+import time
+import wave
+import argparse
+import tempfile
+from typing import List, Optional, Tuple
+import numpy as np
+from backend.transcript.vad import VoiceGate
+
+SAMPLE_RATE = 16000
+CHUNK_FRAMES = 800
+
+
+def noise(rng: np.random.Generator, frames: int, level_db: float, hum: bool = False) -> np.ndarray:
+    signal = rng.standard_normal(frames)
+    if hum:
+        t = np.arange(frames) / SAMPLE_RATE
+        signal = signal * 0.5 + np.sin(2 * np.pi * 50 * t) * 1.2 + np.sin(2 * np.pi * 100 * t) * 0.6
+    return signal / np.sqrt(np.mean(signal ** 2)) * 32768 * 10 ** (level_db / 20)
+
+
+def speech(rng: np.random.Generator, frames: int) -> np.ndarray:
+    """ Syllables of a voiced harmonic series with a fricative now and then, about -20 dBFS """
+
+    t = np.arange(frames) / SAMPLE_RATE
+    pitch = rng.uniform(100, 220) * (1 + 0.1 * np.sin(2 * np.pi * 0.5 * t))
+    phase = 2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE
+    voiced = sum(np.sin(phase * harmonic) / harmonic for harmonic in range(1, 6))
+    syllables = 0.55 + 0.45 * np.sin(2 * np.pi * 4 * t + rng.uniform(0, 2 * np.pi))
+    signal = voiced * syllables * 3300
+    # Fricatives replace some syllables: noise with the low end removed
+    for start in rng.integers(0, max(frames - 2400, 1), size=frames // 16000):
+        hiss = np.diff(rng.standard_normal(2401)) * 800
+        signal[start:start + 2400] = hiss[:len(signal[start:start + 2400])]
+    return signal
+
+
+def synthetic(name: str, minutes: float, seed: int = 7) -> Tuple[np.ndarray, np.ndarray]:
+    """ (int16 samples, per-sample speech label) of a synthetic recording """
+
+    rng = np.random.default_rng(seed)
+    frames = int(minutes * 60 * SAMPLE_RATE)
+    background = noise(rng, frames, -45.0, hum=True) if name == "noisy room" else noise(rng, frames, -65.0)
+    labels = np.zeros(frames, dtype=bool)
+    position = int(rng.uniform(0.5, 2.0) * SAMPLE_RATE)
+    while position < frames:
+        length = min(int(rng.uniform(1.0, 4.0) * SAMPLE_RATE), frames - position)
+        background[position:position + length] += speech(rng, length)
+        labels[position:position + length] = True
+        position += length + (0 if name == "no pauses" else int(rng.uniform(0.3, 8.0) * SAMPLE_RATE))
+    if name == "no pauses":
+        labels[:] = True
+        background[:SAMPLE_RATE * 2] += speech(rng, SAMPLE_RATE * 2)
+    return np.clip(background, -32768, 32767).astype(np.int16), labels
+
+
+def write_wav(filename: str, samples: np.ndarray) -> None:
+    with wave.open(filename, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(SAMPLE_RATE)
+        wf.writeframes(samples.tobytes())
+
+
+def read_wav(filename: str) -> List[bytes]:
+    """ 50 ms chunks of a 16 kHz mono 16-bit WAV file """
+
+    with wave.open(filename, "rb") as wf:
+        if (wf.getframerate(), wf.getnchannels(), wf.getsampwidth()) != (SAMPLE_RATE, 1, 2):
+            raise ValueError(f"{filename}: expected 16 kHz mono 16-bit audio, got {wf.getframerate()} Hz, "
+                             f"{wf.getnchannels()} channel(s), {wf.getsampwidth() * 8}-bit")
+        data = wf.readframes(wf.getnframes())
+    step = CHUNK_FRAMES * 2
+    return [data[offset:offset + step] for offset in range(0, len(data) - step + 1, step)]
+
+
+def gate_recording(chunks: List[bytes], labels: Optional[np.ndarray]) -> Tuple[VoiceGate, Optional[int], float]:
+    """ (gate after the recording, speech chunks not sent, µs per chunk) """
+
+    gate = VoiceGate(SAMPLE_RATE, enabled=True)
+    sent = set()
+    index_of = {id(chunk): index for index, chunk in enumerate(chunks)}
+    started = time.perf_counter()
+    for chunk in chunks:
+        sent.update(index_of[id(out)] for out in gate.process(chunk))
+    per_chunk = (time.perf_counter() - started) / len(chunks) * 1e6
+    gate.close()
+    if labels is None:
+        return gate, None, per_chunk
+    speech_chunks = {index for index in range(len(chunks)) if labels[index * CHUNK_FRAMES:(index + 1) * CHUNK_FRAMES].any()}
+    return gate, len(speech_chunks - sent), per_chunk
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, default=5.0, help="length of each synthetic recording")
+    parser.add_argument("--wav", action="append", default=[], help="recorded 16 kHz mono 16-bit WAV file to gate as well")
+    args = parser.parse_args()
+
+    print(f"{'recording':<28}{'audio s':>9}{'sent s':>9}{'suppressed':>12}{'keep-alives':>13}{'missed':>8}{'µs/chunk':>10}")
+    failed = []
+    with tempfile.TemporaryDirectory() as directory:
+        recordings = []
+        for name in ("dictation", "noisy room", "no pauses"):
+            samples, labels = synthetic(name, args.minutes)
+            filename = f"{directory}/{name.replace(' ', '_')}.wav"
+            write_wav(filename, samples)
+            recordings.append((name, filename, labels))
+        recordings += [(filename, filename, None) for filename in args.wav]
+        for name, filename, labels in recordings:
+            gate, missed, per_chunk = gate_recording(read_wav(filename), labels)
+            print(f"{name[-28:]:<28}{gate.audio_seconds:>9.1f}{gate.sent_seconds:>9.1f}{gate.suppressed_share:>12.1%}"
+                  f"{gate.keepalives:>13}{'-' if missed is None else missed:>8}{per_chunk:>10.1f}")
+            if missed:
+                failed.append(name)
+    assert not failed, f"speech was suppressed in: {', '.join(failed)}"
+
+
+if __name__ == "__main__":
+    main()
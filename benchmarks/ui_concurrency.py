@@ -0,0 +1,253 @@
+"""
+Concurrency test for the Gradio "Get Return Flights" handler: N users click at the same moment.
+
+Run with: python -m benchmarks.ui_concurrency [--users 50] [--upstream-latency serpapi=fixed:1000]
+                                              [--max-click-p95-ms 3500] [--max-ping-p95-ms 1200]
+
+The stand-in and the backend are started as in benchmarks.backend_load. A small Gradio app
+wires the return-flights handler to a button exactly like the travel app does: the outbound
+listing sits in each user's session state (put there by a search beforehand), the return
+listing goes to session state and the browser then sends the error-message .then() step, so a
+click here is both events. Events are sent through Gradio's queue the way the browser sends
+them. While the clicks are in flight a trivial synchronous "ping" event is sent every 100 ms
+(from 250 ms after the burst); Gradio runs sync handlers on its worker thread pool, so slow
+pings mean the pool or the event loop is starved. Three setups are compared:
+    sync, queue=1    the previous handler (blocking requests.get) with Gradio's default
+                     concurrency_limit of 1 per event: clicks are served one at a time
+    sync, queue=N    the previous handler with the queue opened: every click holds a worker
+                     thread, so at most 40 run at once
+    async, queue=N   UIManager.on_get_return_flights on the shared pooled client, with
+                     Gradio's job cap (max_threads) at N + 40 as the travel app's UI_MAX_THREADS
+The run exits non-zero when the async setup misses a threshold.
+
+Where the time goes, measured with 50 users and a 1 s upstream on a single CPU: the backend
+alone answers 50 concurrent return searches at p95 ~1.45 s; through the UI the async click
+(both events) takes p95 2.2-3.0 s and the ping p95 0.4-0.95 s (the ping sent while the burst is
+being admitted; later pings take ~70 ms). The difference is CPU: the client, the stand-in, the
+backend and the Gradio process share the core, and Gradio's per-event work (session state,
+SSE framing, the pooled client's connection bookkeeping) runs on one event loop. Gradio's queue
+admission is not the limit: with max_threads above the burst every click starts at once, and
+turning off its per-event analytics summary and status broadcasts changed nothing measurable.
+The default thresholds sit above that spread; the ping is the one that tells the setups apart
+(sync, queue=N: ping p95 1.5-2.3 s, click p95 3.1-4.0 s), so it catches a handler that blocks a
+worker thread again.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import asyncio
+import argparse
+import subprocess
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+import httpx
+from benchmarks.backend_load import free_port, percentile, start_servers, wait_ready
+
+SETUPS = [("sync, queue=1", "sync", 1), ("sync, queue=N", "sync", None), ("async, queue=N", "async", None)]
+PING_INTERVAL = 0.1
+# Pings start once the burst has been queued, so they measure the workers while clicks are in flight
+PING_DELAY = 0.25
+
+
+def serve_ui(handler: str, port: int, concurrency_limit: int) -> None:
+    """ Gradio app with the return-flights click wired like frontend.main, plus a sync ping event """
+
+    import requests
+    import gradio as gr
+    from shared_utils.load_data import load_json_data
+    from backend.utils import merge_flights_fields
+    from frontend.components.ui_manager import UIManager, BASE_URL, VIEW_RETURN_CARDS
+
+    def legacy_return_flights(selected, flight_data, initial_payload):
+        """ on_get_return_flights as it was: a blocking request and a new connection per click """
+
+        flights = flight_data.get("flights", [])
+        departure_input = {**initial_payload, "departure_token": flights[int(selected)]["departure_token"]}
+        try:
+            response = requests.get(f"{BASE_URL}/return-flights", params=departure_input, timeout=90)
+            response.raise_for_status()
+            return VIEW_RETURN_CARDS, response.json()
+        except requests.RequestException as e:
+            return VIEW_RETURN_CARDS, {"error": f"Failed to fetch return flights: {str(e)}"}
+
+    outbound = merge_flights_fields(load_json_data("round_go_flights.json"))
+    payload = {
+        **load_json_data("payload.json"),
+        "outbound_date": (date.today() + timedelta(days=30)).isoformat(),
+        "return_date": (date.today() + timedelta(days=37)).isoformat(),
+    }
+    with gr.Blocks() as demo:
+        selected = gr.Textbox("0")
+        flights_state = gr.State(value={})
+        payload_state = gr.State(value={})
+        view = gr.State()
+        return_flights_state = gr.State(value={})
+        error_message = gr.Textbox()
+        # Stands in for the chat turn that puts the outbound listing in the user's session
+        gr.Button("Search").click(fn=lambda: (outbound, payload), outputs=[flights_state, payload_state], api_name="search")
+        gr.Button("Get Return Flights").click(
+            fn=UIManager.on_get_return_flights if handler == "async" else legacy_return_flights,
+            inputs=[selected, flights_state, payload_state],
+            outputs=[view, return_flights_state],
+            api_name="return_flights",
+        ).then(
+            fn=lambda data: data.get("error", ""),
+            inputs=return_flights_state,
+            outputs=error_message,
+            api_name="return_flights_error",
+        )
+        gr.Button("Ping").click(fn=lambda: "pong", outputs=gr.Textbox(), api_name="ping")
+    demo.queue(default_concurrency_limit=concurrency_limit)
+    # Gradio caps the jobs it runs at once at max_threads; only async handlers can go past the thread pool,
+    # and the headroom keeps slots free for other events (pings, .then() steps) as UI_MAX_THREADS does
+    max_threads = concurrency_limit + 40 if handler == "async" else 40
+    demo.launch(server_name="127.0.0.1", server_port=port, prevent_thread_lock=True, quiet=True, max_threads=max_threads)
+    demo.block_thread()
+
+
+async def call(client: httpx.AsyncClient, base_url: str, fn_index: int, data: List, session: str) -> Optional[List]:
+    """ One event through Gradio's queue as the browser sends it, in the given session; its outputs, or None when it failed """
+
+    response = await client.post(
+        f"{base_url}/gradio_api/queue/join", json={"data": data, "fn_index": fn_index, "session_hash": session}
+    )
+    response.raise_for_status()
+    event_id = response.json()["event_id"]
+    async with client.stream("GET", f"{base_url}/gradio_api/queue/data", params={"session_hash": session}) as stream:
+        async for line in stream.aiter_lines():
+            if not line.startswith("data: "):
+                continue
+            message = json.loads(line[len("data: "):])
+            if message.get("msg") == "process_completed" and message.get("event_id") == event_id:
+                return message["output"].get("data") if message.get("success") else None
+    return None
+
+
+async def run_setup(base_url: str, users: int) -> Dict:
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(timeout=300, limits=limits) as client:
+        config = (await client.get(f"{base_url}/config")).json()
+        fns = {dependency["api_name"]: dependency["id"] for dependency in config["dependencies"]}
+        # Every user has searched already, so the listing is in its session as in the travel app
+        sessions = [uuid.uuid4().hex for _ in range(users + 1)]
+        ping_session = uuid.uuid4().hex
+        await asyncio.gather(*(call(client, base_url, fns["search"], [], session) for session in sessions))
+        # Warm-up click so imports and first connections are not measured
+        await call(client, base_url, fns["return_flights"], ["0", None, None], sessions.pop())
+        clicks: List[float] = []
+        failures = 0
+        pings: List[float] = []
+        done = asyncio.Event()
+
+        async def click(session: str):
+            nonlocal failures
+            started = time.perf_counter()
+            # The browser sends the .then() step once the handler has completed, as its own event
+            outputs = await call(client, base_url, fns["return_flights"], ["0", None, None], session)
+            error = outputs is not None and await call(client, base_url, fns["return_flights_error"], [None], session)
+            clicks.append((time.perf_counter() - started) * 1000)
+            # The handler reports backend failures as {"error": ...} in the return flights state
+            failures += not error or bool(error[0])
+
+        async def ping():
+            await asyncio.sleep(PING_DELAY)
+            while not done.is_set():
+                started = time.perf_counter()
+                await call(client, base_url, fns["ping"], [], ping_session)
+                pings.append((time.perf_counter() - started) * 1000)
+                await asyncio.sleep(PING_INTERVAL)
+
+        started = time.perf_counter()
+        pinger = asyncio.create_task(ping())
+        await asyncio.gather(*(click(session) for session in sessions))
+        wall = time.perf_counter() - started
+        done.set()
+        await pinger
+
+    return {
+        "wall_s": wall,
+        "failures": failures,
+        "click_p50_ms": percentile(clicks, 50),
+        "click_p95_ms": percentile(clicks, 95),
+        "click_max_ms": max(clicks, default=0.0),
+        "ping_p50_ms": percentile(pings, 50),
+        "ping_p95_ms": percentile(pings, 95),
+        "ping_max_ms": max(pings, default=0.0),
+    }
+
+
+async def main_async(args) -> Dict:
+    standin_url, backend_url, processes = start_servers(args)
+    env = {**os.environ, "BACKEND_API_URL": f"{backend_url}/api"}
+    results = {}
+    try:
+        await wait_ready(f"{standin_url}/standin/stats")
+        await wait_ready(f"{backend_url}/docs")
+        for name, handler, limit in SETUPS:
+            port = free_port()
+            ui = subprocess.Popen(
+                [sys.executable, "-m", "benchmarks.ui_concurrency", "--serve-ui", handler, "--port", str(port),
+                 "--concurrency-limit", str(limit or args.users)],
+                env=env, stdout=subprocess.DEVNULL, stderr=None if args.verbose else subprocess.DEVNULL,
+            )
+            try:
+                base_url = f"http://127.0.0.1:{port}"
+                await wait_ready(f"{base_url}/gradio_api/info", timeout=60)
+                results[name] = await run_setup(base_url, args.users)
+            finally:
+                ui.terminate()
+                ui.wait()
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+    return {"users": args.users, "upstream_latency": args.upstream_latency, "setups": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50, help="users clicking at the same moment")
+    parser.add_argument("--upstream-latency", action="append", default=[], help="stand-in latency spec (default serpapi=fixed:1000)")
+    parser.add_argument("--upstream-error-rate", type=float, default=0.0, help="stand-in injected error rate")
+    parser.add_argument("--max-click-p95-ms", type=float, default=3500.0, help="fail when the async setup's click p95 exceeds this")
+    parser.add_argument("--max-ping-p95-ms", type=float, default=1200.0, help="fail when the async setup's ping p95 exceeds this")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--verbose", action="store_true", help="show server errors on stderr")
+    parser.add_argument("--serve-ui", choices=["sync", "async"], help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--concurrency-limit", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve_ui:
+        serve_ui(args.serve_ui, args.port, args.concurrency_limit)
+        return
+
+    args.upstream_latency = args.upstream_latency or ["serpapi=fixed:1000"]
+    args.backend_log = None
+    report = asyncio.run(main_async(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{report['users']} users clicking Get Return Flights at once, upstream latency {', '.join(report['upstream_latency'])}")
+        print(f"{'setup':<17}{'wall s':>8}{'fail':>6}{'click p50':>11}{'click p95':>11}{'click max':>11}{'ping p50':>10}{'ping p95':>10}{'ping max':>10}")
+        for name, row in report["setups"].items():
+            print(f"{name:<17}{row['wall_s']:>8.1f}{row['failures']:>6}{row['click_p50_ms']:>11.0f}{row['click_p95_ms']:>11.0f}"
+                  f"{row['click_max_ms']:>11.0f}{row['ping_p50_ms']:>10.0f}{row['ping_p95_ms']:>10.0f}{row['ping_max_ms']:>10.0f}")
+
+    result = report["setups"]["async, queue=N"]
+    failures = []
+    if result["failures"]:
+        failures.append(f"{result['failures']} clicks failed")
+    if result["click_p95_ms"] > args.max_click_p95_ms:
+        failures.append(f"click p95 {result['click_p95_ms']:.0f} ms > {args.max_click_p95_ms} ms")
+    if result["ping_p95_ms"] > args.max_ping_p95_ms:
+        failures.append(f"ping p95 {result['ping_p95_ms']:.0f} ms > {args.max_ping_p95_ms} ms")
+    if failures:
+        print("FAILED: " + "; ".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
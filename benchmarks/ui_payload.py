@@ -0,0 +1,131 @@
+"""
+Bytes the Gradio server sends per UI event: the fixed MAX_FLIGHTS component slots the flight
+section used to have vs. the JSON-paged list rendered in the browser.
+
+Run with: python -m benchmarks.ui_payload [--flights 10 20 100 500]
+
+Listings of the requested sizes are built by repeating the flights in one_way_flights.json;
+booking options come from round_booking_option_deep_search.json. An event's size is its
+component outputs serialized as Gradio sends them (values and {"__type__": "update"} dicts);
+gr.State outputs stay on the server and are not counted. The slot layout is rebuilt here
+from the previous UIManager code, since it no longer exists in the app.
+"""
+import json
+import argparse
+import gradio as gr
+from shared_utils.load_data import load_json_data
+from backend.utils import merge_flights_fields
+from frontend.components.ui_manager import UIManager, PAGE_SIZE, PLACEHOLDER_IMAGE_URL
+from frontend.utils import format_duration
+
+MAX_FLIGHTS = 20
+MAX_BOOKING_OPTIONS = 20
+
+
+def payload_bytes(outputs) -> int:
+    return len(json.dumps(list(outputs), ensure_ascii=False, separators=(",", ":")).encode())
+
+
+def listing(size: int) -> dict:
+    flights = merge_flights_fields(load_json_data("one_way_flights.json"))["flights"]
+    return {"flights": [dict(flights[i % len(flights)], price=10000 + i) for i in range(size)]}
+
+
+def legacy_card_html(idx: int, flight: dict, selected: bool = False) -> str:
+    """ UIManager.get_card_html before the list moved to the browser """
+
+    first = flight["flights"][0] if flight.get("flights") else {}
+    last = flight["flights"][-1] if flight.get("flights") else {}
+    stops = len(flight.get("flights", [])) - 1
+    stops_text = f"{stops} stop{'s' if stops != 1 else ''}" if stops > 0 else "Non-stop"
+    logos = "".join(
+        f'<img src="{f.get("airline_logo", "")}"'
+        f'title="{f.get("airline", "")}"'
+        f' onerror="this.src=\'{PLACEHOLDER_IMAGE_URL}\'">'
+        for f in flight.get("flights", [])
+    )
+    selected_class = "selected" if selected else ""
+    departure_time = first.get('departure_airport', {}).get('time', 'N/A')
+    return f"""
+        <div class="card card-container {selected_class}" id="card-{idx}">
+            <div class="logo-chain">{logos}</div>
+            <div class="route">{first.get('departure_airport', {}).get('id', '')} → {last.get('arrival_airport', {}).get('id', '')}</div>
+            <div class="price">₹{flight.get('price', 'N/A')}</div>
+            <div class="duration">{format_duration(flight.get('total_duration'))} total</div>
+            <div class="stops">{stops_text}</div>
+            <div class="departure-time">Departs: {departure_time}</div>
+        </div>
+        """
+
+
+def legacy_reset() -> list:
+    """ Component outputs of the old reset_flight_section """
+
+    hidden = gr.update(visible=False)
+    return [
+        hidden,
+        *[""] * MAX_FLIGHTS, *[hidden] * MAX_FLIGHTS, gr.update(interactive=False),
+        "Select a flight to see details", hidden, hidden,
+        *[""] * MAX_FLIGHTS, *[hidden] * MAX_FLIGHTS, gr.update(interactive=False),
+        "Select a return flight to see details",
+        *[hidden] * MAX_BOOKING_OPTIONS, *[""] * MAX_BOOKING_OPTIONS, *[hidden] * MAX_BOOKING_OPTIONS,
+        *[""] * MAX_BOOKING_OPTIONS, *[""] * MAX_BOOKING_OPTIONS,
+        hidden, gr.update(value=""), hidden,
+    ]
+
+
+def legacy_results(flight_data: dict) -> list:
+    """ Component outputs of the old update_flight_interface (only the first MAX_FLIGHTS were shown) """
+
+    flights = flight_data["flights"]
+    html = [legacy_card_html(i, flights[i]) if i < len(flights) else "" for i in range(MAX_FLIGHTS)]
+    visible = [gr.update(visible=i < len(flights)) for i in range(MAX_FLIGHTS)]
+    return [gr.update(visible=True), *html, *visible]
+
+
+def legacy_booking(booking_data: dict) -> list:
+    """ Component outputs of the old update_booking_ui, one group of components per slot """
+
+    options = booking_data["booking_options"]
+    outputs = [gr.update(visible=i < len(options)) for i in range(MAX_BOOKING_OPTIONS)]
+    for i in range(MAX_BOOKING_OPTIONS):
+        row = UIManager.booking_row(i, options[i], booking_data) if i < len(options) else None
+        outputs.append(f"### Option {i+1}: {row[1]}<br>Price: {row[2]} {row[3]}<br>Flights: {row[4]}<br>Baggage: {row[5]}" if row else "")
+    outputs += [gr.update(visible=i < len(options)) for i in range(MAX_BOOKING_OPTIONS)]
+    outputs += [""] * MAX_BOOKING_OPTIONS
+    return outputs
+
+
+def paged_reset() -> list:
+    """ Component outputs of reset_flight_section with the paged lists """
+
+    hidden = gr.update(visible=False)
+    return [hidden, "", "Select a flight to see details", hidden, hidden, "", "Select a return flight to see details", "", hidden, gr.update(value=""), hidden]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--flights", type=int, nargs="+", default=[10, 20, 100, 500], help="listing sizes")
+    args = parser.parse_args()
+
+    print(f"{'event':<34}{'flights':>8}{'slots (bytes)':>15}{'paged (bytes)':>15}{'shown (slots/paged)':>22}")
+    for size in args.flights:
+        flight_data = listing(size)
+        old = payload_bytes(legacy_reset()) + payload_bytes(legacy_results(flight_data))
+        new = payload_bytes(paged_reset()) + payload_bytes([gr.update(visible=True), UIManager.flight_page(flight_data)])
+        print(f"{'new results (reset + first cards)':<34}{size:>8}{old:>15}{new:>15}{f'{min(size, MAX_FLIGHTS)}/{size}':>22}")
+    for size in args.flights:
+        flight_data = listing(size)
+        if size > PAGE_SIZE:
+            page = UIManager.on_flight_page_request(f"v:{size - PAGE_SIZE}", flight_data)
+            print(f"{'scroll: next page of cards':<34}{size:>8}{'-':>15}{payload_bytes([page]):>15}")
+    print(f"{'reset / done':<34}{'':>8}{payload_bytes(legacy_reset()):>15}{payload_bytes(paged_reset()):>15}")
+
+    booking_data = load_json_data("round_booking_option_deep_search.json")
+    options = len(booking_data["booking_options"])
+    print(f"{'booking options':<34}{options:>8}{payload_bytes(legacy_booking(booking_data)):>15}"
+          f"{payload_bytes([UIManager.booking_page(booking_data)]):>15}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Events and bytes per chat message: the nine-step .then() chain message.submit and go_button used
+to run vs. the single streaming submit handler.
+
+Run with: python -m benchmarks.ui_submit [--flights 12 100] [--history 10]
+
+Every step of the old chain was its own queued event: the browser uploaded the step's inputs and
+the server sent its outputs back. The new handler is one event whose two yields are sent as
+they happen; it is the app's own handle_submit, taken from the event create_travel_app wires to
+message.submit and run with that event's outputs, so only the agent is scripted here. Bytes are the JSON of the values in each direction as Gradio encodes them: gr.State
+values stay on the server and travel as null, components left out of a yield as no-op updates.
+The chatbot is counted in full every time it is sent (Gradio diffs a generator's later yields,
+so the streamed figure is an upper bound). The agent's reply is scripted: a turn that loads new
+flights and a chat-only turn, after `--history` earlier messages.
+"""
+import os
+import asyncio
+import argparse
+import gradio as gr
+from gradio.block_function import BlockFunction
+from benchmarks.ui_payload import listing, payload_bytes
+from frontend.components.ui_manager import UIManager, VIEW_OUTBOUND_CARDS
+
+# The agent module builds a Gemini client at import time, which needs a key even when unused
+os.environ.setdefault("google_api_key", "offline-benchmark")
+
+# Outputs of the old chain's reset step, in order; (name, is gr.State)
+FLIGHT_SECTION_OUTPUTS = [
+    ("current_view", True), ("initial_flight_payload", True), ("outbound_flights_state", True),
+    ("selected_outbound_index", False), ("return_flights_state", True), ("selected_return_index", False),
+    ("booking_data_state", True), ("flight_section", False), ("outbound_page", False),
+    ("outbound_flight_details_box", False), ("outbound_booking_options_button", False),
+    ("get_return_flights_button", False), ("return_page", False), ("return_flight_details_box", False),
+    ("booking_page", False), ("loader_group", False), ("loader_message", False), ("error_message", False),
+]
+STATES = {name for name, is_state in FLIGHT_SECTION_OUTPUTS if is_state}
+FLIGHT_SECTION = [name for name, _ in FLIGHT_SECTION_OUTPUTS]
+# Flight data the scripted agent returns for the current turn
+scripted_turn = {"flight_data": {}}
+
+
+def sent(values: dict) -> list:
+    """ What goes over the wire for named values: states as null """
+
+    return [None if name in STATES else value for name, value in values.items()]
+
+
+def reset_values() -> dict:
+    """ reset_flight_section, by output name """
+
+    hidden = gr.update(visible=False)
+    return dict(zip(FLIGHT_SECTION, [
+        VIEW_OUTBOUND_CARDS, {}, {}, "", {}, "", {}, hidden, "", "Select a flight to see details", hidden, hidden,
+        "", "Select a return flight to see details", "", hidden, gr.update(value=""), hidden,
+    ]))
+
+
+def agent_reply(history: list, flight_data: dict):
+    """ Scripted process_message result """
+
+    if flight_data.get("flights"):
+        return history + [{"role": "assistant", "content": "I've loaded the available flights in the panel to the right."}], flight_data, {"return_date": "2026-12-01"}
+    return history + [{"role": "assistant", "content": "Where would you like to fly from?"}], {}, None
+
+
+def legacy_chain(msg: str, history: list, flight_data: dict) -> list:
+    """ (bytes up, bytes down) of each event of the old .then() chain """
+
+    events = []
+    with_user = history + [{"role": "user", "content": msg}]
+    events.append(([msg, history], sent({"user_message_state": msg, "chatbot": with_user, "message": "",
+                                          "loader_group": gr.update(visible=True), "loader_message": gr.update(value="Fetching outbound flights..."),
+                                          "error_message": gr.update(visible=False)})))
+    history, flight_data, payload = agent_reply(with_user, flight_data)
+    events.append(([None, with_user, None], [history, None, None]))
+    if flight_data.get("flights"):
+        reset = reset_values()
+        reset.update({"initial_flight_payload": payload, "outbound_flights_state": flight_data})
+    else:
+        reset = {name: gr.update() for name in FLIGHT_SECTION}
+        reset.update({"current_view": VIEW_OUTBOUND_CARDS, "initial_flight_payload": {}, "outbound_flights_state": {}})
+        payload = {}
+    events.append(([None, None], sent(reset)))
+    events.append(([None, None], [gr.update(visible=True, value=flight_data["error"]) if flight_data.get("error") else gr.update(visible=False)]))
+    events.append(([None], list(UIManager.update_flight_interface(flight_data))))
+    has_return = bool(payload) and payload.get("return_date") is not None
+    events.append(([None], [gr.update(visible=bool(payload) and not has_return), gr.update(visible=has_return)]))
+    events.append(([None], list(UIManager.update_view(VIEW_OUTBOUND_CARDS))))
+    events.append(([], [gr.update(visible=False), gr.update(value="")]))
+    events.append(([], [gr.update(value=""), None]))
+    return [(payload_bytes(up), payload_bytes(down)) for up, down in events]
+
+
+def wired_submit() -> BlockFunction:
+    """ The travel app's message.submit event, with TravelAgent.process_message scripted by agent_reply """
+
+    from backend.agents.travel_agent import TravelAgent
+    from frontend.main import create_travel_app
+
+    async def process_message(self, message, history, thread_id):
+        return agent_reply(history, scripted_turn["flight_data"])
+
+    TravelAgent.process_message = process_message
+    demo = create_travel_app()
+    return next(fn for fn in demo.fns.values() if fn.name == "handle_submit")
+
+
+async def single_event(submit: BlockFunction, msg: str, history: list, flight_data: dict) -> list:
+    """ (bytes up, bytes down) of the app's handle_submit event: inputs once, then each of its yields """
+
+    scripted_turn["flight_data"] = flight_data
+    inputs = [None if isinstance(component, gr.State) else value for component, value in zip(submit.inputs, [msg, history, None])]
+    down = 0
+    async for updates in submit.fn(msg, history, "benchmark"):
+        down += payload_bytes(None if isinstance(component, gr.State) else updates.get(component, gr.update()) for component in submit.outputs)
+    return [(payload_bytes(inputs), down)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--flights", type=int, nargs="+", default=[12, 100], help="listing sizes of the turns that load flights")
+    parser.add_argument("--history", type=int, default=10, help="chat messages before this one")
+    args = parser.parse_args()
+
+    history = [{"role": "user" if i % 2 == 0 else "assistant", "content": f"Earlier message {i} about dates and airports."} for i in range(args.history)]
+    turns = [("chat only", {})] + [(f"new flights ({size})", listing(size)) for size in args.flights]
+    submit = wired_submit()
+    msg = "Flights from London to Paris on 1 December"
+    print(f"{'turn':<20}{'setup':<16}{'events':>8}{'bytes up':>10}{'bytes down':>12}")
+    for name, flight_data in turns:
+        for setup, events in (("9-step chain", legacy_chain(msg, history, flight_data)),
+                              ("single event", asyncio.run(single_event(submit, msg, history, flight_data)))):
+            print(f"{name:<20}{setup:<16}{len(events):>8}{sum(up for up, _ in events):>10}{sum(down for _, down in events):>12}")
+
+
+if __name__ == "__main__":
+    main()
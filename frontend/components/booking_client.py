@@ -0,0 +1,193 @@
+"""
+Booking redirect resolution.
+
+A booking option carries a `booking_request.post_data` blob; POSTing it to Google's
+/travel/clk/f endpoint answers with a meta-refresh page pointing at the airline or agency.
+BookingClient resolves these on the shared pooled client (shared_utils.http), so the connection
+to Google is kept alive across clicks and users, retries 429/5xx answers and network errors
+with exponential backoff, and resolves the two legs of a separate-ticket round trip
+concurrently. GOOGLE_TRAVEL_BASE_URL can point it at the local stand-in (benchmarks.standin).
+
+When the booking view opens, prefetch() resolves the cheapest options in the background with
+bounded concurrency. Resolutions are cached by a hash of the post_data for a short TTL, and a
+click on an option whose resolution is still running waits for it instead of posting again, so
+the link usually shows up at once. Failures are not cached; the click retries them.
+"""
+import os
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+import httpx
+from dotenv import load_dotenv
+from shared_utils.logger import get_logger
+from shared_utils.metrics import record_cache
+from shared_utils.http import get_client
+from frontend.utils import extract_redirect_url
+
+logger = get_logger()
+
+load_dotenv(override=True)
+
+GOOGLE_TRAVEL_BASE_URL = os.getenv("GOOGLE_TRAVEL_BASE_URL", "https://www.google.com")
+BOOKING_TIMEOUT = float(os.getenv("BOOKING_TIMEOUT", 10.0))
+BOOKING_RETRIES = int(os.getenv("BOOKING_RETRIES", 3))
+BOOKING_BACKOFF = float(os.getenv("BOOKING_BACKOFF", 0.5))
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+BOOKING_CACHE_TTL = float(os.getenv("BOOKING_CACHE_TTL", 120))
+BOOKING_CACHE_MAX_ENTRIES = int(os.getenv("BOOKING_CACHE_MAX_ENTRIES", 1024))
+BOOKING_PREFETCH_TOP_N = int(os.getenv("BOOKING_PREFETCH_TOP_N", 5))
+BOOKING_PREFETCH_CONCURRENCY = int(os.getenv("BOOKING_PREFETCH_CONCURRENCY", 4))
+
+# Configure headers to mimic a browser
+BROWSER_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/117.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+}
+
+
+def option_post_data(option: Dict) -> List[str]:
+    """ post_data of a booking option: both legs of separate tickets, else the together ticket """
+
+    if option.get("departing") and option.get("returning"):
+        legs = [option["departing"], option["returning"]]
+    else:
+        legs = [option.get("together", {})]
+    return [leg.get("booking_request", {}).get("post_data", "") for leg in legs if leg.get("booking_request", {}).get("post_data")]
+
+
+class BookingClient:
+    """ Resolves booking post_data into the partner's booking URL """
+
+    def __init__(
+        self,
+        base_url: str = GOOGLE_TRAVEL_BASE_URL,
+        timeout: float = BOOKING_TIMEOUT,
+        retries: int = BOOKING_RETRIES,
+        backoff: float = BOOKING_BACKOFF,
+        cache_ttl: float = BOOKING_CACHE_TTL,
+        cache_max_entries: int = BOOKING_CACHE_MAX_ENTRIES,
+    ):
+        self.url = f"{base_url.rstrip('/')}/travel/clk/f"
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.cache_ttl = cache_ttl
+        self.cache_max_entries = cache_max_entries
+        # post_data hash -> (expires_at, resolution task); a task is shared by prefetch and clicks
+        self._cache: "OrderedDict[str, Tuple[float, asyncio.Future]]" = OrderedDict()
+        self._prefetches: Set[asyncio.Task] = set()
+
+    async def _post(self, post_data_value: str) -> httpx.Response:
+        """ POST to the redirect endpoint, retrying RETRY_STATUSES and network errors """
+
+        client = get_client()
+        for attempt in range(self.retries + 1):
+            last_attempt = attempt == self.retries
+            try:
+                # The shared client does not follow redirects; requests.post, used before, did
+                response = await client.post(
+                    self.url, data={"u": post_data_value}, headers=BROWSER_HEADERS, timeout=self.timeout, follow_redirects=True
+                )
+                if response.status_code not in RETRY_STATUSES or last_attempt:
+                    return response
+                logger.warning("Booking redirect returned %s, retrying", response.status_code)
+            except httpx.TransportError as e:
+                if last_attempt:
+                    raise
+                logger.warning("Booking redirect failed (%s), retrying", e)
+            await asyncio.sleep(self.backoff * 2 ** attempt)
+
+    async def _fetch(self, post_data_value: str) -> Dict:
+        """ POST one post_data and turn the answer into a booking result """
+
+        try:
+            response = await self._post(post_data_value)
+        except httpx.HTTPError as e:
+            return {"success": False, "url": None, "message": f"Error during booking: {str(e)}. Possible network issue or Google blocking the request."}
+        if response.status_code != 200:
+            return {"success": False, "url": None, "message": f"Failed to initiate booking. Status code: {response.status_code}"}
+        redirect_url = extract_redirect_url(response.text)
+        if not redirect_url:
+            return {"success": False, "url": None, "message": "Failed to extract redirect URL from response."}
+        logger.debug("Redirect URL: %s", redirect_url)
+        return {"success": True, "url": redirect_url, "message": "Booking request processed successfully!"}
+
+    async def _resolve(self, post_data_value: str) -> Dict:
+        """ A cached or running resolution of this post_data, else a new one """
+
+        key = hashlib.sha256(post_data_value.encode()).hexdigest()
+        entry = self._cache.get(key)
+        if entry is not None:
+            expires_at, task = entry
+            # A running task belongs to its event loop; only finished ones can be shared across loops
+            if time.monotonic() < expires_at and (task.done() or task.get_loop() is asyncio.get_running_loop()):
+                record_cache("booking_redirect", True)
+                self._cache.move_to_end(key)
+                return task.result() if task.done() else await asyncio.shield(task)
+            del self._cache[key]
+        record_cache("booking_redirect", False)
+
+        task = asyncio.ensure_future(self._fetch(post_data_value))
+        self._cache[key] = (time.monotonic() + self.cache_ttl, task)
+        while len(self._cache) > self.cache_max_entries:
+            self._cache.popitem(last=False)
+
+        def forget_failure(done: asyncio.Future) -> None:
+            failed = done.cancelled() or done.exception() is not None or not done.result()["success"]
+            if failed and self._cache.get(key, (None, None))[1] is done:
+                del self._cache[key]
+
+        task.add_done_callback(forget_failure)
+        # Shielded: a cancelled click must not cancel a resolution other callers share
+        return await asyncio.shield(task)
+
+    async def book(self, post_data: str, booking_phone: str) -> Dict:
+        """
+        Resolve one booking option.
+        Returns a dict with:
+        - 'success': bool
+        - 'url': str or None (redirect URL if successful)
+        - 'message': str (success or error message)
+        """
+        if not post_data and not booking_phone:
+            return {"success": False, "url": None, "message": "No booking data available for this flight option"}
+        if not post_data:
+            return {"success": False, "url": None, "message": f"Booking phone number provided: {booking_phone}. Please visit the airline's website to complete your booking."}
+        return await self._resolve(post_data[2:] if post_data.startswith("u=") else post_data)
+
+    async def book_all(self, requests: List[Tuple[str, str]]) -> List[Dict]:
+        """ Resolve several (post_data, booking_phone) pairs concurrently, results in the same order """
+
+        return list(await asyncio.gather(*(self.book(post_data, phone) for post_data, phone in requests)))
+
+    def prefetch(self, post_data: List[str], concurrency: int = BOOKING_PREFETCH_CONCURRENCY) -> Optional[asyncio.Task]:
+        """ Start resolving post_data in the background, at most `concurrency` at a time; returns the task """
+
+        if not post_data:
+            return None
+        slots = asyncio.Semaphore(concurrency)
+
+        async def resolve(value: str) -> None:
+            async with slots:
+                await self.book(value, "")
+
+        task = asyncio.ensure_future(asyncio.gather(*(resolve(value) for value in post_data)))
+        # Keep a reference until done, the event loop only holds weak ones
+        self._prefetches.add(task)
+        task.add_done_callback(self._prefetches.discard)
+        return task
+
+
+_booking_client: Optional[BookingClient] = None
+
+
+def get_booking_client() -> BookingClient:
+    """ The process-wide BookingClient, configured from the environment """
+
+    global _booking_client
+    if _booking_client is None:
+        _booking_client = BookingClient()
+    return _booking_client
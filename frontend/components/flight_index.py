@@ -0,0 +1,68 @@
+"""
+Sort and filter index over a flight listing.
+
+Built once when a listing arrives: the listing is ingested into a columnar FlightTable and every
+sort order is precomputed, the default being "Best value" (see shared_utils.flight_ranking).
+Changing the panel's sort or filters then builds one boolean mask over the table's columns and
+keeps the flights of a precomputed order that pass, with no network call and no walking of the
+nested dicts.
+"""
+from typing import Dict, List, Optional
+import numpy as np
+from shared_utils.flight_table import FlightTable
+from shared_utils.flight_ranking import best_value_order
+
+SORT_BEST_VALUE = "Best value"
+SORT_PRICE = "Price"
+SORT_DURATION = "Duration"
+SORT_DEPARTURE = "Departure time"
+SORT_EMISSIONS = "CO₂ emissions"
+SORT_OPTIONS = [SORT_BEST_VALUE, SORT_PRICE, SORT_DURATION, SORT_DEPARTURE, SORT_EMISSIONS]
+# Table column each sort orders by
+SORT_COLUMNS = {SORT_PRICE: "price", SORT_DURATION: "total_duration", SORT_DEPARTURE: "departure", SORT_EMISSIONS: "carbon_emissions"}
+
+STOP_OPTIONS = ["Non-stop", "1 stop", "2+ stops"]
+# Local hour of the first departure: label -> [start, end)
+DEPARTURE_WINDOWS = {
+    "Night (00-05)": (0, 5),
+    "Morning (05-12)": (5, 12),
+    "Afternoon (12-18)": (12, 18),
+    "Evening (18-24)": (18, 24),
+}
+
+
+class FlightIndex:
+    """ Precomputed sort orders and filter attributes of one listing; flights are referred to by listing index """
+
+    def __init__(self, flight_data: Optional[Dict]):
+        self.table = FlightTable.from_listing(flight_data)
+        self.size = len(self.table)
+        self.airline_choices = sorted(self.table.airlines.values)
+        layovers = self.table.column("longest_layover")
+        self.longest_layover = int(layovers.max()) if self.size else 0
+        self.orders: Dict[str, np.ndarray] = {SORT_BEST_VALUE: best_value_order(self.table)}
+        self.orders.update({sort: self.table.argsort(column) for sort, column in SORT_COLUMNS.items()})
+
+    def order(
+        self,
+        sort: str = SORT_BEST_VALUE,
+        stops: Optional[List[str]] = None,
+        airlines: Optional[List[str]] = None,
+        windows: Optional[List[str]] = None,
+        max_layover_minutes: Optional[float] = None,
+    ) -> List[int]:
+        """
+        Listing indices in `sort` order that pass every filter; an empty filter lets everything through.
+        A flight passes the airline filter when all its legs are flown by the selected airlines.
+        """
+        stop_counts = [STOP_OPTIONS.index(label) for label in stops or [] if label in STOP_OPTIONS]
+        keep = self.table.mask(
+            airlines=airlines or None,
+            departure_windows=[DEPARTURE_WINDOWS[label] for label in windows if label in DEPARTURE_WINDOWS] if windows else None,
+            max_layover=max_layover_minutes,
+        )
+        if stop_counts:
+            # The last option, "2+ stops", stands for two or more
+            keep &= np.isin(np.minimum(self.table.column("stops"), len(STOP_OPTIONS) - 1), stop_counts)
+        order = self.orders.get(sort, self.orders[SORT_BEST_VALUE])
+        return order[keep[order]].tolist()
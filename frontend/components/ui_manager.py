@@ -1,158 +1,229 @@
-import requests
+import os
+import json
+import math
+import uuid
+import httpx
 import gradio as gr
-from typing import List, Dict
+from typing import Dict, List, Optional, Tuple
 from shared_utils.logger import get_logger
+from shared_utils.tracing import traced, inject_headers
+from shared_utils.profiling import profiled
+from shared_utils.http import get_client
 from frontend.utils import format_duration, build_details, ordinal
+from frontend.components.flight_index import FlightIndex, SORT_BEST_VALUE
+from frontend.components.booking_client import get_booking_client, option_post_data, BOOKING_PREFETCH_TOP_N
+from backend.utils import BACKEND_API_URL
 
 logger = get_logger()
 
-MAX_FLIGHTS = 20
-MAX_BOOKING_OPTIONS = 20
+# Rows per page sent to the browser; later pages are fetched as the user scrolls
+PAGE_SIZE = 20
 VIEW_OUTBOUND_CARDS = "outbound cards"
 VIEW_RETURN_CARDS = "return cards"
 VIEW_OUTBOUND_DETAILS = "outbound details"
 VIEW_RETURN_DETAILS = "return details"
 VIEW_BOOKING = "booking"
 PLACEHOLDER_IMAGE_URL = "https://via.placeholder.com/32"
-BASE_URL = "http://localhost:8000/api"
+BASE_URL = BACKEND_API_URL
+# Events of one kind Gradio runs at once. The handlers that call the backend are async, so waiting
+# clicks hold no worker thread; Gradio's default of 1 per event would queue them
+UI_CONCURRENCY_LIMIT = int(os.getenv("UI_CONCURRENCY_LIMIT", 64))
+# Jobs Gradio runs at once across all events (every .then() step is an event of its own); kept above
+# UI_CONCURRENCY_LIMIT so a burst of one event cannot take every slot from the others
+UI_MAX_THREADS = int(os.getenv("UI_MAX_THREADS", UI_CONCURRENCY_LIMIT + 40))
 
 class UIManager:
     @staticmethod
-    def get_card_html(idx: int, flight: Dict, selected: bool = False) -> str:
-        """ Generate HTML for a flight card """
+    def card_row(idx: int, flight: Dict) -> List:
+        """ Compact card fields in the order the list script reads them: [index, from, to, price, duration, stops, departs, [[logo, airline], ...]] """
 
-        first = flight["flights"][0] if flight.get("flights") else {}
-        last = flight["flights"][-1] if flight.get("flights") else {}
-        stops = len(flight.get("flights", [])) - 1
+        legs = flight.get("flights", [])
+        first = legs[0] if legs else {}
+        last = legs[-1] if legs else {}
+        stops = len(legs) - 1
         stops_text = f"{stops} stop{'s' if stops != 1 else ''}" if stops > 0 else "Non-stop"
-        logos = "".join(
-            f'<img src="{f.get("airline_logo", "")}"'
-            f'title="{f.get("airline", "")}"'
-            f' onerror="this.src=\'{PLACEHOLDER_IMAGE_URL}\'">'
-            for f in flight.get("flights", [])
+        return [
+            idx,
+            first.get("departure_airport", {}).get("id", ""),
+            last.get("arrival_airport", {}).get("id", ""),
+            flight.get("price", "N/A"),
+            format_duration(flight.get("total_duration")),
+            stops_text,
+            first.get("departure_airport", {}).get("time", "N/A"),
+            [[leg.get("airline_logo", ""), leg.get("airline", "")] for leg in legs],
+        ]
+
+    @staticmethod
+    def page(rows: List, total: int, offset: int, version: Optional[str]) -> str:
+        """ One page of a list as compact JSON; the version lets the browser drop pages of an older list """
+
+        return json.dumps(
+            {"v": version or uuid.uuid4().hex[:8], "total": total, "offset": offset, "rows": rows},
+            separators=(",", ":"),
+            ensure_ascii=False,
         )
-        selected_class = "selected" if selected else ""
-        departure_time = first.get('departure_airport', {}).get('time', 'N/A')
-        return f"""
-        <div class="card card-container {selected_class}" id="card-{idx}">
-            <div class="logo-chain">{logos}</div>
-            <div class="route">{first.get('departure_airport', {}).get('id', '')} → {last.get('arrival_airport', {}).get('id', '')}</div>
-            <div class="price">₹{flight.get('price', 'N/A')}</div>
-            <div class="duration">{format_duration(flight.get('total_duration'))} total</div>
-            <div class="stops">{stops_text}</div>
-            <div class="departure-time">Departs: {departure_time}</div>
-        </div>
-        """
 
     @staticmethod
-    def update_cards(selected: int, flight_data: Dict) -> List[str]:
-        """ Update flight cards HTML, highlighting the selected card """
+    def parse_request(value: Optional[str]) -> Tuple[Optional[str], int]:
+        """ Split a "version:number[:nonce]" request written by the list script """
 
-        if selected is not None:
-            logger.info(f"Selected {ordinal(selected + 1)} card, updating highlights")
-        else:
-            logger.info("Reloading flight cards")
+        try:
+            version, number = value.split(":")[:2]
+            return version, int(number)
+        except (AttributeError, ValueError):
+            return None, -1
+
+    @staticmethod
+    def selection_index(value: Optional[str]) -> int:
+        """ Card index recorded by the browser's selection textbox, -1 when nothing is selected """
+
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return -1
+
+    @staticmethod
+    def flight_page(flight_data: Dict, offset: int = 0, version: Optional[str] = None, order: Optional[List[int]] = None) -> str:
+        """ PAGE_SIZE flight cards starting at `offset` of `order` (listing order by default), or "" to clear the list """
 
         flights = flight_data.get("flights", []) if flight_data else []
-        
-        html_updates = []
-        for idx in range(MAX_FLIGHTS):
-            if idx < len(flights):
-                html_updates.append(UIManager.get_card_html(idx, flights[idx], idx == selected))
-            else:
-                html_updates.append("")
-        return html_updates
+        if not flights:
+            return ""
+        if order is None:
+            order = range(len(flights))
+        rows = [UIManager.card_row(idx, flights[idx]) for idx in order[offset:offset + PAGE_SIZE]]
+        return UIManager.page(rows, len(order), offset, version)
+
+    @staticmethod
+    def on_flight_page_request(request: str, flight_data: Dict, order: Optional[List[int]] = None):
+        """ Next page of cards the browser asked for while scrolling """
+
+        version, offset = UIManager.parse_request(request)
+        if version is None or offset < 0:
+            return gr.update()
+        return UIManager.flight_page(flight_data, offset, version, order)
 
     @staticmethod
-    def update_flight_interface(flight_data: Dict):
-        """ Update flight interface visibility and cards based on flight data """
+    def update_flight_interface(flight_data: Dict, order: Optional[List[int]] = None):
+        """ Update flight interface visibility and send the first page of cards """
 
         flights = flight_data.get("flights", []) if flight_data else []
         if not flights:
-            return gr.update(visible=False), *[""]*MAX_FLIGHTS, *[gr.update(visible=False)]*MAX_FLIGHTS
-        
+            return gr.update(visible=False), ""
+
         if flights[0].get("departure_token"):
             logger.info("displaying return flights")
         else:
             logger.info("displaying outbound flights")
+        return gr.update(visible=True), UIManager.flight_page(flight_data, order=order)
 
-        visible = bool(flights)
-        html_updates = []
-        visible_updates = []
-        for idx in range(MAX_FLIGHTS):
-            if idx < len(flights):
-                html_updates.append(UIManager.get_card_html(idx, flights[idx]))
-                visible_updates.append(gr.update(visible=True))
-            else:
-                html_updates.append("")
-                visible_updates.append(gr.update(visible=False))
-        return gr.update(visible=visible), *html_updates, *visible_updates
+    @staticmethod
+    def index_listing(flight_data: Dict):
+        """ Precompute the sort/filter index of a new listing and reset the panel's controls to it """
+
+        index = FlightIndex(flight_data)
+        # The layover slider starts at the listing's longest layover, i.e. no filtering
+        longest_layover = max(1, math.ceil(index.longest_layover / 60))
+        return (
+            index,  # index state
+            index.order(),  # order state: best value, no filters
+            gr.update(value=SORT_BEST_VALUE),  # sort
+            gr.update(value=[]),  # stops
+            gr.update(choices=index.airline_choices, value=[]),  # airlines
+            gr.update(value=[]),  # departure windows
+            gr.update(maximum=longest_layover, value=longest_layover),  # max layover (hours)
+        )
+
+    @staticmethod
+    def show_listing(flight_data: Dict):
+        """ A new listing: panel visibility, the first page in best-value order, then everything index_listing returns """
+
+        listing = UIManager.index_listing(flight_data)
+        return (*UIManager.update_flight_interface(flight_data, listing[1]), *listing)
+
+    @staticmethod
+    def on_listing_controls(sort: str, stops: List[str], airlines: List[str], windows: List[str], max_layover: float,
+                            flight_data: Dict, index: Optional[FlightIndex], selected: str):
+        """ Re-order the cards for the panel's sort and filters; the selection is dropped when it is filtered out """
+
+        if index is None:
+            return None, gr.update(), gr.update()
+        # At the slider's maximum every layover passes, including ones rounded down to it
+        max_layover_minutes = None if max_layover is None or max_layover >= math.ceil(index.longest_layover / 60) else max_layover * 60
+        order = index.order(sort, stops, airlines, windows, max_layover_minutes)
+        logger.debug("Sort %s with filters kept %d of %d flights", sort, len(order), index.size)
+        selection = UIManager.selection_index(selected)
+        return order, UIManager.flight_page(flight_data, order=order), "" if selection >= 0 and selection not in order else gr.update()
 
     @staticmethod
-    def update_booking_ui(booking_data: Dict):
-        """ Update booking options UI based on booking data """
+    def booking_order(booking_data: Dict) -> List[int]:
+        """ Booking option indices sorted by price ascending, keeping 'N/A' last """
 
-        logger.info(f"Loading booking options...")
-        # logger.info("Booking data received", extra={"extra_data": booking_data})
         booking_options = booking_data.get("booking_options", []) if booking_data else []
 
-        # 🟢 Sort booking options by price ascending, keeping 'N/A' last
-        def safe_price(option):
-            price = option.get("together", {}).get("price", "N/A")
+        def safe_price(idx):
+            price = booking_options[idx].get("together", {}).get("price", "N/A")
             try:
                 return float(price)
             except (ValueError, TypeError):
                 return float('inf')
 
-        booking_options = sorted(booking_options, key=safe_price)
+        return sorted(range(len(booking_options)), key=safe_price)
 
-        booking_groups_updates = []
-        info_md_updates = []
-        booking_button_updates = []
-        booking_url_updates = []
-        
-        for i in range(MAX_BOOKING_OPTIONS):
-            if i < len(booking_options):
-                option = booking_options[i].get("together", {})
-                book_with = option.get("book_with", "Unknown")
-                price = option.get("price", "N/A")
-                currency = booking_data.get("search_parameters", {}).get("currency", "INR") if booking_data else "INR"
-                flight_numbers = ', '.join(option.get("marketed_as", []))
-                single_ticket = "together" in booking_data.get("baggage_prices", {})
-
-                if single_ticket:
-                    baggage_data = booking_data.get("baggage_prices", {})
-                    together = baggage_data.get("together", [])
-                    baggage = ', '.join(together)
-                else:
-                    baggage_data = booking_data.get("baggage_prices", {})
-                    departing = baggage_data.get("departing", [])
-                    returning = baggage_data.get("returning", [])
-                    baggage = ', '.join(departing) + " | " + ', '.join(returning)
-
-                info = (
-                    f"### Option {i+1}: {book_with}<br>"
-                    f"Price: {price} {currency}<br>"
-                    f"Flights: {flight_numbers}<br>"
-                    f"Baggage: {baggage}"
-                )
-                booking_groups_updates.append(gr.update(visible=True))
-                info_md_updates.append(info)
-                booking_button_updates.append(gr.update(visible=True))
-                booking_url_updates.append("")
-            else:
-                booking_groups_updates.append(gr.update(visible=False))
-                info_md_updates.append("")
-                booking_button_updates.append(gr.update(visible=False))
-                booking_url_updates.append("")
-        
-        return (booking_groups_updates + info_md_updates + booking_button_updates + booking_url_updates)
+    @staticmethod
+    def booking_row(idx: int, option: Dict, booking_data: Dict) -> List:
+        """ Compact booking option fields: [index, book_with, price, currency, flight numbers, baggage] """
+
+        together = option.get("together", {})
+        baggage_data = booking_data.get("baggage_prices", {})
+        if "together" in baggage_data:
+            baggage = ', '.join(baggage_data.get("together", []))
+        else:
+            baggage = ', '.join(baggage_data.get("departing", [])) + " | " + ', '.join(baggage_data.get("returning", []))
+        return [
+            idx,
+            together.get("book_with", "Unknown"),
+            together.get("price", "N/A"),
+            booking_data.get("search_parameters", {}).get("currency", "INR"),
+            ', '.join(together.get("marketed_as", [])),
+            baggage,
+        ]
+
+    @staticmethod
+    def booking_page(booking_data: Dict, offset: int = 0, version: Optional[str] = None) -> str:
+        """ PAGE_SIZE booking options (cheapest first) starting at `offset`, or "" to clear the list """
+
+        booking_options = booking_data.get("booking_options", []) if booking_data else []
+        if not booking_options:
+            return ""
+        order = UIManager.booking_order(booking_data)
+        rows = [UIManager.booking_row(idx, booking_options[idx], booking_data) for idx in order[offset:offset + PAGE_SIZE]]
+        return UIManager.page(rows, len(order), offset, version)
+
+    @staticmethod
+    def on_booking_page_request(request: str, booking_data: Dict):
+        """ Next page of booking options the browser asked for while scrolling """
+
+        version, offset = UIManager.parse_request(request)
+        if version is None or offset < 0:
+            return gr.update()
+        return UIManager.booking_page(booking_data, offset, version)
 
-    
     @staticmethod
-    def get_flight_details(selected: int, flight_data: Dict, params: Dict):
+    async def update_booking_ui(booking_data: Dict) -> str:
+        """ Send the first page of booking options and start resolving the booking links of the cheapest ones """
+
+        logger.info("Loading booking options...")
+        booking_options = booking_data.get("booking_options", []) if booking_data else []
+        top = UIManager.booking_order(booking_data)[:BOOKING_PREFETCH_TOP_N]
+        get_booking_client().prefetch([post_data for idx in top for post_data in option_post_data(booking_options[idx])])
+        return UIManager.booking_page(booking_data)
+
+    @staticmethod
+    def get_flight_details(selected: str, flight_data: Dict, params: Dict):
         """ Get flight details view based on selected flight and trip type """
 
+        selected = UIManager.selection_index(selected)
         next_view = ""
         flights = flight_data.get("flights", []) if flight_data else []
         if params.get("return_date"):
@@ -170,15 +241,18 @@ class UIManager:
                 return VIEW_OUTBOUND_CARDS, "Invalid flight selection"
             else:
                 return VIEW_RETURN_CARDS, "Invalid flight selection"
-        logger.info(f"Showing flight details for {ordinal(selected + 1)} flight")
+        logger.info("Showing flight details for %s flight", ordinal(selected + 1))
 
         details = build_details(selected, flights)
         return next_view, details
 
     @staticmethod
-    def on_get_return_flights(selected: int, flight_data: Dict, initial_payload: Dict):
+    @profiled("ui.return_flights")
+    @traced("ui.return_flights")
+    async def on_get_return_flights(selected: str, flight_data: Dict, initial_payload: Dict):
         """ Fetch return flights based on selected outbound flight """
 
+        selected = UIManager.selection_index(selected)
         flights = flight_data.get("flights", []) if flight_data else []
         
         if selected < 0 or selected >= len(flights):
@@ -187,11 +261,11 @@ class UIManager:
         
         departure_token = flights[selected].get("departure_token", "")
         if not departure_token:
-            logger.error(f"No departure token found for the {ordinal(selected + 1)} flight.")
+            logger.error("No departure token found for the %s flight.", ordinal(selected + 1))
             return VIEW_RETURN_CARDS, {"error": f"No departure token available for {ordinal(selected + 1)} flight"}
         
-        logger.info(f"Selected flight departure token: {departure_token}")
-        logger.info(f"Fetching return flights for the {ordinal(selected + 1)} flight")
+        logger.debug("Selected flight departure token: %s", departure_token)
+        logger.info("Fetching return flights for the %s flight", ordinal(selected + 1))
         
         departure_input = {
             **initial_payload,
@@ -199,19 +273,22 @@ class UIManager:
         }
 
         try:
-            response = requests.get(f"{BASE_URL}/return-flights", params=departure_input, timeout=90)
+            response = await get_client().get(f"{BASE_URL}/return-flights", params=departure_input, headers=inject_headers())
             response.raise_for_status()
             return_flight_data = response.json()
             logger.info("Return flights loaded")
             return VIEW_RETURN_CARDS, return_flight_data
-        except requests.RequestException as e:
-            logger.error(f"Error fetching return flights: {e}")
+        except httpx.HTTPError as e:
+            logger.error("Error fetching return flights: %s", e)
             return VIEW_RETURN_CARDS, {"error": f"Failed to fetch return flights: {str(e)}"}
 
     @staticmethod
-    def on_booking_options(selected: int, flight_data: Dict, initial_payload: Dict):
+    @profiled("ui.booking_options")
+    @traced("ui.booking_options")
+    async def on_booking_options(selected: str, flight_data: Dict, initial_payload: Dict):
         """ Fetch booking options for the selected flight """
-        
+
+        selected = UIManager.selection_index(selected)
         flights = flight_data.get("flights", []) if flight_data else []
         
         error_view = ""
@@ -224,11 +301,11 @@ class UIManager:
 
         booking_token = flights[selected].get("booking_token", "")
         if not booking_token:
-            logger.error(f"No booking token found for the {ordinal(selected + 1)} flight.")
+            logger.error("No booking token found for the %s flight.", ordinal(selected + 1))
             return VIEW_RETURN_DETAILS, {"error": f"No booking token available for {ordinal(selected + 1)} flight"}
 
-        logger.info(f"Selected flight booking token: {booking_token}")
-        logger.info(f"Fetching booking options for {ordinal(selected + 1)} flight")
+        logger.debug("Selected flight booking token: %s", booking_token)
+        logger.info("Fetching booking options for %s flight", ordinal(selected + 1))
 
         booking_input = {
             **initial_payload,
@@ -236,13 +313,13 @@ class UIManager:
         }
 
         try:
-            response = requests.get(f"{BASE_URL}/bookingdata", params=booking_input, timeout=90)
+            response = await get_client().get(f"{BASE_URL}/bookingdata", params=booking_input, headers=inject_headers())
             response.raise_for_status()
             booking_data = response.json()
             logger.info("Booking options loaded")
             return VIEW_BOOKING, booking_data
-        except requests.RequestException as e:
-            logger.error(f"Error fetching booking options: {e}")
+        except httpx.HTTPError as e:
+            logger.error("Error fetching booking options: %s", e)
             return VIEW_BOOKING, {"error": f"Failed to fetch booking options: {str(e)}"}
 
     @staticmethod
@@ -1,12 +1,20 @@
+import json
 import gradio as gr
-from frontend.utils import book_flight
-from frontend.components.ui_manager import UIManager
+from html import escape
+from frontend.components.booking_client import get_booking_client
+from frontend.components.ui_manager import UIManager, PLACEHOLDER_IMAGE_URL, UI_CONCURRENCY_LIMIT, UI_MAX_THREADS
+from frontend.components.flight_index import SORT_OPTIONS, SORT_BEST_VALUE, STOP_OPTIONS, DEPARTURE_WINDOWS
 from backend.agents.travel_agent import TravelAgent
-from backend.transcript.main import AssemblyAITranscriber
+from backend.transcript.feed import AudioFeed
+from backend.transcript.sessions import TRANSCRIBE_AUDIO_INPUT, TranscriberBusy, TranscriberManager
 from frontend.utils import ordinal
+from shared_utils.tracing import traced, set_service_name
+from shared_utils.profiling import profiled
+from shared_utils.logger import get_logger
+
+logger = get_logger()
+set_service_name("frontend")
 
-MAX_FLIGHTS = 20
-MAX_BOOKING_OPTIONS = 20
 VIEW_OUTBOUND_CARDS = "outbound cards"
 VIEW_RETURN_CARDS = "return cards"
 VIEW_OUTBOUND_DETAILS = "outbound details"
@@ -168,17 +176,21 @@ CSS = """
     margin-bottom: 4px;
 }
 
-/* Click overlay for cards */
-.click-overlay {
-    position: absolute !important;
-    top: 0 !important;
-    left: 0 !important;
-    right: 0 !important;
-    bottom: 0 !important;
-    background: transparent !important;
-    border: none !important;
+/* Cards are selected in the browser (see HEAD) */
+.card-container {
     cursor: pointer !important;
-    z-index: 10 !important;
+}
+
+/* Holds the selected card index written by the card click script */
+.selection-input {
+    display: none !important;
+}
+
+/* View Flight stays dimmed until a card of its list is selected */
+body:not([data-outbound-selected]) #outbound-view-button,
+body:not([data-return-selected]) #return-view-button {
+    opacity: 0.5 !important;
+    pointer-events: none !important;
 }
 
 .flight-view {
@@ -214,7 +226,7 @@ CSS = """
 }
 
 /* Primary buttons styling */
-#confirm-button, .primary-btn {
+#confirm-button, #outbound-view-button, #return-view-button, .primary-btn {
     background: var(--flight-accent) !important;
     color: white !important;
     border: none !important;
@@ -225,7 +237,7 @@ CSS = """
     min-width: 120px !important;
 }
 
-#confirm-button:hover, .primary-btn:hover {
+#confirm-button:hover, #outbound-view-button:hover, #return-view-button:hover, .primary-btn:hover {
     background: var(--flight-accent-hover) !important;
     transform: translateY(-1px) !important;
     box-shadow: var(--flight-shadow) !important;
@@ -299,11 +311,9 @@ CSS = """
     max-height: none !important;
 }
 
-/* Card grid styling */
+/* Card list styling: .cards-grid scrolls, the script in HEAD lays out the cards in view */
 .cards-grid {
-    display: grid !important;
-    grid-template-columns: repeat(auto-fit, minmax(300px, 1fr)) !important;
-    gap: 1rem !important;
+    display: block !important;
     padding-bottom: 1rem !important;
     overflow-y: auto !important;
     overflow-x: hidden !important;
@@ -311,6 +321,53 @@ CSS = """
     min-height: calc(500px - 120px) !important;
 }
 
+.virtual-list {
+    position: relative !important;
+}
+
+/* Rows are CARD_HEIGHT (190px) apart: 174px cards plus a 16px gap */
+.virtual-window {
+    position: absolute !important;
+    top: 0 !important;
+    left: 0 !important;
+    right: 0 !important;
+    display: grid !important;
+    grid-auto-rows: 174px !important;
+    gap: 16px !important;
+}
+
+.virtual-window .card-container {
+    height: 174px !important;
+    margin: 0 !important;
+    padding: 0.75rem !important;
+    box-sizing: border-box !important;
+    overflow: hidden !important;
+}
+
+.card-container.placeholder {
+    display: flex !important;
+    align-items: center !important;
+    justify-content: center !important;
+    color: var(--flight-text-secondary) !important;
+}
+
+.virtual-window .no-results {
+    grid-column: 1 / -1 !important;
+    padding: 2rem 0 !important;
+    text-align: center !important;
+    color: var(--flight-text-secondary) !important;
+}
+
+/* Sort & filter controls sit above a card list, which takes the remaining height */
+.listing-controls {
+    flex: 0 0 auto !important;
+}
+
+.flight-view:has(.listing-controls) .cards-grid {
+    flex: 1 1 auto !important;
+    min-height: 0 !important;
+}
+
 /* Button row styling */
 .button-row {
     display: flex !important;
@@ -367,24 +424,25 @@ CSS = """
     padding: 1rem !important;
     margin-bottom: 1rem !important;
     overflow: visible !important;
+    color: var(--flight-text-secondary) !important;
 }
 
-.booking-option .markdown:first-child {
+.booking-option .booking-title {
     font-size: 1.1em !important;
     font-weight: bold !important;
     color: var(--flight-text) !important;
     margin-bottom: 0.5rem !important;
 }
 
-.booking-option .button {
-    width: 100% !important;
-}
-
-.booking-option .markdown:last-child {
+.booking-option .booking-result {
     margin-top: 1rem !important;
     color: var(--flight-text-secondary) !important;
 }
 
+.booking-option .booking-result a {
+    color: var(--flight-accent) !important;
+}
+
 .booking-option .button-row {
     display: flex !important;
     gap: 0.75rem !important;
@@ -406,7 +464,6 @@ CSS = """
     }
 
     .cards-grid {
-        grid-template-columns: 1fr !important;
         max-height: 350px !important;
         min-height: calc(80vh - 120px) !important;
     }
@@ -415,7 +472,7 @@ CSS = """
         max-height: none !important;
     }
 
-    #confirm-button, .primary-btn, .secondary-btn {
+    #confirm-button, #outbound-view-button, #return-view-button, .primary-btn, .secondary-btn {
         min-width: 100px !important;
         padding: 0.5rem 1rem !important;
     }
@@ -433,25 +490,256 @@ CSS = """
 }
 """
 
+# The flight and booking lists live in the browser. The server sends them as compact JSON pages
+# (see UIManager.flight_page) through hidden textboxes; the script below keeps the loaded rows,
+# renders only the cards in view, and asks for the next page when the user scrolls towards rows
+# that are not loaded yet. Card selection never leaves the browser until "View Flight".
+HEAD = """
+<script>
+const CARD_HEIGHT = 190;
+const CARD_MIN_WIDTH = 300;
+const PLACEHOLDER_IMAGE_URL = "__PLACEHOLDER_IMAGE_URL__";
+const lists = {};
+
+function listState(list) {
+    return lists[list] || (lists[list] = { version: null, total: 0, rows: [], selected: -1, pending: null, results: {} });
+}
+
+function escapeHtml(value) {
+    return String(value ?? "").replace(/[&<>"']/g, (c) => ({ "&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#39;" })[c]);
+}
+
+function sendToServer(elemId, value) {
+    const input = document.querySelector(`#${elemId} textarea`);
+    if (!input) return;
+    input.value = value;
+    input.dispatchEvent(new Event("input", { bubbles: true }));
+}
+
+// Rows are kept sparse, so jumping down the scrollbar loads the page in view, not every page before it
+function requestPage(list, offset) {
+    const state = listState(list);
+    if (!state.version || state.pending !== null || offset >= state.total) return;
+    state.pending = offset;
+    sendToServer(`${list}-page-request`, `${state.version}:${offset}`);
+}
+
+// Server -> browser: a page of rows, or "" to clear the list
+function receivePage(list, value) {
+    const state = listState(list);
+    if (!value) {
+        Object.assign(state, { version: null, total: 0, rows: [], pending: null, results: {} });
+    } else {
+        const page = JSON.parse(value);
+        if (page.v !== state.version) {
+            Object.assign(state, { version: page.v, rows: [], pending: null, results: {} });
+            // A new listing or a new sort/filter starts from the top
+            const scroller = document.getElementById(`${list}-cards`);
+            if (scroller) scroller.scrollTop = 0;
+        }
+        page.rows.forEach((row, i) => { state.rows[page.offset + i] = row; });
+        state.total = page.total;
+        state.pending = null;
+    }
+    scheduleRender(list);
+}
+
+// Row layout: [index, from, to, price, duration, stops, departs, [[logo, airline], ...]]
+function cardHtml(row, selected) {
+    if (!row) return '<div class="card card-container placeholder">Loading…</div>';
+    const [index, from, to, price, duration, stops, departs, logos] = row;
+    const images = logos.map(([logo, airline]) =>
+        `<img src="${escapeHtml(logo)}" title="${escapeHtml(airline)}" onerror="this.src='${PLACEHOLDER_IMAGE_URL}'">`
+    ).join("");
+    return `<div class="card card-container${selected ? " selected" : ""}" data-index="${index}">
+        <div class="logo-chain">${images}</div>
+        <div class="route">${escapeHtml(from)} → ${escapeHtml(to)}</div>
+        <div class="price">₹${escapeHtml(price)}</div>
+        <div class="duration">${escapeHtml(duration)} total</div>
+        <div class="stops">${escapeHtml(stops)}</div>
+        <div class="departure-time">Departs: ${escapeHtml(departs)}</div>
+    </div>`;
+}
+
+// Row layout: [index, book_with, price, currency, flight numbers, baggage]
+function bookingHtml(row, position, result) {
+    const [index, bookWith, price, currency, flights, baggage] = row;
+    return `<div class="booking-option" data-index="${index}">
+        <div class="booking-title">Option ${position + 1}: ${escapeHtml(bookWith)}</div>
+        <div>Price: ${escapeHtml(price)} ${escapeHtml(currency)}</div>
+        <div>Flights: ${escapeHtml(flights)}</div>
+        <div>Baggage: ${escapeHtml(baggage)}</div>
+        <div class="button-row"><button class="primary-btn book-button" data-index="${index}">Book</button></div>
+        <div class="booking-result">${result || ""}</div>
+    </div>`;
+}
+
+function renderCards(list) {
+    const scroller = document.getElementById(`${list}-cards`);
+    const root = scroller && scroller.querySelector(".virtual-list");
+    if (!root) return;
+    const state = listState(list);
+    const columns = Math.max(1, Math.floor(root.clientWidth / CARD_MIN_WIDTH));
+    const rowCount = Math.ceil(state.total / columns);
+    // Only the rows in view (plus a couple either side) are in the DOM
+    const visibleTop = Math.max(0, scroller.getBoundingClientRect().top - root.getBoundingClientRect().top);
+    const first = Math.max(0, Math.floor(visibleTop / CARD_HEIGHT) - 2);
+    const last = Math.min(rowCount, Math.ceil((visibleTop + scroller.clientHeight) / CARD_HEIGHT) + 2);
+    const cards = [];
+    let missing = -1;
+    for (let position = first * columns; position < Math.min(state.total, last * columns); position++) {
+        const row = state.rows[position];
+        if (row === undefined && missing < 0) missing = position;
+        cards.push(cardHtml(row, row !== undefined && row[0] === state.selected));
+    }
+    root.style.height = `${rowCount * CARD_HEIGHT}px`;
+    const view = root.querySelector(".virtual-window");
+    view.style.transform = `translateY(${first * CARD_HEIGHT}px)`;
+    view.style.gridTemplateColumns = `repeat(${columns}, minmax(0, 1fr))`;
+    view.innerHTML = state.version && state.total === 0 ? '<div class="no-results">No flights match these filters</div>' : cards.join("");
+    if (missing >= 0) requestPage(list, missing);
+}
+
+function renderBooking() {
+    const scroller = document.getElementById("booking-content");
+    const root = scroller && scroller.querySelector(".virtual-list");
+    if (!root) return;
+    const state = listState("booking");
+    root.innerHTML = state.rows.map((row, position) => bookingHtml(row, position, state.results[row[0]])).join("");
+    // Booking rows vary in height, so they are appended page by page rather than windowed
+    if (scroller.scrollTop + scroller.clientHeight >= scroller.scrollHeight - CARD_HEIGHT) requestPage("booking", state.rows.length);
+}
+
+const renderQueued = new Set();
+function scheduleRender(list) {
+    if (renderQueued.has(list)) return;
+    renderQueued.add(list);
+    requestAnimationFrame(() => {
+        renderQueued.delete(list);
+        list === "booking" ? renderBooking() : renderCards(list);
+    });
+}
+
+// Lists hidden with their view have no width; render again once they are shown or resized
+const resizeObserver = new ResizeObserver((entries) => {
+    entries.forEach((entry) => scheduleRender(entry.target.dataset.list));
+});
+new MutationObserver(() => {
+    document.querySelectorAll(".virtual-list:not([data-observed])").forEach((root) => {
+        root.dataset.observed = "true";
+        resizeObserver.observe(root);
+    });
+}).observe(document.documentElement, { childList: true, subtree: true });
+
+document.addEventListener("scroll", (event) => {
+    const id = event.target.id;
+    if (id === "outbound-cards" || id === "return-cards") scheduleRender(id.replace("-cards", ""));
+    if (id === "booking-content") scheduleRender("booking");
+}, true);
+
+function highlightCard(list, value) {
+    const state = listState(list);
+    state.selected = value === null || value === undefined || value === "" ? -1 : Number(value);
+    document.querySelectorAll(`#${list}-cards .card[data-index]`).forEach((card) => {
+        card.classList.toggle("selected", Number(card.dataset.index) === state.selected);
+    });
+    document.body.toggleAttribute(`data-${list}-selected`, state.selected >= 0);
+}
+
+// Server -> browser: the outcome of a Book click, {"v", "index", "html"}
+function receiveBookingResult(value) {
+    if (!value) return;
+    const result = JSON.parse(value);
+    const state = listState("booking");
+    if (result.v !== state.version) return;
+    state.results[result.index] = result.html;
+    scheduleRender("booking");
+}
+
+document.addEventListener("click", (event) => {
+    const book = event.target.closest(".book-button[data-index]");
+    if (book) {
+        const state = listState("booking");
+        state.results[book.dataset.index] = "Processing booking…";
+        scheduleRender("booking");
+        // The timestamp makes a repeated click on the same option a new value
+        sendToServer("booking-request", `${state.version}:${book.dataset.index}:${Date.now()}`);
+        return;
+    }
+    const card = event.target.closest(".card[data-index]");
+    const scroller = card && card.closest("#outbound-cards, #return-cards");
+    if (!scroller) return;
+    const list = scroller.id.replace("-cards", "");
+    highlightCard(list, card.dataset.index);
+    const input = document.querySelector(`#${list}-selection textarea`);
+    if (input && input.value !== card.dataset.index) {
+        sendToServer(`${list}-selection`, card.dataset.index);
+    }
+});
+</script>
+""".replace("__PLACEHOLDER_IMAGE_URL__", PLACEHOLDER_IMAGE_URL)
+
 def create_travel_app():
     """ Create the Gradio travel app with all components and interactions """
 
     travel_agent = TravelAgent()
-    transcriber = AssemblyAITranscriber()
+    # One recording per browser session, see backend.transcript.sessions
+    transcribers = TranscriberManager()
+    # Chat turns are traced from the Gradio callback down to the upstream APIs, and profiled when slow
+    submit_message = profiled("ui.submit")(traced("ui.submit")(travel_agent.process_message))
 
     # Async function to initialize chat with welcome message
     async def init_chat(thread_id):
         initial_history, _, _ = await travel_agent.process_message("", [], thread_id)
         return initial_history
 
-    def toggle_transcription(is_recording, current_message):
+    async def record_transcript(session_hash, current_message, audio_source=None):
+        """ Start a recording and yield (is_recording, message) as its transcript grows, until it is stopped """
+
+        try:
+            started = await transcribers.start(session_hash, audio_source)
+        except TranscriberBusy as e:
+            gr.Warning(str(e))
+            started = False
+        if not started:
+            yield False, current_message
+            return
+        yield True, ""
+        transcript = ""
+        # Partial turns show as they are heard; a formatted turn replaces them
+        async for transcript in transcribers.stream(session_hash):
+            yield gr.update(), transcript
+        yield False, transcript
+
+    async def toggle_transcription(is_recording, current_message, request: gr.Request):
+        """ Record the server's microphone (TRANSCRIBE_AUDIO_INPUT=server), or stop the recording """
+
         if is_recording:
-            transcriber.stop()
-            transcript = transcriber.get_transcript()
-            return False, transcript, gr.update(value="🎤")
-        else:
-            transcriber.start()
-            return True, "", gr.update(value="🔴")
+            # The event that started the recording writes the final transcript once it is in
+            await transcribers.stop(request.session_hash)
+            yield gr.update(), gr.update(), gr.update()
+            return
+        async for recording, transcript in record_transcript(request.session_hash, current_message):
+            button = gr.update(value="🔴") if recording is True else gr.update(value="🎤") if recording is False else gr.update()
+            yield recording, transcript, button
+
+    async def start_browser_transcription(current_message, request: gr.Request):
+        """ The browser's microphone started: record what it streams """
+
+        async for recording, transcript in record_transcript(request.session_hash, current_message, AudioFeed()):
+            yield recording, transcript
+
+    async def stream_browser_audio(chunk, request: gr.Request):
+        if chunk is not None:
+            sample_rate, samples = chunk
+            transcribers.push(request.session_hash, sample_rate, samples)
+
+    async def stop_browser_transcription(request: gr.Request):
+        # start_browser_transcription writes the final transcript once it is in
+        await transcribers.stop(request.session_hash)
+
+    async def release_transcriber(request: gr.Request):
+        await transcribers.release(request.session_hash)
     
     def get_post_data(option_index):
         """Gives post_data for separate tickets and together tickets."""
@@ -487,49 +775,48 @@ def create_travel_app():
         
         return extract_post_data
 
-    def create_booking_handler(option_index):
-        """Create booking handler for specific option."""
-        def handle_booking(booking_data):
-            """Handle booking for a specific option."""
-            print('\n'*5)
-            print(f"option index: {option_index}")
-            print('\n'*5)
-            gr.Info(f"Processing booking for {ordinal(option_index + 1)} option...")
-            booking_options = booking_data.get("booking_options", []) if booking_data else []
-            if option_index >= len(booking_options):
-                return "⚠️ Invalid option", ""
-
-            post_data, departure_post_data, return_post_data, booking_phone, departure_booking_phone, return_booking_phone = get_post_data(option_index)(booking_data)
-
-            if departure_post_data and return_post_data:
-                # Handle round-trip booking with separate legs
-                result_depart = book_flight(departure_post_data, departure_booking_phone)
-                result_return = book_flight(return_post_data, return_booking_phone)
-                if result_depart["success"] and result_return["success"]:
-                    message = (
-                        f"Departure: {result_depart['message']}<br>"
-                        f'[Click here to book departure fligths]({result_depart["url"]})<br><br>'
-                        f"Return: {result_return['message']}<br>"
-                        f'[Click here to book return flights]({result_return["url"]})'
-                    )
-                    return message, f"Departure: {result_depart['url']} | Return: {result_return['url']}"
-                else:
-                    msg = f"Departure: {result_depart['message']}<br>Return: {result_return['message']}"
-                    return msg, ""
+    async def handle_booking(request, booking_data):
+        """ Handle a Book click from the booking list; the result is shown under that option """
+
+        version, option_index = UIManager.parse_request(request)
+        if version is None:
+            return gr.update()
+        logger.debug("Booking option index: %s", option_index)
+        booking_options = booking_data.get("booking_options", []) if booking_data else []
+        if option_index < 0 or option_index >= len(booking_options):
+            return json.dumps({"v": version, "index": option_index, "html": "⚠️ Invalid option"})
+        gr.Info(f"Processing booking for {ordinal(UIManager.booking_order(booking_data).index(option_index) + 1)} option...")
+
+        post_data, departure_post_data, return_post_data, booking_phone, departure_booking_phone, return_booking_phone = get_post_data(option_index)(booking_data)
+
+        if departure_post_data and return_post_data:
+            # Handle round-trip booking with separate legs, both resolved at once
+            result_depart, result_return = await get_booking_client().book_all([
+                (departure_post_data, departure_booking_phone),
+                (return_post_data, return_booking_phone),
+            ])
+            if result_depart["success"] and result_return["success"]:
+                message = (
+                    f"Departure: {escape(result_depart['message'])}<br>"
+                    f'<a href="{escape(result_depart["url"])}" target="_blank">Click here to book departure flights</a><br><br>'
+                    f"Return: {escape(result_return['message'])}<br>"
+                    f'<a href="{escape(result_return["url"])}" target="_blank">Click here to book return flights</a>'
+                )
+                gr.Info("Booking URL generated")
             else:
-                # Handle one-way or together booking
-                result = book_flight(post_data, booking_phone)
-                if result["success"]:
-                    # Format as markdown with hyperlink (target="_blank" for new tab)
-                    message = (
-                        f"{result['message']}<br>"
-                        f'[Click here to continue booking]({result["url"]})'
-                    )
-                    return message, result["url"]
-                else:
-                    return result["message"], ""
-
-        return handle_booking
+                message = f"Departure: {escape(result_depart['message'])}<br>Return: {escape(result_return['message'])}"
+        else:
+            # Handle one-way or together booking
+            result = await get_booking_client().book(post_data, booking_phone)
+            if result["success"]:
+                message = (
+                    f"{escape(result['message'])}<br>"
+                    f'<a href="{escape(result["url"])}" target="_blank">Click here to continue booking</a>'
+                )
+                gr.Info("Booking URL generated")
+            else:
+                message = escape(result["message"])
+        return json.dumps({"v": version, "index": option_index, "html": message})
 
     def update_button_visibility(params):
         """ Update button visibility of outbound_flight_cards buttons based on trip type """
@@ -552,60 +839,37 @@ def create_travel_app():
             "",  # message
             [],  # chatbot
             new_thread_id,  # thread_id_state
-            False,  # is_recording
-            ""  # user_message_state
+            False  # is_recording
         )
 
     def reset_flight_section():
         """ Reset all flight section-related states and UI components """
-        # Create empty card updates
-        empty_card_html = [""] * MAX_FLIGHTS
-        hidden_card_containers = [gr.update(visible=False)] * MAX_FLIGHTS
-
-        # Create empty booking updates
-        hidden_booking_groups = [gr.update(visible=False)] * MAX_BOOKING_OPTIONS
-        empty_info_updates = [""] * MAX_BOOKING_OPTIONS
-        hidden_booking_buttons = [gr.update(visible=False)] * MAX_BOOKING_OPTIONS
-        empty_booking_results = [""] * MAX_BOOKING_OPTIONS
-        empty_booking_urls = [""] * MAX_BOOKING_OPTIONS
-        
+
         return (
             # State variables
             VIEW_OUTBOUND_CARDS,  # current_view
             {},  # initial_flight_payload
             {},  # outbound_flights_state
-            None,  # selected_outbound_index
+            "",  # selected_outbound_index
             {},  # return_flights_state
-            None,  # selected_return_index
+            "",  # selected_return_index
             {},  # booking_data_state
-            
+
             # UI visibility
             gr.update(visible=False),  # flight_section
-            
-            # Outbound flight cards
-            *empty_card_html,  # outbound_card_html_components
-            *hidden_card_containers,  # outbound_card_containers
-            gr.update(interactive=False),  # outbound_view_flight_button
-            
-            # Outbound flight details
+
+            # Outbound flight cards and details
+            "",  # outbound_page (clears the list in the browser)
             "Select a flight to see details",  # outbound_flight_details_box
             gr.update(visible=False),  # outbound_booking_options_button
             gr.update(visible=False),  # get_return_flights_button
-            
-            # Return flight cards
-            *empty_card_html,  # return_card_html_components
-            *hidden_card_containers,  # return_card_containers
-            gr.update(interactive=False),  # return_view_flight_button
-            
-            # Return flight details
+
+            # Return flight cards and details
+            "",  # return_page
             "Select a return flight to see details",  # return_flight_details_box
-            
+
             # Booking section
-            *hidden_booking_groups,  # booking_groups visibility
-            *empty_info_updates,  # info_mds content
-            *hidden_booking_buttons,  # booking_buttons visibility
-            *empty_booking_results,  # booking_results content
-            *empty_booking_urls, # booking_urls content
+            "",  # booking_page
             gr.update(visible=False),  # loader_group
             gr.update(value=""),  # loader_message
             gr.update(visible=False)  # error_message
@@ -617,46 +881,80 @@ def create_travel_app():
         flight_outputs = reset_flight_section()
         return (*chatbot_outputs, *flight_outputs)
 
-    def handle_new_flight_data(flights_state, payload_state):
+    async def handle_submit(msg, history, thread_id):
         """
-        Check if new flights were fetched. If yes, reset flight section and return new data.
-        Otherwise, return unchanged states.
+        Process a chat message as one event. The message and the loader are shown first, then the
+        reply, the flight panel, its buttons and the view are sent together once the agent is done.
+        Only the components in each dict are updated.
         """
-        has_new_flights = bool(flights_state.get("flights"))
-        
-        if has_new_flights:
-            # Reset everything and update with new flight data
-            reset_outputs = reset_flight_section()
-            # Override the states that need new data
-            return (
-                VIEW_OUTBOUND_CARDS,  # current_view
-                payload_state,  # initial_flight_payload (NEW)
-                flights_state,  # outbound_flights_state (NEW)
-                *reset_outputs[3:]  # Rest of the reset outputs (selected indices, return flights, booking data, UI components)
-            )
+        history = history + [{"role": "user", "content": msg}]
+        yield {
+            message: "",
+            chatbot: history,
+            loader_group: gr.update(visible=True),
+            loader_message: "Fetching outbound flights...",
+            error_message: gr.update(visible=False),
+        }
+
+        history, flight_data, payload = await submit_message(msg, history, thread_id)
+        flight_data = flight_data or {}
+        if flight_data.get("flights"):
+            # New flights: reset the whole flight section around them
+            updates = dict(zip(flight_section_outputs, reset_flight_section()))
+            updates.update({initial_flight_payload: payload, outbound_flights_state: flight_data})
         else:
-            # No new flights, return no-change updates
-            return (
-                VIEW_OUTBOUND_CARDS,  # current_view - no change
-                {},  # initial_flight_payload - no change
-                {},  # outbound_flights_state - no change
-                *([gr.State()] * (len(reset_flight_section()) - 3))  # Rest unchanged
-            )
+            # No new flights this turn: the outbound list is cleared and the panel hidden
+            updates = {current_view: VIEW_OUTBOUND_CARDS, initial_flight_payload: {}, outbound_flights_state: {}}
+            payload = {}
+        updates.update(zip([flight_section, outbound_page, *outbound_listing_outputs], UIManager.show_listing(flight_data)))
+        updates[outbound_booking_options_button], updates[get_return_flights_button] = update_button_visibility(payload)
+        updates.update(zip(view_outputs, UIManager.update_view(VIEW_OUTBOUND_CARDS)))
+        updates[error_message] = gr.update(visible=True, value=flight_data["error"]) if flight_data.get("error") else gr.update(visible=False)
+        updates.update({chatbot: history, loader_group: gr.update(visible=False), loader_message: ""})
+        yield updates
+
+    def listing_controls():
+        """ Sort and filter controls of a card list, in the order UIManager.on_listing_controls takes them """
+
+        with gr.Accordion("Sort & filter", open=False, elem_classes=["listing-controls"]):
+            with gr.Row():
+                sort = gr.Dropdown(SORT_OPTIONS, value=SORT_BEST_VALUE, label="Sort by")
+                airlines = gr.Dropdown([], value=[], multiselect=True, label="Airlines")
+            with gr.Row():
+                stops = gr.CheckboxGroup(STOP_OPTIONS, label="Stops")
+                windows = gr.CheckboxGroup(list(DEPARTURE_WINDOWS), label="Departure")
+            max_layover = gr.Slider(1, 24, value=24, step=1, label="Max layover (hours)")
+        return [sort, stops, airlines, windows, max_layover]
 
-    with gr.Blocks(theme=gr.themes.Default(primary_hue="emerald"), css=CSS) as demo:
+    with gr.Blocks(theme=gr.themes.Default(primary_hue="emerald"), css=CSS, head=HEAD) as demo:
         gr.Markdown("Enter your travel query")
         
         thread_id_state = gr.State(travel_agent.make_thread_id())
-        user_message_state = gr.State("")
         
         current_view = gr.State(value=VIEW_OUTBOUND_CARDS)
         initial_flight_payload = gr.State(value={})
         outbound_flights_state = gr.State(value={})
-        selected_outbound_index = gr.State(value=None)
         return_flights_state = gr.State(value={})
-        selected_return_index = gr.State(value=None)
         booking_data_state = gr.State(value={})
+        # Sort/filter index of each card list, built when the listing arrives, and the order shown (best value until the controls change it)
+        outbound_index_state = gr.State()
+        outbound_order_state = gr.State()
+        return_index_state = gr.State()
+        return_order_state = gr.State()
         is_recording = gr.State(False)
+        # Channels between the server and the list script in HEAD; rendered but hidden with CSS
+        # Browser -> server: selected card indices ("" = no selection) and "version:offset" page requests
+        selected_outbound_index = gr.Textbox("", elem_id="outbound-selection", elem_classes=["selection-input"], show_label=False, container=False)
+        selected_return_index = gr.Textbox("", elem_id="return-selection", elem_classes=["selection-input"], show_label=False, container=False)
+        outbound_page_request = gr.Textbox("", elem_id="outbound-page-request", elem_classes=["selection-input"], show_label=False, container=False)
+        return_page_request = gr.Textbox("", elem_id="return-page-request", elem_classes=["selection-input"], show_label=False, container=False)
+        booking_page_request = gr.Textbox("", elem_id="booking-page-request", elem_classes=["selection-input"], show_label=False, container=False)
+        booking_request = gr.Textbox("", elem_id="booking-request", elem_classes=["selection-input"], show_label=False, container=False)
+        # Server -> browser: compact JSON pages of each list and booking results
+        outbound_page = gr.Textbox("", elem_classes=["selection-input"], show_label=False, container=False)
+        return_page = gr.Textbox("", elem_classes=["selection-input"], show_label=False, container=False)
+        booking_page = gr.Textbox("", elem_classes=["selection-input"], show_label=False, container=False)
+        booking_result = gr.Textbox("", elem_classes=["selection-input"], show_label=False, container=False)
         
         with gr.Row():
             with gr.Column():
@@ -667,34 +965,19 @@ def create_travel_app():
                     with gr.Column(elem_id="flight-container", scale=1):
                         # Added: Loader group with spinner and dynamic message
                         with gr.Group(elem_classes=["loader-container"], visible=False) as loader_group:
-                            loader = gr.HTML('<div class="loader"></div>')
+                            gr.HTML('<div class="loader"></div>')
                             loader_message = gr.Markdown("", elem_classes=["loader-message"])
                         # Added: Error message component
                         error_message = gr.Markdown(visible=False, elem_classes=["error-message"])
 
                         with gr.Column(visible=True, elem_classes=["flight-view"]) as outbound_flight_cards:
+                            outbound_controls = listing_controls()
                             with gr.Column(elem_classes=["flight-content"]):
-                                with gr.Column(elem_classes=["cards-grid"]):
-                                    outbound_card_html_components = []
-                                    outbound_card_containers = []
-                                    for card_index in range(MAX_FLIGHTS):
-                                        with gr.Column(elem_classes=["card-container"], visible=False) as card_col:
-                                            card_html = gr.HTML("")
-                                            card_button = gr.Button("", elem_classes=["click-overlay"])
-                                            outbound_card_html_components.append(card_html)
-                                            # the button is being binded to function upon click event
-                                            card_button.click(
-                                                fn=lambda x=card_index: x,
-                                                outputs=selected_outbound_index
-                                            ).then(
-                                                fn=UIManager.update_cards,
-                                                inputs=[selected_outbound_index, outbound_flights_state],
-                                                outputs=outbound_card_html_components
-                                            )
-                                        outbound_card_containers.append(card_col)
+                                with gr.Column(elem_id="outbound-cards", elem_classes=["cards-grid"]):
+                                    gr.HTML('<div class="virtual-list" data-list="outbound"><div class="virtual-window"></div></div>')
 
                             with gr.Column(elem_classes=["flight-buttons"]):
-                                outbound_view_flight_button = gr.Button("View Flight", interactive=False, elem_id="confirm-button") 
+                                outbound_view_flight_button = gr.Button("View Flight", elem_id="outbound-view-button")
                         
                         with gr.Column(visible=False, elem_classes=["flight-view"]) as outbound_flight_details:
                             with gr.Column(elem_classes=["flight-content"]):
@@ -708,30 +991,15 @@ def create_travel_app():
                                     get_return_flights_button = gr.Button("Get Return Flights", visible=False, elem_classes=["primary-btn"])
                                 
                         with gr.Column(visible=False, elem_classes=["flight-view"]) as return_flight_cards:
+                            return_controls = listing_controls()
                             with gr.Column(elem_classes=["flight-content"]):
-                                with gr.Column(elem_classes=["cards-grid"]):
-                                    return_card_html_components = []
-                                    return_card_containers = []
-                                    for card_index in range(MAX_FLIGHTS):
-                                        with gr.Column(elem_classes=["card-container"], visible=False) as card_col:
-                                            card_html = gr.HTML("")
-                                            card_button = gr.Button("", elem_classes=["click-overlay"])
-                                            return_card_html_components.append(card_html)
-                                            # the button is being binded to function upon click event
-                                            card_button.click(
-                                                fn=lambda x=card_index: x,
-                                                outputs=selected_return_index
-                                            ).then(
-                                                fn=UIManager.update_cards,
-                                                inputs=[selected_return_index, return_flights_state],
-                                                outputs=return_card_html_components
-                                            )
-                                        return_card_containers.append(card_col)
+                                with gr.Column(elem_id="return-cards", elem_classes=["cards-grid"]):
+                                    gr.HTML('<div class="virtual-list" data-list="return"><div class="virtual-window"></div></div>')
 
                             with gr.Column(elem_classes=["flight-buttons"]):
                                 with gr.Row(elem_classes=["button-row"]):
                                     return_flights_go_back_button = gr.Button("Go Back", elem_classes=["secondary-btn"])
-                                    return_view_flight_button = gr.Button("View Flight", interactive=False, elem_id="confirm-button")
+                                    return_view_flight_button = gr.Button("View Flight", elem_id="return-view-button")
                         
                         with gr.Column(visible=False, elem_classes=["flight-view"]) as return_flight_details:
                             with gr.Column(elem_classes=["flight-content"]):
@@ -749,42 +1017,7 @@ def create_travel_app():
                                     gr.Markdown("# Flight Booking Options")
                                     gr.Markdown("Select a booking option to proceed to the booking partner's website.")
                                 
-                                    booking_groups = []
-                                    info_mds = []
-                                    booking_buttons = []
-                                    booking_results = []
-                                    booking_urls = []
-                                
-                                    for i in range(MAX_BOOKING_OPTIONS):
-                                        with gr.Group(visible=False, elem_classes=["booking-option"]) as group:
-                                            info_md = gr.Markdown("")
-                                            # Row for Book button only
-                                            with gr.Row(elem_classes=["button-row"]):
-                                                btn = gr.Button("Book", elem_classes=["primary-btn"])
-                                            result = gr.Markdown(label=f"Booking Result {i+1}", show_label=False)
-                                            booking_url = gr.Textbox(
-                                                value="",
-                                                visible=False,
-                                                elem_id=f"booking_url_{i}",
-                                                show_label=False
-                                            )
-                                        
-                                            info_mds.append(info_md)
-                                            booking_buttons.append(btn)
-                                            booking_results.append(result)
-                                            booking_urls.append(booking_url)
-                                        
-                                            # Book button click - get booking URL and show markdown link
-                                            btn.click(
-                                                fn=create_booking_handler(i),
-                                                inputs=booking_data_state,
-                                                outputs=[booking_results[i], booking_urls[i]]
-                                            ).then(
-                                                fn=lambda url: gr.Info(f"Booking URL generated") if url else None,
-                                                inputs=booking_urls[i],
-                                                outputs=None  # Debug: Show URL in Gradio notification
-                                            )
-                                        booking_groups.append(group)
+                                    gr.HTML('<div class="virtual-list" data-list="booking"></div>')
 
                             with gr.Column(elem_classes=["flight-buttons"]):
                                 with gr.Row(elem_classes=["button-row"]):
@@ -793,167 +1026,120 @@ def create_travel_app():
         with gr.Group():
             with gr.Row():
                 message = gr.Textbox(show_label=False, placeholder="Enter your travel query", scale=5)
-                mic_button = gr.Button("🎤", scale=0.5, min_width=80)
+                mic_button = gr.Button("🎤", scale=0.5, min_width=80, visible=TRANSCRIBE_AUDIO_INPUT == "server")
+                browser_mic = gr.Audio(
+                    sources=["microphone"], type="numpy", streaming=True, show_label=False, container=False,
+                    scale=1, min_width=160, visible=TRANSCRIBE_AUDIO_INPUT == "browser"
+                )
 
         with gr.Row():
             reset_button = gr.Button("Reset", variant="stop")
             go_button = gr.Button("Go!", variant="primary")
         
+        # Everything reset_flight_section returns, in order
+        flight_section_outputs = [
+            current_view, initial_flight_payload, outbound_flights_state, selected_outbound_index,
+            return_flights_state, selected_return_index, booking_data_state,
+            flight_section,
+            outbound_page, outbound_flight_details_box, outbound_booking_options_button, get_return_flights_button,
+            return_page, return_flight_details_box,
+            booking_page, loader_group, loader_message, error_message
+        ]
+        # Everything UIManager.index_listing returns, in order, for each card list
+        outbound_listing_outputs = [outbound_index_state, outbound_order_state, *outbound_controls]
+        return_listing_outputs = [return_index_state, return_order_state, *return_controls]
+        # Everything UIManager.update_view returns, in order
+        view_outputs = [outbound_flight_cards, return_flight_cards, outbound_flight_details, return_flight_details, flight_booking_section]
+
+        # Lists: pages and booking results go straight to the list script, scrolling asks for more pages
+        for page, render in ((outbound_page, "outbound"), (return_page, "return"), (booking_page, "booking")):
+            page.change(fn=None, inputs=page, js=f"(value) => receivePage('{render}', value)")
+        booking_result.change(fn=None, inputs=booking_result, js="(value) => receiveBookingResult(value)")
+        outbound_page_request.change(
+            fn=UIManager.on_flight_page_request,
+            inputs=[outbound_page_request, outbound_flights_state, outbound_order_state],
+            outputs=outbound_page,
+            show_progress="hidden"
+        )
+        return_page_request.change(
+            fn=UIManager.on_flight_page_request,
+            inputs=[return_page_request, return_flights_state, return_order_state],
+            outputs=return_page,
+            show_progress="hidden"
+        )
+        booking_page_request.change(
+            fn=UIManager.on_booking_page_request,
+            inputs=[booking_page_request, booking_data_state],
+            outputs=booking_page,
+            show_progress="hidden"
+        )
+        booking_request.change(
+            fn=handle_booking,
+            inputs=[booking_request, booking_data_state],
+            outputs=booking_result,
+            show_progress="hidden"
+        )
+
+        # Sort & filter: re-order the cards over the listing's precomputed index, no backend call
+        for controls, flights_state, index_state, order_state, page, selection in (
+            (outbound_controls, outbound_flights_state, outbound_index_state, outbound_order_state, outbound_page, selected_outbound_index),
+            (return_controls, return_flights_state, return_index_state, return_order_state, return_page, selected_return_index),
+        ):
+            sort, stops, airlines, windows, max_layover = controls
+            gr.on(
+                triggers=[sort.input, stops.input, airlines.input, windows.input, max_layover.release],
+                fn=UIManager.on_listing_controls,
+                inputs=[*controls, flights_state, index_state, selection],
+                outputs=[order_state, page, selection],
+                show_progress="hidden"
+            )
+
+        # A recording's event lasts until it is stopped: the stop click must not wait behind it
+        # (trigger_mode) and recordings, capped by TRANSCRIBE_MAX_SESSIONS, must not hold the
+        # workers chat messages need (concurrency_limit)
         mic_button.click(
             fn=toggle_transcription,
             inputs=[is_recording, message],
-            outputs=[is_recording, message, mic_button]
+            outputs=[is_recording, message, mic_button],
+            trigger_mode="multiple",
+            concurrency_limit=None,
+            show_progress="hidden"
+        )
+        browser_mic.start_recording(
+            fn=start_browser_transcription,
+            inputs=message,
+            outputs=[is_recording, message],
+            trigger_mode="multiple",
+            concurrency_limit=None,
+            show_progress="hidden"
+        )
+        browser_mic.stream(
+            fn=stream_browser_audio,
+            inputs=browser_mic,
+            stream_every=0.25,
+            concurrency_limit=None,
+            show_progress="hidden"
+        )
+        browser_mic.stop_recording(
+            fn=stop_browser_transcription,
+            concurrency_limit=None,
+            show_progress="hidden"
         )
 
         
         # (0) user clicks on "go" button or "enter" inside the textbox -> message is processed and flight cards are shown if available
-        message.submit(
-            fn=lambda msg, hist: (
-                msg,  # user_message_state
-                hist + [{"role": "user", "content": msg}],  # chatbot (append user immediately)
-                "",  # message (clear input)
-                gr.update(visible=True),  # loader_group
-                gr.update(value="Fetching outbound flights..."),  # loader_message
-                gr.update(visible=False)  # error_message
-            ),
-            inputs=[message, chatbot],
-            outputs=[user_message_state, chatbot, message, loader_group, loader_message, error_message]
-        ).then(
-            fn=travel_agent.process_message,
-            inputs=[user_message_state, chatbot, thread_id_state],
-            outputs=[chatbot, outbound_flights_state, initial_flight_payload]
-        ).then(
-            # NEW: Handle potential flight section reset if new flights were fetched
-            fn=handle_new_flight_data,
-            inputs=[outbound_flights_state, initial_flight_payload],
-            outputs=[
-                current_view,
-                initial_flight_payload,
-                outbound_flights_state,
-                selected_outbound_index,
-                return_flights_state,
-                selected_return_index,
-                booking_data_state,
-                flight_section,
-                *outbound_card_html_components,
-                *outbound_card_containers,
-                outbound_view_flight_button,
-                outbound_flight_details_box,
-                outbound_booking_options_button,
-                get_return_flights_button,
-                *return_card_html_components,
-                *return_card_containers,
-                return_view_flight_button,
-                return_flight_details_box,
-                *booking_groups,
-                *info_mds,
-                *booking_buttons,
-                *booking_results,
-                *booking_urls,
-                loader_group,
-                loader_message,
-                error_message
-            ]
-        ).then(
-            fn=lambda view, data: gr.update(visible=True, value=data.get("error", "")) if data.get("error") else gr.update(visible=False),
-            inputs=[current_view, outbound_flights_state],
-            outputs=error_message
-        ).then(
-            fn=UIManager.update_flight_interface,
-            inputs=outbound_flights_state,
-            outputs=[flight_section] + outbound_card_html_components + outbound_card_containers
-        ).then(
-            fn=update_button_visibility,
-            inputs=initial_flight_payload,
-            outputs=[outbound_booking_options_button, get_return_flights_button]
-        ).then(
-            fn=UIManager.update_view,
-            inputs=current_view,
-            outputs=[outbound_flight_cards, return_flight_cards, outbound_flight_details, return_flight_details, flight_booking_section]
-        ).then(
-            fn=lambda: (gr.update(visible=False), gr.update(value="")),
-            outputs=[loader_group, loader_message]
-        ).then(
-            fn=lambda: (gr.update(value=""), gr.update(value="")),
-            outputs=[message, user_message_state]
-        )
-
-        go_button.click(
-            fn=lambda msg, hist: (
-                msg,  # user_message_state
-                hist + [{"role": "user", "content": msg}],  # chatbot (append user immediately)
-                "",  # message (clear input)
-                gr.update(visible=True),  # loader_group
-                gr.update(value="Fetching outbound flights..."),  # loader_message
-                gr.update(visible=False)  # error_message
-            ),
-            inputs=[message, chatbot],
-            outputs=[user_message_state, chatbot, message, loader_group, loader_message, error_message]
-        ).then(
-            fn=travel_agent.process_message,
-            inputs=[user_message_state, chatbot, thread_id_state],
-            outputs=[chatbot, outbound_flights_state, initial_flight_payload]
-        ).then(
-            # NEW: Handle potential flight section reset if new flights were fetched
-            fn=handle_new_flight_data,
-            inputs=[outbound_flights_state, initial_flight_payload],
-            outputs=[
-                current_view,
-                initial_flight_payload,
-                outbound_flights_state,
-                selected_outbound_index,
-                return_flights_state,
-                selected_return_index,
-                booking_data_state,
-                flight_section,
-                *outbound_card_html_components,
-                *outbound_card_containers,
-                outbound_view_flight_button,
-                outbound_flight_details_box,
-                outbound_booking_options_button,
-                get_return_flights_button,
-                *return_card_html_components,
-                *return_card_containers,
-                return_view_flight_button,
-                return_flight_details_box,
-                *booking_groups,
-                *info_mds,
-                *booking_buttons,
-                *booking_results,
-                *booking_urls,
-                loader_group,
-                loader_message,
-                error_message
-            ]
-        ).then(
-            fn=lambda view, data: gr.update(visible=True, value=data.get("error", "")) if data.get("error") else gr.update(visible=False),
-            inputs=[current_view, outbound_flights_state],
-            outputs=error_message
-        ).then(
-            fn=UIManager.update_flight_interface,
-            inputs=outbound_flights_state,
-            outputs=[flight_section] + outbound_card_html_components + outbound_card_containers
-        ).then(
-            fn=update_button_visibility,
-            inputs=initial_flight_payload,
-            outputs=[outbound_booking_options_button, get_return_flights_button]
-        ).then(
-            fn=UIManager.update_view,
-            inputs=current_view,
-            outputs=[outbound_flight_cards, return_flight_cards, outbound_flight_details, return_flight_details, flight_booking_section]
-        ).then(
-            fn=lambda: (gr.update(visible=False), gr.update(value="")),
-            outputs=[loader_group, loader_message]
-        ).then(
-            fn=lambda: (gr.update(value=""), gr.update(value="")),
-            outputs=[message, user_message_state]
+        gr.on(
+            triggers=[message.submit, go_button.click],
+            fn=handle_submit,
+            inputs=[message, chatbot, thread_id_state],
+            outputs=[message, chatbot, *flight_section_outputs, *outbound_listing_outputs, *view_outputs]
         )
         
-        # (1) User clicks on the outbound flights cards -> view flight button becomes interactive
+        # (1) User clicks on the outbound flights cards -> card is highlighted and view flight button enabled, in the browser
         selected_outbound_index.change(
-            fn=lambda idx: gr.update(interactive=idx is not None),
+            fn=None,
             inputs=selected_outbound_index,
-            outputs=outbound_view_flight_button
+            js="(value) => highlightCard('outbound', value)"
         )
         
         # (2) User clicks on the "view flight" button -> flight details are shown
@@ -964,21 +1150,17 @@ def create_travel_app():
         ).then(
             fn=UIManager.update_view,
             inputs=current_view,
-            outputs=[outbound_flight_cards, return_flight_cards, outbound_flight_details, return_flight_details, flight_booking_section]
+            outputs=view_outputs
         )
 
         # (3) User clicks on the "go back" button -> outbound flight cards are shown again
         outbound_details_go_back_button.click(
-            fn=lambda: (None, VIEW_OUTBOUND_CARDS),
+            fn=lambda: ("", VIEW_OUTBOUND_CARDS),
             outputs=[selected_outbound_index, current_view]
         ).then(
             fn=UIManager.update_view,
             inputs=current_view,
-            outputs=[outbound_flight_cards, return_flight_cards, outbound_flight_details, return_flight_details, flight_booking_section]
-        ).then(
-            fn=UIManager.update_cards,
-            inputs=[selected_outbound_index, outbound_flights_state],
-            outputs=outbound_card_html_components
+            outputs=view_outputs
         )
 
         # (4) user clicks on "finalise flight" button -> booking options are shown (type = 2)
@@ -996,11 +1178,11 @@ def create_travel_app():
         ).then(
             fn=UIManager.update_view,
             inputs=current_view,
-            outputs=[outbound_flight_cards, return_flight_cards, outbound_flight_details, return_flight_details, flight_booking_section]
+            outputs=view_outputs
         ).then(
             fn=UIManager.update_booking_ui,
             inputs=booking_data_state,
-            outputs=booking_groups + info_mds + booking_buttons + booking_urls
+            outputs=booking_page
         ).then(
             fn=lambda: (gr.update(visible=False), gr.update(value="")),
             outputs=[loader_group, loader_message]
@@ -1021,21 +1203,21 @@ def create_travel_app():
         ).then(
             fn=UIManager.update_view,
             inputs=current_view,
-            outputs=[outbound_flight_cards, return_flight_cards, outbound_flight_details, return_flight_details, flight_booking_section]
+            outputs=view_outputs
         ).then(
-            fn=UIManager.update_flight_interface,
+            fn=UIManager.show_listing,
             inputs=return_flights_state,
-            outputs=[flight_section] + return_card_html_components + return_card_containers
+            outputs=[flight_section, return_page, *return_listing_outputs]
         ).then(
             fn=lambda: (gr.update(visible=False), gr.update(value="")),
             outputs=[loader_group, loader_message]
         )
 
-        # (6) user clicks on any of the return flight cards -> view flight button becomes interactive
+        # (6) user clicks on any of the return flight cards -> card is highlighted and view flight button enabled, in the browser
         selected_return_index.change(
-            fn=lambda idx: gr.update(interactive=idx is not None),
+            fn=None,
             inputs=selected_return_index,
-            outputs=return_view_flight_button
+            js="(value) => highlightCard('return', value)"
         )
 
         # (7) use clicks on "go back" button -> outbound flight details are shown again
@@ -1046,7 +1228,7 @@ def create_travel_app():
         ).then(
             fn=UIManager.update_view,
             inputs=current_view,
-            outputs=[outbound_flight_cards, return_flight_cards, outbound_flight_details, return_flight_details, flight_booking_section]
+            outputs=view_outputs
         )
 
         # (8) user clicks on "view flight" button -> return flight details are shown
@@ -1057,21 +1239,17 @@ def create_travel_app():
         ).then(
             fn=UIManager.update_view,
             inputs=current_view,
-            outputs=[outbound_flight_cards, return_flight_cards, outbound_flight_details, return_flight_details, flight_booking_section]
+            outputs=view_outputs
         )
 
         # (9) use clicks on "go back" button -> return flight cards are shown again
         return_details_go_back_button.click(
-            fn=lambda: (None, VIEW_RETURN_CARDS),
+            fn=lambda: ("", VIEW_RETURN_CARDS),
             outputs=[selected_return_index, current_view]
         ).then(
             fn=UIManager.update_view,
             inputs=current_view,
-            outputs=[outbound_flight_cards, return_flight_cards, outbound_flight_details, return_flight_details, flight_booking_section]
-        ).then(
-            fn=UIManager.update_cards,
-            inputs=[selected_return_index, return_flights_state],
-            outputs=return_card_html_components
+            outputs=view_outputs
         )
 
         # (10) user clicks on "finalise flight" button -> booking options are shown
@@ -1089,11 +1267,11 @@ def create_travel_app():
         ).then(
             fn=UIManager.update_view,
             inputs=current_view,
-            outputs=[outbound_flight_cards, return_flight_cards, outbound_flight_details, return_flight_details, flight_booking_section]
+            outputs=view_outputs
         ).then(
             fn=UIManager.update_booking_ui,
             inputs=booking_data_state,
-            outputs=booking_groups + info_mds + booking_buttons + booking_urls
+            outputs=booking_page
         ).then(
             fn=lambda: (gr.update(visible=False), gr.update(value="")),
             outputs=[loader_group, loader_message]
@@ -1102,80 +1280,37 @@ def create_travel_app():
         # (11) user clicks on "reset" button -> everything is reset
         reset_button.click(
             fn=complete_reset,
-            outputs=[
-                # Basic inputs/outputs
-                message, chatbot, thread_id_state, is_recording, user_message_state,
-
-                # State variables
-                current_view, initial_flight_payload, outbound_flights_state,
-                selected_outbound_index, return_flights_state, selected_return_index, booking_data_state,
-                
-                # UI visibility
-                flight_section,
-                
-                # Outbound flight cards
-                *outbound_card_html_components, *outbound_card_containers, outbound_view_flight_button,
-                
-                # Outbound flight details
-                outbound_flight_details_box, outbound_booking_options_button, get_return_flights_button,
-                
-                # Return flight cards
-                *return_card_html_components, *return_card_containers, return_view_flight_button,
-                
-                # Return flight details
-                return_flight_details_box,
-                
-                # Booking section
-                *booking_groups, *info_mds, *booking_buttons, *booking_results, *booking_urls,
-                loader_group, loader_message, error_message
-            ]
+            outputs=[message, chatbot, thread_id_state, is_recording, *flight_section_outputs]
         ).then(
             fn=UIManager.update_view,
             inputs=current_view,
-            outputs=[outbound_flight_cards, return_flight_cards, outbound_flight_details, return_flight_details, flight_booking_section]
+            outputs=view_outputs
         )
 
         # (12) user clicks on "done" button in booking section -> reset entire flight section
         booking_done_button.click(
             fn=reset_flight_section,
-            outputs=[
-                current_view,
-                initial_flight_payload,
-                outbound_flights_state,
-                selected_outbound_index,
-                return_flights_state,
-                selected_return_index,
-                booking_data_state,
-                flight_section,
-                *outbound_card_html_components,
-                *outbound_card_containers,
-                outbound_view_flight_button,
-                outbound_flight_details_box,
-                outbound_booking_options_button,
-                get_return_flights_button,
-                *return_card_html_components,
-                *return_card_containers,
-                return_view_flight_button,
-                return_flight_details_box,
-                *booking_groups,
-                *info_mds,
-                *booking_buttons,
-                *booking_results,
-                *booking_urls,
-                loader_group,
-                loader_message,
-                error_message
-            ]
+            outputs=flight_section_outputs
         ).then(
             fn=UIManager.update_view,
             inputs=current_view,
-            outputs=[outbound_flight_cards, return_flight_cards, outbound_flight_details, return_flight_details, flight_booking_section]
+            outputs=view_outputs
         )
 
         demo.load(init_chat, inputs=thread_id_state, outputs=chatbot)
+        demo.unload(release_transcriber)
 
+    demo.queue(default_concurrency_limit=UI_CONCURRENCY_LIMIT)
     return demo
 
 if __name__ == "__main__":
+    from backend.routers.admin import router as admin_router
+    from backend.routers.metrics import router as metrics_router
+
     demo = create_travel_app()
-    demo.launch()
\ No newline at end of file
+    app, _, _ = demo.launch(prevent_thread_lock=True, max_threads=UI_MAX_THREADS)
+    # Runtime profiler settings for the Gradio callbacks of this process
+    app.include_router(admin_router)
+    # Metrics of this process: booking link cache, voice gate
+    app.include_router(metrics_router)
+    demo.block_thread()
\ No newline at end of file
@@ -0,0 +1,82 @@
+"""
+"Best value" ranking of a flight listing.
+
+SerpAPI splits results into best_flights and other_flights, but merge_flights_fields concatenates
+them, so the listing order carries little meaning. Here options are ranked on price,
+total_duration, stops and CO2 emissions. The Pareto front comes first: options no other option
+beats on one objective without being worse on another. The rest follow. Within each group a
+weighted score of the objectives decides, each objective min-max scaled over the listing.
+
+The front is found with sort-filter-skyline. An option can only be dominated by one with a
+strictly lower score, so the options are visited in score order, a block at a time. Each block
+is checked against the front found so far and against itself with NumPy broadcasting, which keeps
+thousands of options in the millisecond range.
+"""
+from typing import Sequence
+import numpy as np
+from shared_utils.flight_table import FlightTable
+
+BEST_VALUE_COLUMNS = ("price", "total_duration", "stops", "carbon_emissions")
+BEST_VALUE_WEIGHTS = (0.5, 0.3, 0.1, 0.1)
+# Options compared at once; a block costs block x (front + block) x objectives comparisons
+BLOCK_SIZE = 256
+
+
+def objective_matrix(table: FlightTable, columns: Sequence[str] = BEST_VALUE_COLUMNS) -> np.ndarray:
+    """ Options x objectives scaled to [0, 1] over the listing, lower is better; missing values are 2, worse than any known one """
+
+    if not len(table):
+        return np.empty((0, len(columns)))
+    values = np.column_stack([table.column(column).astype(np.float64) for column in columns])
+    # fmin/fmax skip NaN without the all-NaN warnings of nanmin/nanmax
+    low, high = np.fmin.reduce(values, axis=0), np.fmax.reduce(values, axis=0)
+    scaled = (values - low) / np.where(high > low, high - low, 1.0)
+    return np.where(np.isnan(scaled), 2.0, scaled)
+
+
+def weighted_scores(scaled: np.ndarray, weights: Sequence[float] = BEST_VALUE_WEIGHTS) -> np.ndarray:
+    """ Weighted sum of the scaled objectives; weights are kept positive so a dominating option always scores lower """
+
+    weights = np.maximum(np.asarray(weights, dtype=np.float64), 1e-9)
+    return scaled @ (weights / weights.sum())
+
+
+def _dominated(candidates: np.ndarray, by: np.ndarray) -> np.ndarray:
+    """ For each candidate, whether any option of `by` dominates it: no worse on every objective and better on one """
+
+    no_worse = np.ones((len(by), len(candidates)), dtype=bool)
+    better = np.zeros((len(by), len(candidates)), dtype=bool)
+    # One objective at a time on 2-D arrays; reducing a short trailing axis instead is several times slower
+    for objective in range(candidates.shape[1]):
+        mine, theirs = candidates[:, objective], by[:, objective]
+        no_worse &= theirs[:, None] <= mine[None, :]
+        better |= theirs[:, None] < mine[None, :]
+    return (no_worse & better).any(axis=0)
+
+
+def pareto_front(scaled: np.ndarray, scores: np.ndarray) -> np.ndarray:
+    """ Boolean mask of the non-dominated options """
+
+    on_front = np.zeros(len(scaled), dtype=bool)
+    front = scaled[:0]
+    order = np.argsort(scores, kind="stable")
+    for start in range(0, len(order), BLOCK_SIZE):
+        rows = order[start:start + BLOCK_SIZE]
+        # Most options are beaten by the front found so far; the rest are compared within the block.
+        # An option dominated by a dominated option is also dominated by the front, so dropping both is safe
+        if len(front):
+            rows = rows[~_dominated(scaled[rows], front)]
+        block = scaled[rows]
+        survivors = ~_dominated(block, block)
+        on_front[rows[survivors]] = True
+        front = np.concatenate([front, block[survivors]])
+    return on_front
+
+
+def best_value_order(table: FlightTable, weights: Sequence[float] = BEST_VALUE_WEIGHTS) -> np.ndarray:
+    """ Row numbers ranked for best value: the Pareto front first, then the rest, each by weighted score (ties in row order) """
+
+    scaled = objective_matrix(table)
+    scores = weighted_scores(scaled, weights)
+    on_front = pareto_front(scaled, scores)
+    return np.lexsort((scores, ~on_front))
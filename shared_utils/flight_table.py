@@ -0,0 +1,162 @@
+"""
+Columnar table of a SerpAPI flight listing.
+
+Listings arrive as nested dicts, and every sort key sits a few levels down
+(flight["flights"][0]["departure_airport"]["time"], flight["carbon_emissions"]["this_flight"], ...).
+FlightTable.from_listing walks them once and keeps one NumPy array per ranking field. Airlines
+and airports are interned into small vocabularies and referenced by integer codes, and each row
+keeps a reference to its raw flight for rendering. Sorting, filtering and top-k are then
+vectorized operations over the columns. Missing numbers are NaN and missing times NaT, both of
+which sort last.
+"""
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+
+
+def _number(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class Vocabulary:
+    """ Interned strings: each distinct value gets a small integer code """
+
+    def __init__(self):
+        self.values: List[str] = []
+        self.codes: Dict[str, int] = {}
+
+    def code(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class FlightTable:
+    """ One row per flight option; columns are NumPy arrays, `flights[i]` is the raw option of row i """
+
+    def __init__(self, flights: List[Dict], columns: Dict[str, np.ndarray], airlines: Vocabulary, airports: Vocabulary, airline_matrix: np.ndarray):
+        self.flights = flights
+        self.columns = columns
+        self.airlines = airlines
+        self.airports = airports
+        # airline_matrix[i, code]: row i has a leg flown by airline `code`
+        self.airline_matrix = airline_matrix
+
+    @classmethod
+    def from_listing(cls, flight_data: Optional[Dict]) -> "FlightTable":
+        """ Ingest a merged listing ({"flights": [...]}, see backend.utils.merge_flights_fields) """
+
+        flights = flight_data.get("flights", []) if flight_data else []
+        airlines, airports = Vocabulary(), Vocabulary()
+        prices, durations, stops, emissions, layovers = [], [], [], [], []
+        departures, arrivals, origins, destinations = [], [], [], []
+        airline_rows, airline_codes = [], []
+        for row, flight in enumerate(flights):
+            legs = flight.get("flights", [])
+            first = legs[0].get("departure_airport", {}) if legs else {}
+            last = legs[-1].get("arrival_airport", {}) if legs else {}
+            prices.append(_number(flight.get("price")))
+            durations.append(_number(flight.get("total_duration")))
+            stops.append(max(len(legs) - 1, 0))
+            emissions.append(_number(flight.get("carbon_emissions", {}).get("this_flight")))
+            layovers.append(max((layover.get("duration") or 0 for layover in flight.get("layovers", [])), default=0))
+            departures.append(first.get("time") or "NaT")
+            arrivals.append(last.get("time") or "NaT")
+            origins.append(airports.code(first.get("id", "")))
+            destinations.append(airports.code(last.get("id", "")))
+            for leg in legs:
+                if leg.get("airline"):
+                    airline_rows.append(row)
+                    airline_codes.append(airlines.code(leg["airline"]))
+
+        airline_matrix = np.zeros((len(flights), len(airlines)), dtype=bool)
+        airline_matrix[airline_rows, airline_codes] = True
+        columns = {
+            "price": np.array(prices, dtype=np.float64),
+            "total_duration": np.array(durations, dtype=np.float64),
+            "stops": np.array(stops, dtype=np.int16),
+            "carbon_emissions": np.array(emissions, dtype=np.float64),
+            "longest_layover": np.array(layovers, dtype=np.float64),
+            # SerpAPI times are local "YYYY-MM-DD HH:MM"; parsed in one call, minute resolution
+            "departure": np.array(departures, dtype="datetime64[m]"),
+            "arrival": np.array(arrivals, dtype="datetime64[m]"),
+            "origin": np.array(origins, dtype=np.int32),
+            "destination": np.array(destinations, dtype=np.int32),
+        }
+        return cls(flights, columns, airlines, airports, airline_matrix)
+
+    def __len__(self) -> int:
+        return len(self.flights)
+
+    def column(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def departure_minutes(self) -> np.ndarray:
+        """ Local minute of the day of the first departure, -1 when unknown """
+
+        departure = self.columns["departure"]
+        minutes = (departure - departure.astype("datetime64[D]")).astype(np.int64)
+        return np.where(np.isnat(departure), -1, minutes)
+
+    def argsort(self, column: str, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """ Row numbers ordered by `column` ascending (stable, missing values last), optionally only `rows` """
+
+        rows = np.arange(len(self)) if rows is None else np.asarray(rows)
+        return rows[np.argsort(self.columns[column][rows], kind="stable")]
+
+    def top_k(self, column: str, k: int, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """ The k rows with the smallest `column`, in order (ties in row order), without sorting the whole table """
+
+        rows = np.arange(len(self)) if rows is None else np.asarray(rows)
+        if k >= len(rows):
+            return self.argsort(column, rows=rows)
+        keys = self.columns[column][rows]
+        # Everything up to the k-th smallest key, so ties at the boundary keep their row order
+        candidates = np.flatnonzero(keys <= np.partition(keys, k - 1)[k - 1])
+        if len(candidates) < k:
+            # Fewer than k known values (NaN/NaT never compare): the missing ones come last
+            return self.argsort(column, rows=rows)[:k]
+        return rows[candidates[np.argsort(keys[candidates], kind="stable")][:k]]
+
+    def airline_codes(self, names: Iterable[str]) -> np.ndarray:
+        return np.array([self.airlines.codes[name] for name in names if name in self.airlines.codes], dtype=np.int64)
+
+    def mask(
+        self,
+        stops: Optional[Iterable[int]] = None,
+        airlines: Optional[Iterable[str]] = None,
+        departure_windows: Optional[Iterable[tuple]] = None,
+        max_layover: Optional[float] = None,
+        max_price: Optional[float] = None,
+    ) -> np.ndarray:
+        """
+        Boolean row mask of the flights that pass every given filter; None lets everything through.
+        stops: allowed stop counts.
+        airlines: rows whose legs are all flown by these airlines.
+        departure_windows: (start_hour, end_hour) ranges of the first departure's local time.
+        """
+        keep = np.ones(len(self), dtype=bool)
+        if stops is not None:
+            keep &= np.isin(self.columns["stops"], list(stops))
+        if airlines is not None:
+            others = np.ones(len(self.airlines), dtype=bool)
+            others[self.airline_codes(airlines)] = False
+            keep &= ~self.airline_matrix[:, others].any(axis=1)
+        if departure_windows is not None:
+            minutes = self.departure_minutes()
+            in_window = np.zeros(len(self), dtype=bool)
+            for start, end in departure_windows:
+                in_window |= (minutes >= start * 60) & (minutes < end * 60)
+            keep &= in_window
+        if max_layover is not None:
+            keep &= self.columns["longest_layover"] <= max_layover
+        if max_price is not None:
+            keep &= self.columns["price"] <= max_price
+        return keep
@@ -0,0 +1,49 @@
+"""
+Shared, pooled async HTTP client.
+
+Building an httpx.AsyncClient loads an SSL context (milliseconds of CPU) and every client keeps
+its own connection pool, so a client per call burns the event loop and reconnects each time.
+get_client() hands out one long-lived client per event loop instead: connections to the
+backend and the upstream APIs are kept alive and reused across requests and users. A client is
+bound to the loop it first ran on, hence one per loop rather than one per process.
+"""
+import os
+import asyncio
+import weakref
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", 90.0))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", 200))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", 50))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", 30.0))
+
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def get_client() -> httpx.AsyncClient:
+    """ The pooled client of the running event loop, created on first use """
+
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(HTTP_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+        )
+        _clients[loop] = client
+    return client
+
+
+async def close_client() -> None:
+    """ Close the running loop's client (e.g. on application shutdown) """
+
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
@@ -1,5 +1,8 @@
 import os
+import csv
 import json
+from functools import lru_cache
+from typing import List, Dict
 
 # Base directory where JSON files are stored
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
@@ -17,6 +20,22 @@ def load_json_data(filename: str) -> dict:
     except json.JSONDecodeError:
         return {"status": 500, "error": f"Failed to parse JSON file {filename}"}
 
+@lru_cache(maxsize=1)
+def load_airports(filename: str = "iata-icao.csv") -> List[Dict[str, str]]:
+    """ Load the airport reference rows (country_code, region_name, iata, icao, airport, latitude, longitude). """
+
+    filepath = os.path.join(FLIGHT_RESPONSES_DIR, filename)
+    with open(filepath, "r", encoding="utf-8", newline="") as file:
+        return list(csv.DictReader(file))
+
+@lru_cache(maxsize=1)
+def load_city_airports(filename: str = "city-airports.csv") -> List[Dict[str, str]]:
+    """ Load the city name -> airport rows (city, iata), one row per airport serving the city. """
+
+    filepath = os.path.join(FLIGHT_RESPONSES_DIR, filename)
+    with open(filepath, "r", encoding="utf-8", newline="") as file:
+        return list(csv.DictReader(file))
+
 # Load static JSON data
 # ROUND_GO_FLIGHTS = load_json_data("round_go_flights.json")
 # ROUND_RETURN_FLIGHTS = load_json_data("round_return_flights.json")
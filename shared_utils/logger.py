@@ -1,34 +1,149 @@
+import os
 import sys
+import copy
 import json
+import time
+import queue
+import atexit
+import random
 import logging
+import threading
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Messages and extra payloads longer than this are cut (0 keeps them whole)
+LOG_MAX_CHARS = int(os.getenv("LOG_MAX_CHARS", 2000))
+# Share of DEBUG records kept; hot paths log at DEBUG so this bounds their cost when enabled
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", 1.0))
+# Write from a background thread instead of the calling (often event loop) thread
+LOG_ASYNC = os.getenv("LOG_ASYNC", "true").lower() == "true"
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+
+
+def truncate(text: str, limit: int = LOG_MAX_CHARS) -> str:
+    """ Cut text to `limit` characters, noting how much was dropped """
+
+    if limit and len(text) > limit:
+        return f"{text[:limit]}... [{len(text) - limit} chars truncated]"
+    return text
+
 
 class JSONFormatter(logging.Formatter):
     def format(self, record):
         """ Format log records as JSON """
         log_data = {
-            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],
-            'message': record.getMessage(),
+            'timestamp': datetime.fromtimestamp(record.created).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],
+            'level': record.levelname,
+            'message': truncate(record.getMessage()),
             'module': record.module,
             'line': record.lineno
         }
         if hasattr(record, 'extra_data'):
-            log_data['extra'] = record.extra_data
+            log_data['extra'] = truncate(json.dumps(record.extra_data, default=str))
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            log_data['exception'] = record.exc_text
         return json.dumps(log_data)
 
-def get_logger(name='app_logger', level=logging.DEBUG):
-    """ Return a logger that outputs JSON formatted logs to stdout. """
-    logger = logging.getLogger(name)
-    logger.setLevel(level)
+
+class DebugSampler(logging.Filter):
+    """ Keep only a share of DEBUG records; other levels always pass """
+
+    def __init__(self, rate: float = LOG_DEBUG_SAMPLE_RATE):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno != logging.DEBUG or self.rate >= 1.0 or random.random() < self.rate
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves message formatting to the listener thread.
+
+    The stock handler formats every record in the calling thread before queueing it; here only
+    the traceback is rendered eagerly (its frames change once the handler returns). When the
+    queue is full records are dropped and counted instead of blocking the event loop.
+    """
+
+    dropped = 0
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DeferredQueueHandler.dropped += 1
+
+
+_handler = None
+_listener = None
+_lock = threading.Lock()
+
+
+def _build_handler() -> logging.Handler:
+    """ One shared handler for all loggers: a queue drained by a background writer, or plain stdout """
+
+    global _listener
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(JSONFormatter())
-    logger.handlers = []
-    logger.addHandler(console_handler)
+    if not LOG_ASYNC:
+        console_handler.addFilter(DebugSampler())
+        return console_handler
+
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    handler = DeferredQueueHandler(log_queue)
+    handler.addFilter(DebugSampler())
+    _listener = QueueListener(log_queue, console_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return handler
+
+
+def shutdown_logging() -> None:
+    """ Write out everything still queued and stop the background writer (get_logger starts a new one) """
+
+    global _listener, _handler
+    with _lock:
+        listener, _listener = _listener, None
+        _handler = None
+    if listener is not None:
+        listener.stop()
+
+
+def get_logger(name='app_logger', level=None):
+    """ Return a logger that outputs JSON formatted logs to stdout. """
+    global _handler
+    logger = logging.getLogger(name)
+    with _lock:
+        if _handler is None:
+            _handler = _build_handler()
+        if _handler not in logger.handlers:
+            logger.handlers = [_handler]
+            logger.propagate = False
+        logger.setLevel(level if level is not None else LOG_LEVEL)
     return logger
 
 
-# # Example with DEBUG level
-# if __name__ == "__main__":
-#     logger = setup_logger()
-#     debug_data = {"function": "calculate_metrics", "input_values": [1, 2, 3], "status": "processing"}
-#     logger.debug("Detailed calculation step", extra={"extra_data": debug_data})
\ No newline at end of file
+_last_logged = {}
+
+
+def throttled(key: str, interval: float = 1.0) -> bool:
+    """ True at most once per `interval` seconds for `key`; guards logs on hot paths """
+
+    now = time.monotonic()
+    if now - _last_logged.get(key, 0.0) >= interval:
+        _last_logged[key] = now
+        return True
+    return False
@@ -0,0 +1,262 @@
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+from shared_utils.tracing import span
+
+# Seconds; upstream flight searches routinely take several seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Bytes; flight listings run from a few KB to a few MB
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    """
+    Base for labelled collectors.
+
+    Each label combination gets its own child with its own uncontended lock, created once and
+    then found with a single dict lookup, so concurrent updates to different series never wait
+    on each other and the exposition only takes a child's lock long enough to copy it.
+    """
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def labels(self, *values):
+        """ Child series for the given label values (created on first use) """
+
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def expose(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        for key, child in list(self._children.items()):
+            lines.extend(self._expose_child(key, child))
+        return lines
+
+    def _expose_child(self, key, child) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.get())}"]
+
+
+class _Value:
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value -= amount
+
+    def set(self, value: float) -> None:
+        self._value = float(value)
+
+    def get(self) -> float:
+        return self._value
+
+
+class Counter(_Metric):
+    """ Monotonically increasing count """
+
+    type_name = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default.inc(amount)
+
+
+class Gauge(_Metric):
+    """ Value that goes up and down, e.g. requests in flight """
+
+    type_name = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default.inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._default.dec(amount)
+
+    def set(self, value: float) -> None:
+        self._default.set(value)
+
+
+class _HistogramValue:
+    def __init__(self, bounds: Tuple[float, ...]):
+        self._bounds = bounds
+        self._counts = [0] * (len(bounds) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self._bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    @contextmanager
+    def time(self):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        with self._lock:
+            return list(self._counts), self._sum
+
+
+class Histogram(_Metric):
+    """ Bucketed distribution with sum and count """
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._default.observe(value)
+
+    def _expose_child(self, key, child) -> List[str]:
+        counts, total = child.snapshot()
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """ Collection of metrics rendered together in the Prometheus text exposition format """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def expose(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.expose())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+HTTP_REQUESTS = REGISTRY.counter("http_requests_total", "HTTP requests handled by the backend", ["method", "route", "status"])
+HTTP_REQUEST_DURATION = REGISTRY.histogram("http_request_duration_seconds", "Backend request latency", ["method", "route", "status"])
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.gauge("http_requests_in_flight", "Backend requests currently being handled")
+HTTP_RESPONSE_SIZE = REGISTRY.histogram("http_response_size_bytes", "Backend response body size", ["route"], SIZE_BUCKETS)
+
+UPSTREAM_REQUESTS = REGISTRY.counter("upstream_requests_total", "Calls to external APIs", ["provider", "operation", "status"])
+UPSTREAM_DURATION = REGISTRY.histogram("upstream_request_duration_seconds", "External API latency", ["provider", "operation"])
+UPSTREAM_IN_FLIGHT = REGISTRY.gauge("upstream_requests_in_flight", "External API calls currently awaiting a response", ["provider"])
+UPSTREAM_RESPONSE_SIZE = REGISTRY.histogram("upstream_response_size_bytes", "External API response body size", ["provider", "operation"], SIZE_BUCKETS)
+
+CACHE_REQUESTS = REGISTRY.counter("cache_requests_total", "Cache lookups by cache and result", ["cache", "result"])
+
+TRANSCRIBE_AUDIO = REGISTRY.counter("transcribe_audio_seconds_total", "Recorded audio by what became of it: sent as speech, hangover or keepalive, suppressed by the voice gate, or dropped on overflow", ["result"])
+
+
+class UpstreamCall:
+    """ Handle yielded by upstream_call; assign the httpx response to record status and size """
+
+    response = None
+
+
+@contextmanager
+def upstream_call(provider: str, operation: str):
+    """
+    Time and trace one external API call.
+
+    with upstream_call("serpapi", "search") as call:
+        call.response = await client.get(url)
+    """
+
+    call = UpstreamCall()
+    in_flight = UPSTREAM_IN_FLIGHT.labels(provider)
+    in_flight.inc()
+    started = time.perf_counter()
+    with span(f"upstream.{provider}", operation=operation) as current:
+        try:
+            yield call
+        finally:
+            in_flight.dec()
+            UPSTREAM_DURATION.labels(provider, operation).observe(time.perf_counter() - started)
+            response = call.response
+            status = response.status_code if response is not None else "error"
+            UPSTREAM_REQUESTS.labels(provider, operation, status).inc()
+            current.set_attribute("status", status)
+            if response is not None:
+                UPSTREAM_RESPONSE_SIZE.labels(provider, operation).observe(len(response.content))
+                current.set_attribute("payload_bytes", len(response.content))
+
+
+def record_cache(cache: str, hit: Optional[bool]) -> None:
+    """ Count a cache lookup; hit=None counts a lookup that bypassed the cache """
+
+    CACHE_REQUESTS.labels(cache, "bypass" if hit is None else "hit" if hit else "miss").inc()
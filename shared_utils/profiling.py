@@ -0,0 +1,195 @@
+"""
+Opt-in statistical profiler for slow requests and Gradio callbacks.
+
+A sampled request registers a session; while any session is open a daemon thread wakes every
+`interval_ms` and records the stack of the thread the request runs on (sys._current_frames).
+When that thread is idle in the event loop's selector, the request task's suspended coroutine
+chain is recorded instead, marked "(await)", so time spent waiting on upstream APIs shows up
+under the awaiting call site. Requests slower than `threshold_ms` write their samples in the
+collapsed-stack format ("frame;frame;frame count") read by flamegraph.pl, speedscope and
+inferno. Other requests on the same event loop run on the same thread, so under concurrency
+a profile also contains their CPU work.
+"""
+import os
+import re
+import sys
+import time
+import random
+import asyncio
+import inspect
+import functools
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+from dotenv import load_dotenv
+from pydantic import BaseModel, Field
+from shared_utils.logger import get_logger
+
+load_dotenv(override=True)
+logger = get_logger()
+
+# Frames the event loop sits in while it has nothing to run
+IDLE_FUNCTIONS = {"select", "poll", "_run_once", "run_forever"}
+
+
+class ProfilerConfig(BaseModel):
+    enabled: bool = Field(description="Profile sampled requests", default=os.getenv("PROFILER_ENABLED", "false").lower() == "true")
+    sample_rate: float = Field(description="Share of requests profiled", default=float(os.getenv("PROFILER_SAMPLE_RATE", 0.1)), ge=0, le=1)
+    threshold_ms: float = Field(description="Profiles of requests faster than this are discarded", default=float(os.getenv("PROFILER_THRESHOLD_MS", 2000)), ge=0)
+    interval_ms: float = Field(description="Stack sampling interval", default=float(os.getenv("PROFILER_INTERVAL_MS", 5)), gt=0)
+    output_dir: str = Field(description="Directory profiles are written to", default=os.getenv("PROFILER_OUTPUT_DIR", "profiles"))
+
+
+class ProfileSession:
+    """ Samples collected for one request """
+
+    def __init__(self, name: str, thread_id: int, task: Optional[asyncio.Task]):
+        self.name = name
+        self.thread_id = thread_id
+        self.task = task
+        self.samples: Counter = Counter()
+        self.started = time.perf_counter()
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def _thread_stack(frame) -> List[str]:
+    stack = []
+    while frame is not None:
+        stack.append(_frame_label(frame))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+def _coroutine_stack(task: asyncio.Task) -> List[str]:
+    """ Suspended call chain of a task, outermost first, following each coroutine's await """
+
+    stack = []
+    awaitable = task.get_coro()
+    while awaitable is not None:
+        frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None)
+        if frame is None:
+            break
+        stack.append(_frame_label(frame))
+        awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+    return stack
+
+
+class Profiler:
+    """ Shared sampler thread plus the per-request sessions it feeds """
+
+    def __init__(self, config: Optional[ProfilerConfig] = None):
+        self.config = config or ProfilerConfig()
+        self.sessions: Dict[int, ProfileSession] = {}
+        self.profiled = 0
+        self.written: List[str] = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def update(self, **changes) -> ProfilerConfig:
+        """ Apply runtime settings (validated like the env defaults) """
+
+        self.config = ProfilerConfig(**{**self.config.model_dump(), **changes})
+        return self.config
+
+    def start(self, name: str) -> Optional[ProfileSession]:
+        """ Open a session for the calling thread/task if profiling is on and this request is sampled """
+
+        config = self.config
+        if not config.enabled or random.random() >= config.sample_rate:
+            return None
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        session = ProfileSession(name, threading.get_ident(), task)
+        with self._lock:
+            self.sessions[id(session)] = session
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+        return session
+
+    def stop(self, session: Optional[ProfileSession], label: Optional[str] = None) -> Optional[str]:
+        """ Close a session; write its profile when the request exceeded the threshold """
+
+        if session is None:
+            return None
+        with self._lock:
+            self.sessions.pop(id(session), None)
+        self.profiled += 1
+        elapsed_ms = (time.perf_counter() - session.started) * 1000
+        if elapsed_ms < self.config.threshold_ms or not session.samples:
+            return None
+        return self._write(session, label or session.name, elapsed_ms)
+
+    def _write(self, session: ProfileSession, label: str, elapsed_ms: float) -> str:
+        os.makedirs(self.config.output_dir, exist_ok=True)
+        safe_label = re.sub(r"[^A-Za-z0-9_.-]+", "_", label).strip("_")
+        filename = f"{datetime.now():%Y%m%d-%H%M%S}_{safe_label}_{elapsed_ms:.0f}ms.folded"
+        path = os.path.join(self.config.output_dir, filename)
+        with open(path, "w") as file:
+            for stack, count in session.samples.most_common():
+                file.write(f"{stack} {count}\n")
+        self.written = (self.written + [path])[-50:]
+        logger.info("Slow request profile (%.0f ms, %d samples) written to %s", elapsed_ms, sum(session.samples.values()), path)
+        return path
+
+    def _run(self) -> None:
+        while True:
+            # Cleared before reading the sessions so a start() in between is never missed
+            self._wakeup.clear()
+            with self._lock:
+                sessions = list(self.sessions.values())
+            if not sessions:
+                self._wakeup.wait()
+                continue
+            frames = sys._current_frames()
+            for session in sessions:
+                frame = frames.get(session.thread_id)
+                if frame is None:
+                    continue
+                stack = _thread_stack(frame)
+                if session.task is not None and frame.f_code.co_name in IDLE_FUNCTIONS:
+                    stack = ["(await)"] + _coroutine_stack(session.task)
+                session.samples[";".join(stack)] += 1
+            time.sleep(self.config.interval_ms / 1000)
+
+    def stats(self) -> Dict:
+        return {"config": self.config, "active": len(self.sessions), "profiled": self.profiled, "recent_profiles": self.written[-10:]}
+
+
+profiler = Profiler()
+
+
+def profiled(name: str):
+    """ Decorator profiling a sync or async handler (e.g. a Gradio callback) like the backend middleware does """
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                session = profiler.start(name)
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    profiler.stop(session)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            session = profiler.start(name)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profiler.stop(session)
+        return wrapper
+
+    return decorator
@@ -0,0 +1,258 @@
+"""
+Lightweight span tracing across the UI, the agent, the tools, the backend and the upstream APIs.
+
+Spans live in a context variable, so nesting follows the call stack across awaits and into the
+executor threads LangGraph uses for sync nodes. The trace context crosses the tool -> backend
+HTTP hop in a W3C `traceparent` header (inject_headers / the backend's TracingMiddleware), so a
+turn's spans share one trace id even though they are written by different processes.
+
+Finished spans are appended as JSON lines to TRACE_FILE. Print the critical path of the
+slowest turns with:
+    python -m shared_utils.tracing [--file traces.jsonl] [--top 5]
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import inspect
+import argparse
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() == "true"
+TRACE_FILE = os.getenv("TRACE_FILE", "traces.jsonl")
+TRACE_HEADER = "traceparent"
+# Recorded with every span; each entrypoint names its process with set_service_name()
+SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", os.path.basename(sys.argv[0]) or "python")
+
+
+class Span:
+    """ One timed operation; attributes are free-form key/values such as route or payload bytes """
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "attributes", "start", "_started", "duration_ms", "status")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start = time.time()
+        self._started = time.perf_counter()
+        self.duration_ms = 0.0
+        self.status = "ok"
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "service": SERVICE_NAME,
+            "start": self.start,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """ Returned while tracing is disabled so call sites never need to check """
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+# Remote parent (trace id, span id) extracted from an incoming request
+_remote_parent: contextvars.ContextVar[Optional[tuple]] = contextvars.ContextVar("remote_parent", default=None)
+
+
+class JSONLExporter:
+    """ Appends finished spans to a JSON lines file, one line per span """
+
+    def __init__(self, path: str = TRACE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str) + "\n"
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "a", buffering=1)
+            self._file.write(line)
+
+
+exporter = JSONLExporter()
+
+
+def set_service_name(name: str) -> None:
+    """ Name the process recorded with its spans, unless TRACE_SERVICE_NAME is set """
+
+    global SERVICE_NAME
+    SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", name)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Open a span as a child of the current one (or of the remote parent, or as a new trace).
+
+    with span("tool.get_flights", route="/api/outbound-flights") as current:
+        current.set_attribute("payload_bytes", len(body))
+    """
+
+    if not TRACING_ENABLED:
+        yield NOOP_SPAN
+        return
+
+    parent = _current_span.get()
+    if parent is not None:
+        trace_id, parent_id = parent.trace_id, parent.span_id
+    else:
+        trace_id, parent_id = _remote_parent.get() or (uuid.uuid4().hex, None)
+    current = Span(name, trace_id, parent_id, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.status = "error"
+        current.attributes["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.duration_ms = (time.perf_counter() - current._started) * 1000
+        _current_span.reset(token)
+        exporter.export(current)
+
+
+def traced(name: str):
+    """ Decorator running a sync or async function inside a span """
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+def current_span():
+    """ The innermost open span, or a no-op span outside any """
+
+    return _current_span.get() or NOOP_SPAN
+
+
+def inject_headers(headers: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """ Return headers carrying the current trace context for an outgoing HTTP call """
+
+    headers = dict(headers or {})
+    current = _current_span.get()
+    if TRACING_ENABLED and current is not None:
+        headers[TRACE_HEADER] = f"00-{current.trace_id}-{current.span_id}-01"
+    return headers
+
+
+@contextmanager
+def remote_parent(header: Optional[str]):
+    """ Make spans opened inside this block children of the span described by a traceparent header """
+
+    parts = (header or "").split("-")
+    if len(parts) != 4 or len(parts[1]) != 32:
+        yield
+        return
+    token = _remote_parent.set((parts[1], parts[2]))
+    try:
+        yield
+    finally:
+        _remote_parent.reset(token)
+
+
+def load_spans(path: str) -> List[Dict[str, Any]]:
+    spans = []
+    with open(path) as file:
+        for line in file:
+            line = line.strip()
+            if line:
+                spans.append(json.loads(line))
+    return spans
+
+
+def critical_path(root: Dict[str, Any], children: Dict[str, List[Dict[str, Any]]]) -> List[tuple]:
+    """
+    (depth, span) pairs on the critical path below root.
+
+    Walking back from the end of a span, the child that finishes last is what the parent was
+    waiting on; before that child started, the latest-finishing earlier child, and so on.
+    The first child is taken even if it ends slightly after its parent: a server span closes
+    after its response bytes have already reached the client.
+    """
+
+    path = [(0, root)]
+
+    def walk(parent, depth):
+        cursor = float("inf")
+        chosen = []
+        for child in sorted(children.get(parent["span_id"], []), key=lambda s: s["start"] + s["duration_ms"] / 1000, reverse=True):
+            end = child["start"] + child["duration_ms"] / 1000
+            if end <= cursor + 1e-3:
+                chosen.append(child)
+                cursor = child["start"]
+        for child in reversed(chosen):
+            path.append((depth, child))
+            walk(child, depth + 1)
+
+    walk(root, 1)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print the critical path of the slowest traced turns")
+    parser.add_argument("--file", default=TRACE_FILE, help="JSONL trace file")
+    parser.add_argument("--top", type=int, default=5, help="number of slowest traces to show")
+    parser.add_argument("--root", default=None, help="only consider root spans with this name (default: any root)")
+    args = parser.parse_args()
+
+    spans = load_spans(args.file)
+    by_id = {s["span_id"]: s for s in spans}
+    children: Dict[str, List[Dict[str, Any]]] = {}
+    roots = []
+    for s in spans:
+        if s["parent_id"] and s["parent_id"] in by_id:
+            children.setdefault(s["parent_id"], []).append(s)
+        elif args.root is None or s["name"] == args.root:
+            roots.append(s)
+
+    for root in sorted(roots, key=lambda s: s["duration_ms"], reverse=True)[:args.top]:
+        print(f"trace {root['trace_id']}  {root['name']}  {root['duration_ms']:.1f} ms")
+        for depth, s in critical_path(root, children):
+            own = s["duration_ms"] - sum(c["duration_ms"] for c in children.get(s["span_id"], []))
+            attributes = " ".join(f"{k}={v}" for k, v in s["attributes"].items())
+            label = "  " * depth + s["name"]
+            print(f"  {label:<48} {s['duration_ms']:>9.1f} ms  self {max(own, 0.0):>8.1f} ms  [{s['service']}] {attributes}")
+        print()
+
+
+if __name__ == "__main__":
+    main()